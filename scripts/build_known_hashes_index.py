@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Script to build an index of known message digest hashes."""
+
+import argparse
+import hashlib
+import itertools
+import logging
+import sys
+import time
+
+from scripts import helpers
+
+
+def Main():
+  """The main program function.
+
+  Returns:
+    bool: True if successful or False if not.
+  """
+  argument_parser = argparse.ArgumentParser(description=(
+      'Builds an index of known message digest hashes, such as a hash set of '
+      'the NSRL, that can be used by the recursive hasher to tag or suppress '
+      'known files.'))
+
+  argument_parser.add_argument(
+      '--hash', dest='hash', action='store', type=str, default='sha256',
+      choices=['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512'],
+      help=(
+          'name of the message digest hash of the digests in the hash sets. '
+          'The default is: sha256.'))
+
+  argument_parser.add_argument(
+      'index', nargs='?', action='store', metavar='known.idx', default=None,
+      help='path of the index file to write.')
+
+  argument_parser.add_argument(
+      'hash_sets', nargs='*', action='store', metavar='hashes.txt',
+      default=None, help=(
+          'path of a text file that contains one hexadecimal digest per line, '
+          'such as a list of digests or a comma separated values file like '
+          'the NSRL RDS. Other columns, headers and lines starting with "#" '
+          'are ignored.'))
+
+  options = argument_parser.parse_args()
+
+  if not options.index or not options.hash_sets:
+    print('Index or hash set value is missing.')
+    print('')
+    argument_parser.print_help()
+    print('')
+    return False
+
+  logging.basicConfig(
+      level=logging.INFO, format='[%(levelname)s] %(message)s')
+
+  digest_size = hashlib.new(options.hash).digest_size
+
+  digests = itertools.chain.from_iterable([
+      helpers.ReadHexDigests(path, digest_size) for path in options.hash_sets])
+
+  start_time = time.monotonic()
+
+  try:
+    number_of_digests = helpers.KnownHashesIndex.Build(
+        options.index, options.hash, digests)
+
+  except (IOError, OSError, ValueError) as exception:
+    print('Unable to build index with error: {0!s}.'.format(exception))
+    print('')
+    return False
+
+  except KeyboardInterrupt:
+    print('Aborted by user.')
+    return False
+
+  print('Indexed {0:d} unique {1:s} digests in {2:.1f} seconds.'.format(
+      number_of_digests, options.hash, time.monotonic() - start_time))
+
+  return True
+
+
+if __name__ == '__main__':
+  if not Main():
+    sys.exit(1)
+  else:
+    sys.exit(0)
@@ -1,14 +1,452 @@
 # -*- coding: utf-8 -*-
 """Helper functions for dfVFS snippets CLI tools."""
 
+import collections
+import contextlib
+import fnmatch
+import hashlib
+import heapq
+import json
+import logging
+import mmap
+import os
 import re
+import struct
+import tempfile
+import time
 
+from dfvfs.helpers import source_scanner
+from dfvfs.helpers import volume_scanner
 from dfvfs.lib import definitions as dfvfs_definitions
+from dfvfs.lib import errors as dfvfs_errors
+from dfvfs.serializer import json_serializer
 
 
 _UNICODE_SURROGATES_RE = re.compile('[\ud800-\udfff]')
 
 
+def AddFileEntryFilterArguments(argument_parser):
+  """Adds the file entry filter arguments to an argument parser.
+
+  Args:
+    argument_parser (argparse.ArgumentParser): argument parser.
+  """
+  argument_parser.add_argument(
+      '--exclude', dest='exclude', action='append', metavar='GLOB',
+      default=None, help=(
+          'glob pattern of paths of file entries to exclude, where "*", "?" '
+          'and "[...]" match within a path segment and "**" matches zero or '
+          'more path segments. A pattern that does not start with "/" '
+          'matches at any depth. Patterns are matched case insensitive. '
+          'Excluded directories are not enumerated. Can be specified '
+          'multiple times.'))
+
+  argument_parser.add_argument(
+      '--exclude_regex', '--exclude-regex', dest='exclude_regex',
+      action='append', metavar='REGEX', default=None, help=(
+          'regular expression that is searched for in the full path of file '
+          'entries to exclude. Excluded directories are not enumerated. Can '
+          'be specified multiple times.'))
+
+  argument_parser.add_argument(
+      '--file_types', '--file-types', dest='file_types', action='store',
+      type=str, metavar='file,link', default=None, help=(
+          'comma separated list of the types of file entries to include. '
+          'Supported types are: {0:s}.').format(', '.join(sorted(
+              FileEntryFilter.SUPPORTED_FILE_TYPES))))
+
+  argument_parser.add_argument(
+      '--include', dest='include', action='append', metavar='GLOB',
+      default=None, help=(
+          'glob pattern of paths of file entries to include, with the same '
+          'syntax as --exclude. Directories that cannot contain included file '
+          'entries are not enumerated. Can be specified multiple times.'))
+
+  argument_parser.add_argument(
+      '--include_regex', '--include-regex', dest='include_regex',
+      action='append', metavar='REGEX', default=None, help=(
+          'regular expression that is searched for in the full path of file '
+          'entries to include. Note that directories cannot be pruned based '
+          'on regular expressions. Can be specified multiple times.'))
+
+  argument_parser.add_argument(
+      '--maximum_size', '--maximum-size', dest='maximum_size', action='store',
+      type=int, metavar='BYTES', default=None, help=(
+          'maximum size of file entries, other than directories, to '
+          'include.'))
+
+  argument_parser.add_argument(
+      '--minimum_size', '--minimum-size', dest='minimum_size', action='store',
+      type=int, metavar='BYTES', default=None, help=(
+          'minimum size of file entries, other than directories, to '
+          'include.'))
+
+
+class DisplayPathBuilder(object):
+  """Builds the paths of file entries to display.
+
+  Non-printable characters in the path segments and data stream names are
+  escaped. Since file entries are enumerated depth-first, consecutive file
+  entries typically share their parent directories. Therefore the escaped
+  display path of every parent directory, including the location of the
+  partition, is cached so that only the name of the file entry itself needs
+  to be escaped and appended.
+  """
+
+  _NON_PRINTABLE_CHARACTERS = list(range(0, 0x20)) + list(range(0x7f, 0xa0))
+  _ESCAPE_CHARACTERS = str.maketrans({
+      value: '\\x{0:02x}'.format(value)
+      for value in _NON_PRINTABLE_CHARACTERS})
+
+  def __init__(self):
+    """Initializes a display path builder."""
+    super(DisplayPathBuilder, self).__init__()
+    self._display_path_prefixes = []
+    self._location_prefix = ''
+    self._parent_path_spec = None
+    self._path_segments = []
+
+  def _GetLocationPrefix(self, path_spec):
+    """Retrieves the location of the partition to prefix the path with.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+
+    Returns:
+      str: location of the partition or an empty string if the file entry is
+          not stored in a partition.
+    """
+    parent_path_spec = path_spec.parent
+    if parent_path_spec is self._parent_path_spec:
+      return self._location_prefix
+
+    location_prefix = ''
+    if parent_path_spec and parent_path_spec.type_indicator in (
+        dfvfs_definitions.PARTITION_TABLE_TYPE_INDICATORS):
+      location_prefix = parent_path_spec.location
+
+    self._parent_path_spec = parent_path_spec
+    return location_prefix
+
+  def GetDisplayPath(self, path_spec, path_segments, data_stream_name=None):
+    """Retrieves the path of a file entry to display.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+      path_segments (list[str]): path segments of the full path of the file
+          entry.
+      data_stream_name (Optional[str]): name of the data stream.
+
+    Returns:
+      str: path to display.
+    """
+    location_prefix = self._GetLocationPrefix(path_spec)
+    if location_prefix != self._location_prefix:
+      self._display_path_prefixes = []
+      self._location_prefix = location_prefix
+      self._path_segments = []
+
+    # Determine the number of parent directories of which the display path is
+    # cached.
+    number_of_parent_segments = max(len(path_segments) - 1, 0)
+    depth = min(len(self._path_segments), number_of_parent_segments)
+    if self._path_segments[:depth] != path_segments[:depth]:
+      depth = next(
+          index for index, path_segment in enumerate(self._path_segments)
+          if path_segment != path_segments[index])
+
+    del self._display_path_prefixes[depth:]
+    del self._path_segments[depth:]
+
+    for path_segment in path_segments[depth:number_of_parent_segments]:
+      escaped_path_segment = path_segment.translate(self._ESCAPE_CHARACTERS)
+      if self._display_path_prefixes:
+        display_path_prefix = '/'.join([
+            self._display_path_prefixes[-1], escaped_path_segment])
+      else:
+        display_path_prefix = ''.join([location_prefix, escaped_path_segment])
+
+      self._display_path_prefixes.append(display_path_prefix)
+      self._path_segments.append(path_segment)
+
+    if not path_segments:
+      display_path = location_prefix
+    else:
+      escaped_path_segment = path_segments[-1].translate(
+          self._ESCAPE_CHARACTERS)
+      if self._display_path_prefixes:
+        display_path = '/'.join([
+            self._display_path_prefixes[-1], escaped_path_segment])
+      else:
+        display_path = ''.join([location_prefix, escaped_path_segment])
+
+    if data_stream_name:
+      data_stream_name = data_stream_name.translate(self._ESCAPE_CHARACTERS)
+      display_path = ':'.join([display_path, data_stream_name])
+
+    return display_path or '/'
+
+
+class FileEntryFilter(object):
+  """Filter of file entries based on their path, type and size.
+
+  Glob patterns are compiled into path pattern tries, which are matched per
+  path segment while the file entries are enumerated. Hence a directory can
+  be pruned, before its sub file entries are enumerated, when it is excluded
+  or when it cannot contain included file entries. Regular expressions are
+  searched for in the full path, hence directories can be pruned based on
+  exclude regular expressions but not on include regular expressions.
+
+  The state of the filter of a file entry is a tuple of the states of the
+  include and exclude path pattern tries.
+  """
+
+  SUPPORTED_FILE_TYPES = frozenset([
+      dfvfs_definitions.FILE_ENTRY_TYPE_DEVICE,
+      dfvfs_definitions.FILE_ENTRY_TYPE_DIRECTORY,
+      dfvfs_definitions.FILE_ENTRY_TYPE_FILE,
+      dfvfs_definitions.FILE_ENTRY_TYPE_LINK,
+      dfvfs_definitions.FILE_ENTRY_TYPE_PIPE,
+      dfvfs_definitions.FILE_ENTRY_TYPE_SOCKET])
+
+  def __init__(
+      self, exclude_patterns=None, exclude_regexes=None, file_types=None,
+      include_patterns=None, include_regexes=None, maximum_size=None,
+      minimum_size=None):
+    """Initializes a file entry filter.
+
+    Args:
+      exclude_patterns (Optional[list[str]]): glob patterns of paths of file
+          entries to exclude.
+      exclude_regexes (Optional[list[str]]): regular expressions to search
+          for in the paths of file entries to exclude.
+      file_types (Optional[list[str]]): types of file entries to include,
+          where None represents all types.
+      include_patterns (Optional[list[str]]): glob patterns of paths of file
+          entries to include.
+      include_regexes (Optional[list[str]]): regular expressions to search
+          for in the paths of file entries to include.
+      maximum_size (Optional[int]): maximum size of file entries, other than
+          directories, to include.
+      minimum_size (Optional[int]): minimum size of file entries, other than
+          directories, to include.
+
+    Raises:
+      ValueError: if a regular expression or file type is not supported.
+    """
+    unsupported_file_types = set(file_types or []).difference(
+        self.SUPPORTED_FILE_TYPES)
+    if unsupported_file_types:
+      raise ValueError('Unsupported file types: {0:s}'.format(
+          ', '.join(sorted(unsupported_file_types))))
+
+    try:
+      exclude_regexes = [re.compile(regex) for regex in exclude_regexes or []]
+      include_regexes = [re.compile(regex) for regex in include_regexes or []]
+    except re.error as exception:
+      raise ValueError(
+          'Unsupported regular expression with error: {0!s}'.format(exception))
+
+    super(FileEntryFilter, self).__init__()
+    self._exclude_regexes = exclude_regexes
+    self._exclude_trie = None
+    self._file_types = frozenset(file_types or [])
+    self._include_regexes = include_regexes
+    self._include_trie = None
+    self._maximum_size = maximum_size
+    self._minimum_size = minimum_size
+
+    if exclude_patterns:
+      self._exclude_trie = PathPatternTrie(exclude_patterns)
+    if include_patterns:
+      self._include_trie = PathPatternTrie(include_patterns)
+
+  def _GetPath(self, path_segments):
+    """Retrieves the full path of path segments.
+
+    Args:
+      path_segments (list[str]): path segments of the full path, where the
+          first segment is the name of the root.
+
+    Returns:
+      str: full path.
+    """
+    return '/'.join(path_segments) or '/'
+
+  def _IsExcluded(self, state, path_segments):
+    """Determines if a path is excluded.
+
+    Args:
+      state (tuple[object, object]): state of the filter of the path.
+      path_segments (list[str]): path segments of the full path.
+
+    Returns:
+      bool: True if the path is excluded.
+    """
+    _, exclude_state = state
+    if self._exclude_trie and self._exclude_trie.IsMatch(exclude_state):
+      return True
+
+    if self._exclude_regexes:
+      path = self._GetPath(path_segments)
+      for regex in self._exclude_regexes:
+        if regex.search(path):
+          return True
+
+    return False
+
+  def CanContainMatches(self, state):
+    """Determines if sub file entries of a file entry can be included.
+
+    Args:
+      state (tuple[object, object]): state of the filter of the file entry.
+
+    Returns:
+      bool: True if the sub file entries can be included and the file entry
+          should be enumerated.
+    """
+    if not self._include_trie or self._include_regexes:
+      return True
+
+    include_state, _ = state
+    return self._include_trie.CanMatchSubPaths(include_state)
+
+  def GetState(self, path_segments):
+    """Retrieves the state of the filter of a path.
+
+    Args:
+      path_segments (list[str]): path segments of the full path, where the
+          first segment is the name of the root.
+
+    Returns:
+      tuple[object, object]: state of the filter or None if the path is
+          excluded.
+    """
+    include_state = None
+    if self._include_trie:
+      include_state = self._include_trie.GetInitialState()
+
+    exclude_state = None
+    if self._exclude_trie:
+      exclude_state = self._exclude_trie.GetInitialState()
+
+    state = (include_state, exclude_state)
+    if self._IsExcluded(state, path_segments[:1]):
+      return None
+
+    for index in range(1, len(path_segments)):
+      state = self.GetSubState(state, path_segments[:index + 1])
+      if state is None:
+        break
+
+    return state
+
+  def GetSubState(self, state, path_segments):
+    """Retrieves the state of the filter of a sub file entry.
+
+    Args:
+      state (tuple[object, object]): state of the filter of the parent file
+          entry.
+      path_segments (list[str]): path segments of the full path of the sub
+          file entry.
+
+    Returns:
+      tuple[object, object]: state of the filter of the sub file entry or
+          None if the sub file entry is excluded.
+    """
+    include_state, exclude_state = state
+    path_segment = path_segments[-1]
+
+    if self._include_trie:
+      include_state = self._include_trie.GetNextState(
+          include_state, path_segment)
+    if self._exclude_trie:
+      exclude_state = self._exclude_trie.GetNextState(
+          exclude_state, path_segment)
+
+    state = (include_state, exclude_state)
+    if self._IsExcluded(state, path_segments):
+      return None
+
+    return state
+
+  def Matches(self, state, path_segments, file_entry):
+    """Determines if a file entry is included.
+
+    Args:
+      state (tuple[object, object]): state of the filter of the file entry.
+      path_segments (list[str]): path segments of the full path of the file
+          entry.
+      file_entry (dfvfs.FileEntry): file entry.
+
+    Returns:
+      bool: True if the file entry is included.
+    """
+    if self._file_types and file_entry.entry_type not in self._file_types:
+      return False
+
+    if self._minimum_size is not None or self._maximum_size is not None:
+      if not file_entry.IsDirectory():
+        size = file_entry.size or 0
+        if self._minimum_size is not None and size < self._minimum_size:
+          return False
+        if self._maximum_size is not None and size > self._maximum_size:
+          return False
+
+    if not self._include_trie and not self._include_regexes:
+      return True
+
+    include_state, _ = state
+    if self._include_trie and self._include_trie.IsMatch(include_state):
+      return True
+
+    if self._include_regexes:
+      path = self._GetPath(path_segments)
+      for regex in self._include_regexes:
+        if regex.search(path):
+          return True
+
+    return False
+
+
+def GetFileEntryFilter(options):
+  """Retrieves a file entry filter from command line options.
+
+  Args:
+    options (argparse.Namespace): command line options, which contain the
+        arguments added by AddFileEntryFilterArguments.
+
+  Returns:
+    FileEntryFilter: file entry filter or None if no filter was specified.
+
+  Raises:
+    ValueError: if a filter option is not supported.
+  """
+  file_types = None
+  if options.file_types:
+    file_types = [
+        file_type.strip().lower() for file_type in options.file_types.split(',')
+        if file_type.strip()]
+
+  for name in ('maximum_size', 'minimum_size'):
+    value = getattr(options, name)
+    if value is not None and value < 0:
+      raise ValueError('Unsupported {0:s}: {1:d}'.format(
+          name.replace('_', ' '), value))
+
+  if not any([
+      options.exclude, options.exclude_regex, file_types, options.include,
+      options.include_regex, options.maximum_size is not None,
+      options.minimum_size is not None]):
+    return None
+
+  return FileEntryFilter(
+      exclude_patterns=options.exclude, exclude_regexes=options.exclude_regex,
+      file_types=file_types, include_patterns=options.include,
+      include_regexes=options.include_regex, maximum_size=options.maximum_size,
+      minimum_size=options.minimum_size)
+
+
 def GetPathSpecificationString(path_spec):
   """Retrieves a printable string representation of the path specification.
 
@@ -29,6 +467,1119 @@ def GetPathSpecificationString(path_spec):
   return path_spec_string
 
 
+def IterateFileEntries(
+    file_entry, file_entry_filter=None, parent_path_segments=None,
+    profiler=None):
+  """Iterates over a file entry and its sub file entries.
+
+  The file entries are walked depth-first, in pre-order, using an explicit
+  stack instead of recursion, so that the depth of the tree is not limited
+  by the recursion limit.
+
+  If a file entry filter is specified only the included file entries are
+  yielded. Excluded directories, and directories that cannot contain included
+  file entries, are pruned before their sub file entries are enumerated.
+
+  Note that the list of path segments is shared between all the yielded
+  values and is changed when the iteration continues. Copy the list if it
+  needs to be retained.
+
+  Args:
+    file_entry (dfvfs.FileEntry): file entry to start with.
+    file_entry_filter (Optional[FileEntryFilter]): file entry filter.
+    parent_path_segments (Optional[list[str]]): path segments of the full
+        path of the parent file entry.
+    profiler (Optional[StageProfiler]): profiler that records the time spent
+        enumerating sub file entries as the "enumerate" stage.
+
+  Yields:
+    tuple[dfvfs.FileEntry, list[str]]: file entry and path segments of its
+        full path.
+  """
+  path_segments = list(parent_path_segments or [])
+  path_segments.append(file_entry.name)
+
+  filter_state = None
+  if file_entry_filter:
+    filter_state = file_entry_filter.GetState(path_segments)
+    if filter_state is None:
+      return
+
+  if not file_entry_filter or file_entry_filter.Matches(
+      filter_state, path_segments, file_entry):
+    yield file_entry, path_segments
+
+  if file_entry_filter and not file_entry_filter.CanContainMatches(
+      filter_state):
+    return
+
+  stack = [(file_entry, iter(file_entry.sub_file_entries), filter_state)]
+  while stack:
+    parent_file_entry, sub_file_entries, parent_filter_state = stack[-1]
+
+    if profiler:
+      timing = profiler.Time('enumerate')
+    else:
+      timing = contextlib.nullcontext()
+
+    try:
+      with timing:
+        sub_file_entry = next(sub_file_entries, None)
+
+    except (IOError, dfvfs_errors.AccessError,
+            dfvfs_errors.BackEndError) as exception:
+      path_specification_string = GetPathSpecificationString(
+          parent_file_entry.path_spec)
+      logging.warning((
+          'Unable to open path specification:\n{0:s}'
+          'with error: {1!s}').format(path_specification_string, exception))
+      sub_file_entry = None
+
+    if sub_file_entry is None:
+      stack.pop()
+      path_segments.pop()
+      continue
+
+    path_segments.append(sub_file_entry.name)
+
+    filter_state = None
+    if file_entry_filter:
+      filter_state = file_entry_filter.GetSubState(
+          parent_filter_state, path_segments)
+      if filter_state is None:
+        path_segments.pop()
+        continue
+
+    if not file_entry_filter or file_entry_filter.Matches(
+        filter_state, path_segments, sub_file_entry):
+      yield sub_file_entry, path_segments
+
+    if file_entry_filter and not file_entry_filter.CanContainMatches(
+        filter_state):
+      path_segments.pop()
+      continue
+
+    stack.append((
+        sub_file_entry, iter(sub_file_entry.sub_file_entries), filter_state))
+
+
+class KnownHashesIndex(object):
+  """Memory-mapped index of known message digest hashes.
+
+  The index file consists of a header, a Bloom filter and a table of binary
+  digests that is sorted in ascending order. The file is memory-mapped, hence
+  opening the index does not read the digests into memory. A digest is first
+  looked up in the Bloom filter, which rules out most unknown digests without
+  accessing the table, and otherwise by a binary search of the table.
+
+  Since message digests are uniformly distributed, the bits of a digest in
+  the Bloom filter are derived from the digest itself, instead of hashing
+  the digest again.
+  """
+
+  _FILE_SIGNATURE = b'DFVSKHI1'
+
+  # The header consists of: the signature, the hash name, the digest size,
+  # the number of digests, the size of the Bloom filter in bytes and the number
+  # of bits set in the Bloom filter per digest.
+  _HEADER = struct.Struct('<8s16sIQQI')
+  _HEADER_SIZE = 64
+
+  # About 1 percent of the unknown digests pass the Bloom filter with 10 bits
+  # per digest and 7 bits set per digest.
+  _BLOOM_FILTER_BITS_PER_DIGEST = 10
+  _BLOOM_FILTER_NUMBER_OF_BITS_SET = 7
+
+  # Maximum number of digests that are sorted in memory, per run, when
+  # building an index.
+  _MAXIMUM_SORT_RUN_SIZE = 4 * 1024 * 1024
+
+  def __init__(self, path):
+    """Initializes a known hashes index.
+
+    Args:
+      path (str): path of the index file.
+    """
+    super(KnownHashesIndex, self).__init__()
+    self._bloom_filter_number_of_bits = 0
+    self._bloom_filter_number_of_bits_set = 0
+    self._digest_size = 0
+    self._file_object = None
+    self._hash_name = None
+    self._mapped_file = None
+    self._number_of_digests = 0
+    self._path = path
+    self._table_offset = 0
+
+  @property
+  def hash_name(self):
+    """str: name of the message digest hash of the digests in the index."""
+    return self._hash_name
+
+  @property
+  def number_of_digests(self):
+    """int: number of digests in the index."""
+    return self._number_of_digests
+
+  @classmethod
+  def _GetBloomFilterBitIndexes(
+      cls, digest, number_of_bits, number_of_bits_set):
+    """Retrieves the indexes of the bits of a digest in the Bloom filter.
+
+    Args:
+      digest (bytes): binary digest.
+      number_of_bits (int): number of bits in the Bloom filter.
+      number_of_bits_set (int): number of bits set per digest.
+
+    Returns:
+      list[int]: indexes of the bits in the Bloom filter.
+    """
+    first_value = int.from_bytes(digest[0:8], 'little')
+    second_value = int.from_bytes(digest[8:16], 'little') | 1
+
+    return [
+        (first_value + index * second_value) % number_of_bits
+        for index in range(number_of_bits_set)]
+
+  @classmethod
+  def _ReadSortedRun(cls, path, digest_size):
+    """Reads a sorted run of digests.
+
+    Args:
+      path (str): path of the run file.
+      digest_size (int): size of a digest.
+
+    Yields:
+      bytes: binary digest.
+    """
+    with open(path, 'rb') as file_object:
+      data = file_object.read(digest_size * 65536)
+      while data:
+        for data_offset in range(0, len(data), digest_size):
+          yield data[data_offset:data_offset + digest_size]
+
+        data = file_object.read(digest_size * 65536)
+
+  @classmethod
+  def Build(cls, path, hash_name, digests):
+    """Builds an index file.
+
+    The digests are sorted in runs, in memory, that are merged, hence the
+    number of digests is not limited by the available memory.
+
+    Args:
+      path (str): path of the index file.
+      hash_name (str): name of the message digest hash of the digests.
+      digests (iterable[bytes]): binary digests in any order, which can
+          contain duplicates.
+
+    Returns:
+      int: number of unique digests in the index.
+
+    Raises:
+      IOError: if the index file cannot be written.
+      OSError: if the index file cannot be written.
+      ValueError: if the hash name is not supported or the size of a digest
+          does not match the hash.
+    """
+    digest_size = hashlib.new(hash_name).digest_size
+    encoded_hash_name = hash_name.encode('ascii')
+    if digest_size < 16 or len(encoded_hash_name) > 16:
+      raise ValueError('Unsupported hash: {0:s}'.format(hash_name))
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+      maximum_number_of_digests = 0
+      run_paths = []
+      run = []
+      for digest in digests:
+        if len(digest) != digest_size:
+          raise ValueError('Unsupported {0:s} digest: {1!s}'.format(
+              hash_name, digest))
+
+        run.append(digest)
+        if len(run) >= cls._MAXIMUM_SORT_RUN_SIZE:
+          run_path = os.path.join(
+              temporary_directory, '{0:d}.run'.format(len(run_paths)))
+          with open(run_path, 'wb') as file_object:
+            file_object.write(b''.join(sorted(run)))
+
+          maximum_number_of_digests += len(run)
+          run_paths.append(run_path)
+          run = []
+
+      maximum_number_of_digests += len(run)
+
+      sorted_runs = [
+          cls._ReadSortedRun(run_path, digest_size) for run_path in run_paths]
+      sorted_runs.append(sorted(run))
+
+      # The size of the Bloom filter is based on the number of digests
+      # including duplicates, since it is written before the table.
+      number_of_bits = max(
+          64, maximum_number_of_digests * cls._BLOOM_FILTER_BITS_PER_DIGEST)
+      bloom_filter = bytearray((number_of_bits + 7) // 8)
+      number_of_bits = len(bloom_filter) * 8
+
+      temporary_path = '{0:s}.tmp'.format(path)
+      number_of_digests = 0
+      with open(temporary_path, 'wb') as file_object:
+        file_object.seek(cls._HEADER_SIZE + len(bloom_filter), os.SEEK_SET)
+
+        last_digest = None
+        table_data = []
+        for digest in heapq.merge(*sorted_runs):
+          if digest == last_digest:
+            continue
+
+          for bit_index in cls._GetBloomFilterBitIndexes(
+              digest, number_of_bits, cls._BLOOM_FILTER_NUMBER_OF_BITS_SET):
+            bloom_filter[bit_index >> 3] |= 1 << (bit_index & 7)
+
+          table_data.append(digest)
+          if len(table_data) >= 65536:
+            file_object.write(b''.join(table_data))
+            table_data = []
+
+          last_digest = digest
+          number_of_digests += 1
+
+        file_object.write(b''.join(table_data))
+
+        header = cls._HEADER.pack(
+            cls._FILE_SIGNATURE, encoded_hash_name, digest_size,
+            number_of_digests, len(bloom_filter),
+            cls._BLOOM_FILTER_NUMBER_OF_BITS_SET)
+
+        file_object.seek(0, os.SEEK_SET)
+        file_object.write(header.ljust(cls._HEADER_SIZE, b'\x00'))
+        file_object.write(bloom_filter)
+
+      os.replace(temporary_path, path)
+
+    return number_of_digests
+
+  def Close(self):
+    """Closes the index."""
+    if self._mapped_file:
+      self._mapped_file.close()
+      self._mapped_file = None
+
+    if self._file_object:
+      self._file_object.close()
+      self._file_object = None
+
+  def Contains(self, digest):
+    """Determines if the index contains a digest.
+
+    Args:
+      digest (bytes): binary digest.
+
+    Returns:
+      bool: True if the index contains the digest.
+    """
+    if len(digest) != self._digest_size or not self._number_of_digests:
+      return False
+
+    for bit_index in self._GetBloomFilterBitIndexes(
+        digest, self._bloom_filter_number_of_bits,
+        self._bloom_filter_number_of_bits_set):
+      byte_value = self._mapped_file[self._HEADER_SIZE + (bit_index >> 3)]
+      if not byte_value & (1 << (bit_index & 7)):
+        return False
+
+    low_index = 0
+    high_index = self._number_of_digests
+    while low_index < high_index:
+      middle_index = (low_index + high_index) // 2
+      table_offset = self._table_offset + middle_index * self._digest_size
+      middle_digest = self._mapped_file[
+          table_offset:table_offset + self._digest_size]
+
+      if middle_digest < digest:
+        low_index = middle_index + 1
+      elif middle_digest > digest:
+        high_index = middle_index
+      else:
+        return True
+
+    return False
+
+  def Open(self):
+    """Opens the index.
+
+    Raises:
+      IOError: if the index file cannot be read or is not supported.
+      OSError: if the index file cannot be read.
+    """
+    self._file_object = open(self._path, 'rb')  # pylint: disable=consider-using-with
+
+    try:
+      file_size = os.fstat(self._file_object.fileno()).st_size
+      if file_size < self._HEADER_SIZE:
+        raise IOError('Unsupported known hashes index: {0:s}'.format(
+            self._path))
+
+      self._mapped_file = mmap.mmap(
+          self._file_object.fileno(), 0, access=mmap.ACCESS_READ)
+
+      (signature, hash_name, digest_size, number_of_digests,
+       bloom_filter_size, number_of_bits_set) = self._HEADER.unpack_from(
+           self._mapped_file, 0)
+
+      table_offset = self._HEADER_SIZE + bloom_filter_size
+      if (signature != self._FILE_SIGNATURE or bloom_filter_size < 8 or
+          file_size < table_offset + number_of_digests * digest_size):
+        raise IOError('Unsupported known hashes index: {0:s}'.format(
+            self._path))
+
+    except (IOError, OSError):
+      self.Close()
+      raise
+
+    self._bloom_filter_number_of_bits = bloom_filter_size * 8
+    self._bloom_filter_number_of_bits_set = number_of_bits_set
+    self._digest_size = digest_size
+    self._hash_name = hash_name.rstrip(b'\x00').decode('ascii')
+    self._number_of_digests = number_of_digests
+    self._table_offset = table_offset
+
+
+class _PathPatternTrieNode(object):
+  """Node of a path pattern trie.
+
+  Attributes:
+    is_end (bool): True if a pattern ends at the node.
+    is_recursive (bool): True if the node represents "**", which matches zero
+        or more path segments.
+    literal_children (dict[str, _PathPatternTrieNode]): child nodes of path
+        segments without wildcards, per lower case path segment.
+    recursive_child (_PathPatternTrieNode): child node of "**" or None if not
+        available.
+    wildcard_children (dict[str, tuple[re.Pattern, _PathPatternTrieNode]]):
+        compiled regular expression and child node of path segments with
+        wildcards, per path segment.
+  """
+
+  def __init__(self, is_recursive=False):
+    """Initializes a path pattern trie node.
+
+    Args:
+      is_recursive (Optional[bool]): True if the node represents "**".
+    """
+    super(_PathPatternTrieNode, self).__init__()
+    self.is_end = False
+    self.is_recursive = is_recursive
+    self.literal_children = {}
+    self.recursive_child = None
+    self.wildcard_children = {}
+
+
+class PathPatternTrie(object):
+  """Trie of glob patterns of paths, which is matched per path segment.
+
+  A pattern consists of path segments separated by "/", where "*", "?" and
+  "[...]" match within a path segment and a path segment of "**" matches zero
+  or more path segments. A pattern that does not start with "/" matches at any
+  depth. Patterns are matched case insensitive.
+
+  The state of a match is the set of nodes that the path segments matched so
+  far have reached, where an empty state represents that none of the patterns
+  can match the path or any of its sub paths.
+  """
+
+  _WILDCARD_CHARACTERS = frozenset(['*', '?', '['])
+
+  def __init__(self, patterns):
+    """Initializes a path pattern trie.
+
+    Args:
+      patterns (list[str]): glob patterns of paths.
+    """
+    super(PathPatternTrie, self).__init__()
+    self._root_node = _PathPatternTrieNode()
+
+    for pattern in patterns:
+      self._AddPattern(pattern)
+
+  def _AddPattern(self, pattern):
+    """Adds a pattern to the trie.
+
+    Args:
+      pattern (str): glob pattern of a path.
+    """
+    path_segments = [segment for segment in pattern.split('/') if segment]
+    if not pattern.startswith('/'):
+      path_segments.insert(0, '**')
+
+    node = self._root_node
+    for path_segment in path_segments:
+      if path_segment == '**':
+        if not node.recursive_child:
+          node.recursive_child = _PathPatternTrieNode(is_recursive=True)
+        node = node.recursive_child
+
+      elif self._WILDCARD_CHARACTERS.intersection(path_segment):
+        if path_segment not in node.wildcard_children:
+          expression = re.compile(
+              fnmatch.translate(path_segment), re.IGNORECASE)
+          node.wildcard_children[path_segment] = (
+              expression, _PathPatternTrieNode())
+        _, node = node.wildcard_children[path_segment]
+
+      else:
+        lookup_key = path_segment.lower()
+        if lookup_key not in node.literal_children:
+          node.literal_children[lookup_key] = _PathPatternTrieNode()
+        node = node.literal_children[lookup_key]
+
+    node.is_end = True
+
+  def _GetClosure(self, nodes):
+    """Adds the nodes that are reached by matching zero path segments.
+
+    Args:
+      nodes (set[_PathPatternTrieNode]): nodes.
+
+    Returns:
+      frozenset[_PathPatternTrieNode]: nodes including the nodes of "**" that
+          are reached without matching a path segment.
+    """
+    unvisited_nodes = list(nodes)
+    while unvisited_nodes:
+      node = unvisited_nodes.pop()
+      recursive_child = node.recursive_child
+      if recursive_child and recursive_child not in nodes:
+        nodes.add(recursive_child)
+        unvisited_nodes.append(recursive_child)
+
+    return frozenset(nodes)
+
+  def CanMatchSubPaths(self, state):
+    """Determines if a state can match sub paths of the path.
+
+    Args:
+      state (frozenset[_PathPatternTrieNode]): state.
+
+    Returns:
+      bool: True if a pattern can match a sub path.
+    """
+    return any(
+        node.is_recursive or node.literal_children or node.wildcard_children
+        for node in state)
+
+  def GetInitialState(self):
+    """Retrieves the state before any path segment has been matched.
+
+    Returns:
+      frozenset[_PathPatternTrieNode]: state.
+    """
+    return self._GetClosure(set([self._root_node]))
+
+  def GetNextState(self, state, path_segment):
+    """Retrieves the state after matching a path segment.
+
+    Args:
+      state (frozenset[_PathPatternTrieNode]): state.
+      path_segment (str): path segment.
+
+    Returns:
+      frozenset[_PathPatternTrieNode]: state after matching the path segment.
+    """
+    lookup_key = path_segment.lower()
+
+    nodes = set()
+    for node in state:
+      if node.is_recursive:
+        nodes.add(node)
+
+      child_node = node.literal_children.get(lookup_key, None)
+      if child_node:
+        nodes.add(child_node)
+
+      for expression, child_node in node.wildcard_children.values():
+        if expression.match(path_segment):
+          nodes.add(child_node)
+
+    return self._GetClosure(nodes)
+
+  def IsMatch(self, state):
+    """Determines if a state represents a matching path.
+
+    Args:
+      state (frozenset[_PathPatternTrieNode]): state.
+
+    Returns:
+      bool: True if a pattern matches the path.
+    """
+    return any(node.is_end for node in state)
+
+  def Matches(self, path_segments):
+    """Determines if a path matches any of the patterns.
+
+    Args:
+      path_segments (list[str]): path segments of the path.
+
+    Returns:
+      bool: True if a pattern matches the path.
+    """
+    state = self.GetInitialState()
+    for path_segment in path_segments:
+      state = self.GetNextState(state, path_segment)
+      if not state:
+        return False
+
+    return self.IsMatch(state)
+
+
+def ReadHexDigests(path, digest_size):
+  """Reads hexadecimal digests from a text file.
+
+  Every line is expected to contain at most one digest of the specified size,
+  such as a list of digests or the comma separated values of a hash set like
+  the NSRL RDS, where other columns, headers and comments are ignored.
+
+  Args:
+    path (str): path of the text file.
+    digest_size (int): size of a binary digest.
+
+  Yields:
+    bytes: binary digest.
+  """
+  hex_digest_re = re.compile(
+      r'(?<![0-9A-Fa-f])[0-9A-Fa-f]{{{0:d}}}(?![0-9A-Fa-f])'.format(
+          digest_size * 2))
+
+  with open(path, 'r', encoding='utf-8', errors='replace') as file_object:
+    for line in file_object:
+      if line.startswith('#'):
+        continue
+
+      match = hex_digest_re.search(line)
+      if match:
+        yield bytes.fromhex(match.group(0))
+
+
+class PromptTrackingMediator(object):
+  """Volume scanner mediator that tracks if the user was prompted.
+
+  All calls are forwarded to the wrapped volume scanner mediator. The base
+  path specifications of a scan in which the user was prompted, for example
+  to select partitions, depend on input that is not part of the volume
+  scanner options, hence these should not be cached.
+  """
+
+  def __init__(self, mediator):
+    """Initializes a prompt tracking mediator.
+
+    Args:
+      mediator (dfvfs.VolumeScannerMediator): volume scanner mediator.
+    """
+    super(PromptTrackingMediator, self).__init__()
+    self.mediator = mediator
+    self.prompted = False
+
+  def __getattr__(self, name):
+    """Retrieves an attribute of the wrapped mediator.
+
+    Args:
+      name (str): name of the attribute.
+
+    Returns:
+      object: attribute of the wrapped mediator.
+    """
+    return getattr(self.mediator, name)
+
+  def GetPartitionIdentifiers(self, volume_system, volume_identifiers):
+    """Retrieves partition identifiers.
+
+    Args:
+      volume_system (dfvfs.VolumeSystem): volume system.
+      volume_identifiers (list[str]): volume identifiers including prefix.
+
+    Returns:
+      list[str]: selected volume identifiers including prefix or None.
+    """
+    self.prompted = True
+    return self.mediator.GetPartitionIdentifiers(
+        volume_system, volume_identifiers)
+
+  def GetVolumeIdentifiers(self, volume_system, volume_identifiers):
+    """Retrieves volume identifiers.
+
+    Args:
+      volume_system (dfvfs.VolumeSystem): volume system.
+      volume_identifiers (list[str]): volume identifiers including prefix.
+
+    Returns:
+      list[str]: selected volume identifiers including prefix or None.
+    """
+    self.prompted = True
+    return self.mediator.GetVolumeIdentifiers(
+        volume_system, volume_identifiers)
+
+  def GetVolumeSnapshotIdentifiers(self, volume_system, volume_identifiers):
+    """Retrieves volume snapshot identifiers.
+
+    Args:
+      volume_system (dfvfs.VolumeSystem): volume system.
+      volume_identifiers (list[str]): volume identifiers including prefix.
+
+    Returns:
+      list[str]: selected volume identifiers including prefix or None.
+    """
+    self.prompted = True
+    return self.mediator.GetVolumeSnapshotIdentifiers(
+        volume_system, volume_identifiers)
+
+  def UnlockEncryptedVolume(
+      self, source_scanner_object, scan_context, locked_scan_node, credentials):
+    """Unlocks an encrypted volume.
+
+    Args:
+      source_scanner_object (dfvfs.SourceScanner): source scanner.
+      scan_context (dfvfs.SourceScannerContext): source scanner context.
+      locked_scan_node (dfvfs.SourceScanNode): locked scan node.
+      credentials (dfvfs.Credentials): credentials supported by the locked
+          scan node.
+
+    Returns:
+      bool: True if the volume was unlocked.
+    """
+    self.prompted = True
+    return self.mediator.UnlockEncryptedVolume(
+        source_scanner_object, scan_context, locked_scan_node, credentials)
+
+
+class ScanResultCache(object):
+  """Persistent cache of the results of scanning sources.
+
+  The results of scanning a source for volumes and file systems are stored
+  per source path, together with the size, the modification time and a hash
+  of the first and last 64 KiB of the source. Cached results are only used
+  when all of these values match.
+
+  Only sources that are regular files, such as storage media images, are
+  cached. Results that contain encrypted volumes are not cached, since these
+  volumes need to be unlocked with credentials on every run. Base path
+  specifications that were selected by the user at a prompt should not be
+  cached either, see PromptTrackingMediator.
+  """
+
+  _HEAD_AND_TAIL_SIZE = 64 * 1024
+
+  def __init__(self, path):
+    """Initializes a scan result cache.
+
+    Args:
+      path (str): path of the cache file.
+    """
+    super(ScanResultCache, self).__init__()
+    self._entries = {}
+    self._has_changes = False
+    self._path = path
+
+  def _GetBackEndsString(self):
+    """Retrieves a string representation of the preferred dfVFS back-ends.
+
+    Returns:
+      str: preferred dfVFS back-ends.
+    """
+    return ','.join([
+        dfvfs_definitions.PREFERRED_EXT_BACK_END,
+        dfvfs_definitions.PREFERRED_GPT_BACK_END,
+        dfvfs_definitions.PREFERRED_HFS_BACK_END,
+        dfvfs_definitions.PREFERRED_NTFS_BACK_END])
+
+  def _GetBasePathSpecsResultKey(self, options=None):
+    """Retrieves the key of the base path specifications result.
+
+    Args:
+      options (Optional[dfvfs.VolumeScannerOptions]): volume scanner options.
+
+    Returns:
+      str: key of the result or None if the result should not be cached.
+    """
+    options = options or volume_scanner.VolumeScannerOptions()
+    if options.credentials:
+      return None
+
+    json_dict = {
+        'back_ends': self._GetBackEndsString(),
+        'partitions': options.partitions,
+        'scan_mode': options.scan_mode,
+        'snapshots': options.snapshots,
+        'volumes': options.volumes}
+
+    return 'base_path_specs: {0:s}'.format(
+        json.dumps(json_dict, sort_keys=True))
+
+  def _GetResult(self, source_path, result_key):
+    """Retrieves a cached result.
+
+    Args:
+      source_path (str): path of the source.
+      result_key (str): key of the result.
+
+    Returns:
+      object: JSON serializable result or None if not cached or if the
+          source changed.
+    """
+    entry = self._entries.get(os.path.abspath(source_path), None)
+    if not entry or entry['source'] != self._GetSourceValues(source_path):
+      return None
+
+    return entry['results'].get(result_key, None)
+
+  def _GetScanContextResultKey(self):
+    """Retrieves the key of the source scanner context result.
+
+    Returns:
+      str: key of the result.
+    """
+    return 'scan_context: {0:s}'.format(self._GetBackEndsString())
+
+  def _GetSourceValues(self, source_path):
+    """Retrieves the values that identify the contents of a source.
+
+    Args:
+      source_path (str): path of the source.
+
+    Returns:
+      dict[str, object]: values that identify the contents of the source or
+          None if the source is not a regular file.
+    """
+    if not os.path.isfile(source_path):
+      return None
+
+    try:
+      stat_object = os.stat(source_path)
+
+      hash_context = hashlib.sha256()
+      with open(source_path, 'rb') as file_object:
+        hash_context.update(file_object.read(self._HEAD_AND_TAIL_SIZE))
+
+        if stat_object.st_size > self._HEAD_AND_TAIL_SIZE:
+          file_object.seek(max(
+              self._HEAD_AND_TAIL_SIZE,
+              stat_object.st_size - self._HEAD_AND_TAIL_SIZE), os.SEEK_SET)
+          hash_context.update(file_object.read(self._HEAD_AND_TAIL_SIZE))
+
+    except (IOError, OSError):
+      return None
+
+    return {
+        'head_and_tail_hash': hash_context.hexdigest(),
+        'modification_time': stat_object.st_mtime_ns,
+        'size': stat_object.st_size}
+
+  def _HasEncryptedVolume(self, path_specs):
+    """Determines if path specifications contain an encrypted volume.
+
+    Args:
+      path_specs (list[dfvfs.PathSpec]): path specifications.
+
+    Returns:
+      bool: True if one of the path specifications or their parents is of
+          an encrypted volume.
+    """
+    for path_spec in path_specs:
+      while path_spec:
+        if path_spec.type_indicator in (
+            dfvfs_definitions.ENCRYPTED_VOLUME_TYPE_INDICATORS):
+          return True
+        path_spec = path_spec.parent
+
+    return False
+
+  def _SetResult(self, source_path, result_key, result):
+    """Caches a result.
+
+    Args:
+      source_path (str): path of the source.
+      result_key (str): key of the result.
+      result (object): JSON serializable result.
+    """
+    source_values = self._GetSourceValues(source_path)
+    if not source_values:
+      return
+
+    source_path = os.path.abspath(source_path)
+    entry = self._entries.get(source_path, None)
+    if not entry or entry['source'] != source_values:
+      entry = {'results': {}, 'source': source_values}
+      self._entries[source_path] = entry
+
+    entry['results'][result_key] = result
+    self._has_changes = True
+
+  def Close(self):
+    """Closes the scan result cache.
+
+    The cache file is replaced atomically, if the cache changed.
+
+    Raises:
+      IOError: if the cache file cannot be written.
+      OSError: if the cache file cannot be written.
+    """
+    if self._has_changes:
+      temporary_path = '{0:s}.tmp'.format(self._path)
+      with open(temporary_path, 'w', encoding='utf-8') as file_object:
+        json.dump(self._entries, file_object, sort_keys=True)
+
+      os.replace(temporary_path, self._path)
+
+    self._entries = {}
+    self._has_changes = False
+
+  def GetBasePathSpecs(self, source_path, options=None):
+    """Retrieves cached base path specifications.
+
+    Args:
+      source_path (str): path of the source.
+      options (Optional[dfvfs.VolumeScannerOptions]): volume scanner options.
+
+    Returns:
+      list[dfvfs.PathSpec]: base path specifications or None if not cached.
+    """
+    result_key = self._GetBasePathSpecsResultKey(options)
+    if not result_key:
+      return None
+
+    result = self._GetResult(source_path, result_key)
+    if not result:
+      return None
+
+    return [
+        json_serializer.JsonPathSpecSerializer.ReadSerialized(json_string)
+        for json_string in result]
+
+  def GetScanContext(self, source_path):
+    """Retrieves a cached source scanner context.
+
+    Args:
+      source_path (str): path of the source.
+
+    Returns:
+      dfvfs.SourceScannerContext: source scanner context or None if not
+          cached.
+    """
+    result_key = self._GetScanContextResultKey()
+
+    result = self._GetResult(source_path, result_key)
+    if not result:
+      return None
+
+    scan_context = source_scanner.SourceScannerContext()
+    scan_context.SetSourceType(result['source_type'])
+
+    scan_nodes = []
+    for json_string, parent_index in result['scan_nodes']:
+      path_spec = json_serializer.JsonPathSpecSerializer.ReadSerialized(
+          json_string)
+
+      parent_scan_node = None
+      if parent_index is not None:
+        parent_scan_node = scan_nodes[parent_index]
+
+      scan_nodes.append(scan_context.AddScanNode(path_spec, parent_scan_node))
+
+    return scan_context
+
+  def Open(self):
+    """Opens the scan result cache.
+
+    Raises:
+      IOError: if the cache file cannot be read.
+      OSError: if the cache file cannot be read.
+    """
+    self._entries = {}
+    self._has_changes = False
+
+    if os.path.exists(self._path):
+      with open(self._path, 'r', encoding='utf-8') as file_object:
+        try:
+          self._entries = json.load(file_object)
+        except ValueError:
+          logging.warning('Ignoring corrupt scan result cache: {0:s}'.format(
+              self._path))
+
+  def RemoveSource(self, source_path):
+    """Removes the cached results of a source.
+
+    Args:
+      source_path (str): path of the source.
+    """
+    source_path = os.path.abspath(source_path)
+    if source_path in self._entries:
+      del self._entries[source_path]
+      self._has_changes = True
+
+  def SetBasePathSpecs(self, source_path, base_path_specs, options=None):
+    """Caches base path specifications.
+
+    Args:
+      source_path (str): path of the source.
+      base_path_specs (list[dfvfs.PathSpec]): base path specifications.
+      options (Optional[dfvfs.VolumeScannerOptions]): volume scanner options.
+    """
+    result_key = self._GetBasePathSpecsResultKey(options)
+    if not result_key or not base_path_specs or self._HasEncryptedVolume(
+        base_path_specs):
+      return
+
+    result = [
+        json_serializer.JsonPathSpecSerializer.WriteSerialized(path_spec)
+        for path_spec in base_path_specs]
+    self._SetResult(source_path, result_key, result)
+
+  def SetScanContext(self, source_path, scan_context):
+    """Caches a source scanner context.
+
+    Args:
+      source_path (str): path of the source.
+      scan_context (dfvfs.SourceScannerContext): source scanner context.
+    """
+    root_scan_node = scan_context.GetRootScanNode()
+    if not root_scan_node or scan_context.locked_scan_nodes:
+      return
+
+    scan_nodes = []
+    path_specs = []
+
+    # The scan nodes are stored in pre-order, so that the parent of a scan
+    # node is stored before the scan node itself.
+    stack = [(root_scan_node, None)]
+    while stack:
+      scan_node, parent_index = stack.pop()
+
+      path_specs.append(scan_node.path_spec)
+      scan_nodes.append((
+          json_serializer.JsonPathSpecSerializer.WriteSerialized(
+              scan_node.path_spec), parent_index))
+
+      index = len(scan_nodes) - 1
+      stack.extend([
+          (sub_scan_node, index)
+          for sub_scan_node in reversed(scan_node.sub_nodes)])
+
+    if self._HasEncryptedVolume(path_specs):
+      return
+
+    result_key = self._GetScanContextResultKey()
+    result = {
+        'scan_nodes': scan_nodes,
+        'source_type': scan_context.source_type}
+    self._SetResult(source_path, result_key, result)
+
+
+class StageProfiler(object):
+  """Lightweight profiler of the processing stages of a CLI tool.
+
+  The profiler records per stage, such as "read" or "hash", the number of
+  times the stage was entered and the wall-clock time spent in it, and named
+  counters, such as the number of bytes read. Stages can overlap, for example
+  when data is hashed on a separate thread while the next buffer is read,
+  hence the times of the stages do not necessarily add up to the total time.
+
+  Note that a stage should only be timed by a single thread at a time.
+  """
+
+  def __init__(self):
+    """Initializes a stage profiler."""
+    super(StageProfiler, self).__init__()
+    self._counters = collections.Counter()
+    self._stage_calls = collections.Counter()
+    self._stage_times = collections.Counter()
+    self._start_time = time.perf_counter()
+
+  def FormatReport(self):
+    """Formats a report of the stages and counters.
+
+    Returns:
+      str: report of the stages and counters.
+    """
+    total_time = time.perf_counter() - self._start_time
+
+    lines = [
+        '{0:<20s} {1:>11s} {2:>12s} {3:>11s}'.format(
+            'Stage', 'Calls', 'Time (s)', 'Time (%)')]
+    for stage_name, number_of_calls in self._stage_calls.items():
+      stage_time = self._stage_times[stage_name]
+      percentage = 0.0
+      if total_time > 0.0:
+        percentage = 100.0 * stage_time / total_time
+
+      lines.append('{0:<20s} {1:>11d} {2:>12.3f} {3:>10.1f}%'.format(
+          stage_name, number_of_calls, stage_time, percentage))
+
+    lines.append('{0:<20s} {1:>11s} {2:>12.3f}'.format('total', '', total_time))
+
+    if self._counters:
+      lines.extend(['', '{0:<20s} {1:>11s}'.format('Counter', 'Value')])
+      for counter_name, value in self._counters.items():
+        lines.append('{0:<20s} {1:>11d}'.format(counter_name, value))
+
+    return '\n'.join(lines)
+
+  def GetCounter(self, counter_name):
+    """Retrieves the value of a counter.
+
+    Args:
+      counter_name (str): name of the counter.
+
+    Returns:
+      int: value of the counter.
+    """
+    return self._counters[counter_name]
+
+  def GetCounters(self):
+    """Retrieves the values of all counters.
+
+    Returns:
+      dict[str, int]: values of the counters per counter name.
+    """
+    return dict(self._counters)
+
+  def GetStage(self, stage_name):
+    """Retrieves the number of calls and the time spent in a stage.
+
+    Args:
+      stage_name (str): name of the stage.
+
+    Returns:
+      tuple[int, float]: number of times the stage was entered and the time,
+          in seconds, spent in the stage.
+    """
+    return self._stage_calls[stage_name], self._stage_times[stage_name]
+
+  def IncrementCounter(self, counter_name, value=1):
+    """Increments a counter.
+
+    Args:
+      counter_name (str): name of the counter.
+      value (Optional[int]): value to increment the counter with.
+    """
+    self._counters[counter_name] += value
+
+  @contextlib.contextmanager
+  def Time(self, stage_name):
+    """Times a stage.
+
+    Args:
+      stage_name (str): name of the stage.
+
+    Yields:
+      None: to time the code in the with statement.
+    """
+    start_time = time.perf_counter()
+    try:
+      yield
+
+    finally:
+      self._stage_times[stage_name] += time.perf_counter() - start_time
+      self._stage_calls[stage_name] += 1
+
+
 def SetDFVFSBackEnd(back_end):
   """Sets the dfVFS back-end.
 
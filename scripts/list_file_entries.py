@@ -4,17 +4,33 @@
 
 import abc
 import argparse
+import cProfile
+import csv
+import io
+import json
 import logging
+import multiprocessing
+import os
+import pickle
+import pstats
 import sys
+import tempfile
+import time
 
 from dfvfs.analyzer import analyzer
 from dfvfs.analyzer import fvde_analyzer_helper
 from dfvfs.helpers import command_line
 from dfvfs.helpers import volume_scanner
-from dfvfs.lib import definitions as dfvfs_definitions
 from dfvfs.lib import errors
+from dfvfs.resolver import context as dfvfs_context
 from dfvfs.resolver import resolver
 
+try:
+  import pyarrow
+  from pyarrow import parquet
+except ImportError:
+  pyarrow = None
+
 from scripts import helpers
 
 
@@ -25,22 +41,121 @@ except KeyError:
   pass
 
 
+# File entry lister and resolver context of a worker process.
+_worker_lister = None
+_worker_resolver_context = None
+
+
+def _InitializeWorkerProcess(file_entry_filter=None):
+  """Initializes a worker process.
+
+  Every worker process uses its own resolver context, so that file objects
+  and file systems opened by the parent process are not shared.
+
+  Args:
+    file_entry_filter (Optional[helpers.FileEntryFilter]): file entry filter.
+  """
+  global _worker_lister  # pylint: disable=global-statement,invalid-name
+  global _worker_resolver_context  # pylint: disable=global-statement,invalid-name
+
+  _worker_resolver_context = dfvfs_context.Context()
+  _worker_lister = FileEntryLister(
+      file_entry_filter=file_entry_filter,
+      resolver_context=_worker_resolver_context)
+
+
+def _ListFileEntriesBasePathSpec(work_item):
+  """Lists file entries of a base path specification.
+
+  This function is run in a worker process, which writes the output to
+  a spool file that is merged by the parent process.
+
+  Args:
+    work_item (tuple[dfvfs.PathSpec, str]): base path specification and path
+        of the spool file to write the output to.
+
+  Returns:
+    dict[str, int]: values of the counters, such as the number of file
+        entries, per counter name.
+  """
+  base_path_spec, spool_path = work_item
+
+  # pylint: disable=protected-access
+  counters = _worker_lister._profiler.GetCounters()
+
+  output_writer = SpoolOutputWriter(spool_path)
+  output_writer.Open()
+
+  try:
+    for record in _worker_lister.IterateFileEntries([base_path_spec]):
+      output_writer.WriteRecord(record)
+  finally:
+    output_writer.Close()
+
+  return {
+      counter_name: value - counters.get(counter_name, 0)
+      for counter_name, value in _worker_lister._profiler.GetCounters().items()}
+
+
+class FileEntryRecord(object):
+  """File entry.
+
+  Attributes:
+    path (str): path to display.
+    path_spec (dfvfs.PathSpec): path specification of the file entry.
+    size (int): size of the file entry or None if not available.
+  """
+
+  __slots__ = ['path', 'path_spec', 'size']
+
+  def __init__(self, path, path_spec=None, size=None):
+    """Initializes a file entry record.
+
+    Args:
+      path (str): path to display.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file
+          entry.
+      size (Optional[int]): size of the file entry.
+    """
+    super(FileEntryRecord, self).__init__()
+    self.path = path
+    self.path_spec = path_spec
+    self.size = size
+
+
 class FileEntryLister(volume_scanner.VolumeScanner):
   """File entry lister."""
 
-  _NON_PRINTABLE_CHARACTERS = list(range(0, 0x20)) + list(range(0x7f, 0xa0))
-  _ESCAPE_CHARACTERS = str.maketrans({
-      value: '\\x{0:02x}'.format(value)
-      for value in _NON_PRINTABLE_CHARACTERS})
-
-  def __init__(self, mediator=None):
+  def __init__(
+      self, file_entry_filter=None, mediator=None, number_of_workers=1,
+      profiler=None, resolver_context=None, scan_result_cache=None):
     """Initializes a file entry lister.
 
     Args:
+      file_entry_filter (Optional[helpers.FileEntryFilter]): file entry filter
+          that determines the file entries to list, where None represents all
+          file entries.
       mediator (VolumeScannerMediator): a volume scanner mediator.
+      number_of_workers (Optional[int]): number of worker processes that
+          concurrently list the file entries of different base path
+          specifications, such as volumes and snapshots, where 1 represents
+          that the base path specifications are listed sequentially.
+      profiler (Optional[helpers.StageProfiler]): profiler that records the
+          time spent in the processing stages, where None represents a
+          profiler private to the lister.
+      resolver_context (Optional[dfvfs.Context]): resolver context, where
+          None represents the built in context.
+      scan_result_cache (Optional[helpers.ScanResultCache]): cache of the
+          results of scanning sources.
     """
     super(FileEntryLister, self).__init__(mediator=mediator)
+    self._display_path_builder = helpers.DisplayPathBuilder()
+    self._file_entry_filter = file_entry_filter
     self._list_only_files = False
+    self._number_of_workers = number_of_workers
+    self._profiler = profiler or helpers.StageProfiler()
+    self._resolver_context = resolver_context
+    self._scan_result_cache = scan_result_cache
 
   def _GetDisplayPath(self, path_spec, path_segments, data_stream_name):
     """Retrieves a path to display.
@@ -54,57 +169,149 @@ class FileEntryLister(volume_scanner.VolumeScanner):
     Returns:
       str: path to display.
     """
-    display_path = ''
+    return self._display_path_builder.GetDisplayPath(
+        path_spec, path_segments, data_stream_name=data_stream_name)
+
+  def _ListFileEntry(self, file_entry, parent_path_segments):
+    """Lists a file entry and its sub file entries.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry to list.
+      parent_path_segments (str): path segments of the full path of the parent
+          file entry.
 
-    if path_spec.HasParent():
-      parent_path_spec = path_spec.parent
-      if parent_path_spec and parent_path_spec.type_indicator in (
-          dfvfs_definitions.PARTITION_TABLE_TYPE_INDICATORS):
-        display_path = ''.join([display_path, parent_path_spec.location])
+    Yields:
+      FileEntryRecord: file entry.
+    """
+    for sub_file_entry, path_segments in helpers.IterateFileEntries(
+        file_entry, file_entry_filter=self._file_entry_filter,
+        parent_path_segments=parent_path_segments, profiler=self._profiler):
+      self._profiler.IncrementCounter('file_entries')
 
-    path_segments = [
-        segment.translate(self._ESCAPE_CHARACTERS) for segment in path_segments]
-    display_path = ''.join([display_path, '/'.join(path_segments)])
+      if not self._list_only_files or sub_file_entry.IsFile():
+        path_spec = sub_file_entry.path_spec
+        display_path = self._GetDisplayPath(path_spec, path_segments, '')
+        yield FileEntryRecord(
+            display_path, path_spec=path_spec, size=sub_file_entry.size)
 
-    if data_stream_name:
-      data_stream_name = data_stream_name.translate(self._ESCAPE_CHARACTERS)
-      display_path = ':'.join([display_path, data_stream_name])
+      # TODO: print data stream names.
 
-    return display_path or '/'
+  def _ListFileEntriesWithWorkers(self, base_path_specs):
+    """Lists file entries of base path specifications in worker processes.
 
-  def _ListFileEntry(
-      self, file_system, file_entry, parent_path_segments, output_writer):
-    """Lists a file entry.
+    Every base path specification, such as a volume or snapshot, is listed
+    by a worker process with its own resolver context. The records of a worker
+    process are spooled to a temporary file, which is read in the order of
+    the base path specifications once the worker process has completed it.
 
     Args:
-      file_system (dfvfs.FileSystem): file system that contains the file entry.
-      file_entry (dfvfs.FileEntry): file entry to list.
-      parent_path_segments (str): path segments of the full path of the parent
-          file entry.
-      output_writer (StdoutWriter): output writer.
+      base_path_specs (list[dfvfs.PathSpec]): base path specifications.
+
+    Yields:
+      FileEntryRecord: file entry.
     """
-    path_segments = parent_path_segments + [file_entry.name]
+    number_of_processes = min(self._number_of_workers, len(base_path_specs))
+
+    with tempfile.TemporaryDirectory() as spool_directory:
+      pool = multiprocessing.Pool(  # pylint: disable=consider-using-with
+          processes=number_of_processes,
+          initializer=_InitializeWorkerProcess,
+          initargs=(self._file_entry_filter, ))
+
+      try:
+        queued_results = []
+        for index, base_path_spec in enumerate(base_path_specs):
+          spool_path = os.path.join(
+              spool_directory, '{0:d}.spool'.format(index))
+          result = pool.apply_async(
+              _ListFileEntriesBasePathSpec, ((base_path_spec, spool_path), ))
+          queued_results.append((spool_path, result))
+
+        for spool_path, result in queued_results:
+          with self._profiler.Time('worker_wait'):
+            counters = result.get()
+
+          for counter_name, value in counters.items():
+            self._profiler.IncrementCounter(counter_name, value)
+
+          spool_reader = SpoolOutputWriter(spool_path)
+          yield from spool_reader.ReadRecords()
+
+          os.remove(spool_path)
+
+      finally:
+        # Note that at this point all the results have been retrieved, unless
+        # an exception was raised or the iteration was stopped.
+        pool.terminate()
+        pool.join()
+
+  def GetBasePathSpecs(self, source_path, options=None):
+    """Determines the base path specifications.
+
+    The time spent scanning the source for volumes and file systems is
+    recorded as the "volume_scan" stage. If a scan result cache is used,
+    cached base path specifications are used instead of scanning the source.
+    Base path specifications that were selected at a prompt are not cached,
+    since the selection is not part of the volume scanner options.
 
-    display_path = self._GetDisplayPath(file_entry.path_spec, path_segments, '')
-    if not self._list_only_files or file_entry.IsFile():
-      output_writer.WriteFileEntry(display_path)
+    Args:
+      source_path (str): source path.
+      options (Optional[VolumeScannerOptions]): volume scanner options. If None
+          the default volume scanner options are used, which are defined in the
+          VolumeScannerOptions class.
 
-    # TODO: print data stream names.
+    Returns:
+      list[dfvfs.PathSpec]: path specifications.
 
-    for sub_file_entry in file_entry.sub_file_entries:
-      self._ListFileEntry(
-          file_system, sub_file_entry, path_segments, output_writer)
+    Raises:
+      dfvfs.ScannerError: if the source path does not exists, or if the source
+          path is not a file or directory, or if the format of or within
+          the source file is not supported.
+    """
+    with self._profiler.Time('volume_scan'):
+      if self._scan_result_cache:
+        base_path_specs = self._scan_result_cache.GetBasePathSpecs(
+            source_path, options=options)
+        if base_path_specs:
+          return base_path_specs
 
-  def ListFileEntries(self, base_path_specs, output_writer):
-    """Lists file entries in the base path specification.
+      prompt_tracking_mediator = None
+      if self._scan_result_cache and self._mediator:
+        prompt_tracking_mediator = helpers.PromptTrackingMediator(
+            self._mediator)
+        self._mediator = prompt_tracking_mediator
+
+      try:
+        base_path_specs = super(FileEntryLister, self).GetBasePathSpecs(
+            source_path, options=options)
+
+      finally:
+        if prompt_tracking_mediator:
+          self._mediator = prompt_tracking_mediator.mediator
+
+      if self._scan_result_cache and not (
+          prompt_tracking_mediator and prompt_tracking_mediator.prompted):
+        self._scan_result_cache.SetBasePathSpecs(
+            source_path, base_path_specs, options=options)
+
+      return base_path_specs
+
+  def IterateFileEntries(self, base_path_specs):
+    """Iterates over the file entries in the base path specification.
 
     Args:
       base_path_specs (list[dfvfs.PathSpec]): source path specification.
-      output_writer (StdoutWriter): output writer.
+
+    Yields:
+      FileEntryRecord: file entry.
     """
+    if self._number_of_workers > 1 and len(base_path_specs) > 1:
+      yield from self._ListFileEntriesWithWorkers(base_path_specs)
+      return
+
     for base_path_spec in base_path_specs:
-      file_system = resolver.Resolver.OpenFileSystem(base_path_spec)
-      file_entry = resolver.Resolver.OpenFileEntry(base_path_spec)
+      file_entry = resolver.Resolver.OpenFileEntry(
+          base_path_spec, resolver_context=self._resolver_context)
       if file_entry is None:
         path_specification_string = helpers.GetPathSpecificationString(
             base_path_spec)
@@ -113,21 +320,65 @@ class FileEntryLister(volume_scanner.VolumeScanner):
                 path_specification_string))
         return
 
-      self._ListFileEntry(file_system, file_entry, [], output_writer)
+      yield from self._ListFileEntry(file_entry, [])
+
+  def ListFileEntries(self, base_path_specs, output_writer):
+    """Lists file entries in the base path specification.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+      output_writer (StdoutWriter): output writer.
+    """
+    for record in self.IterateFileEntries(base_path_specs):
+      with self._profiler.Time('output'):
+        output_writer.WriteFileEntry(
+            record.path, path_spec=record.path_spec, size=record.size)
 
 
 class OutputWriter(object):
   """Output writer interface."""
 
-  def __init__(self, encoding='utf-8'):
+  # Default maximum number of records that are buffered before they are
+  # written.
+  DEFAULT_BATCH_SIZE = 4096
+
+  # Maximum number of seconds between writes of the buffered records, where
+  # None represents that the records are only written when the batch size is
+  # reached or on flush.
+  _MAXIMUM_FLUSH_INTERVAL = 1.0
+
+  def __init__(self, batch_size=DEFAULT_BATCH_SIZE, encoding='utf-8'):
     """Initializes an output writer.
 
     Args:
+      batch_size (Optional[int]): maximum number of records that are buffered
+          before they are written.
       encoding (Optional[str]): input encoding.
     """
     super(OutputWriter, self).__init__()
+    self._batch_size = batch_size
+    self._buffered_records = []
     self._encoding = encoding
     self._errors = 'strict'
+    self._last_flush_time = time.monotonic()
+
+  def _BufferRecord(self, record):
+    """Buffers a record of output.
+
+    The buffered records are written, as a single batch, when the batch size
+    is reached or when the flush interval has passed.
+
+    Args:
+      record (object): record of output, such as a line of text including
+          the end of line character.
+    """
+    self._buffered_records.append(record)
+
+    if len(self._buffered_records) >= self._batch_size or (
+        self._MAXIMUM_FLUSH_INTERVAL is not None and
+        time.monotonic() - self._last_flush_time >=
+        self._MAXIMUM_FLUSH_INTERVAL):
+      self.Flush()
 
   def _EncodeString(self, string):
     """Encodes the string.
@@ -155,75 +406,362 @@ class OutputWriter(object):
 
     return encoded_string
 
+  def _GetPathSpecificationString(self, path_spec):
+    """Retrieves a printable string representation of a path specification.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification or None.
+
+    Returns:
+      str: printable string representation of the path specification or None
+          if not available.
+    """
+    if not path_spec:
+      return None
+
+    return helpers.GetPathSpecificationString(path_spec)
+
+  @abc.abstractmethod
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+
   @abc.abstractmethod
   def Close(self):
     """Closes the output writer object."""
 
+  def Flush(self):
+    """Flushes buffered output."""
+    if self._buffered_records:
+      self._WriteRecords(self._buffered_records)
+      self._buffered_records = []
+
+    self._last_flush_time = time.monotonic()
+
   @abc.abstractmethod
   def Open(self):
     """Opens the output writer object."""
 
   @abc.abstractmethod
-  def WriteFileEntry(self, path):
+  def WriteFileEntry(self, path, path_spec=None, size=None):
     """Writes the file path.
 
     Args:
       path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
     """
 
 
 class FileOutputWriter(OutputWriter):
   """Output writer that writes to a file."""
 
-  def __init__(self, path, encoding='utf-8'):
+  def __init__(
+      self, path, batch_size=OutputWriter.DEFAULT_BATCH_SIZE,
+      encoding='utf-8'):
     """Initializes an output writer.
 
     Args:
       path (str): name of the path.
+      batch_size (Optional[int]): maximum number of lines that are buffered
+          before they are written.
       encoding (Optional[str]): input encoding.
     """
-    super(FileOutputWriter, self).__init__(encoding=encoding)
+    super(FileOutputWriter, self).__init__(
+        batch_size=batch_size, encoding=encoding)
     self._file_object = None
     self._path = path
 
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[str]): buffered lines of output.
+    """
+    encoded_string = self._EncodeString(''.join(records))
+    self._file_object.write(encoded_string)
+
   def Close(self):
     """Closes the output writer object."""
+    self.Flush()
     self._file_object.close()
 
+  def Flush(self):
+    """Flushes buffered output."""
+    super(FileOutputWriter, self).Flush()
+    self._file_object.flush()
+
   def Open(self):
     """Opens the output writer object."""
     # Using binary mode to make sure to write Unix end of lines, so we can
     # compare output files cross-platform.
     self._file_object = open(self._path, 'wb')  # pylint: disable=consider-using-with
 
-  def WriteFileEntry(self, path):
+  def WriteFileEntry(self, path, path_spec=None, size=None):
     """Writes the file path to file.
 
     Args:
       path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
     """
-    string = '{0:s}\n'.format(path)
+    self._BufferRecord('{0:s}\n'.format(path))
 
-    encoded_string = self._EncodeString(string)
-    self._file_object.write(encoded_string)
+
+class CSVOutputWriter(FileOutputWriter):
+  """Output writer that writes comma separated values (CSV) to a file."""
+
+  _COLUMN_NAMES = ['path', 'path_spec', 'size']
+
+  def __init__(
+      self, path, batch_size=OutputWriter.DEFAULT_BATCH_SIZE,
+      encoding='utf-8'):
+    """Initializes an output writer.
+
+    Args:
+      path (str): name of the path.
+      batch_size (Optional[int]): maximum number of rows that are buffered
+          before they are written.
+      encoding (Optional[str]): input encoding.
+    """
+    super(CSVOutputWriter, self).__init__(
+        path, batch_size=batch_size, encoding=encoding)
+    self._csv_buffer = io.StringIO()
+    self._csv_writer = csv.writer(self._csv_buffer, lineterminator='\n')
+
+  def _FormatRow(self, values):
+    """Formats a row of comma separated values.
+
+    Args:
+      values (list[object]): values of the row.
+
+    Returns:
+      str: row of comma separated values, including the end of line
+          character.
+    """
+    self._csv_writer.writerow(values)
+    row = self._csv_buffer.getvalue()
+
+    self._csv_buffer.seek(0, os.SEEK_SET)
+    self._csv_buffer.truncate()
+
+    return row
+
+  def Open(self):
+    """Opens the output writer object."""
+    super(CSVOutputWriter, self).Open()
+
+    self._BufferRecord(self._FormatRow(self._COLUMN_NAMES))
+
+  def WriteFileEntry(self, path, path_spec=None, size=None):
+    """Writes the file path to file.
+
+    Args:
+      path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
+    """
+    values = [path, self._GetPathSpecificationString(path_spec), size]
+    self._BufferRecord(self._FormatRow(values))
+
+
+class JSONLinesOutputWriter(FileOutputWriter):
+  """Output writer that writes JSON Lines to a file."""
+
+  def WriteFileEntry(self, path, path_spec=None, size=None):
+    """Writes the file path to file.
+
+    Args:
+      path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
+    """
+    json_dict = {
+        'path': path,
+        'path_spec': self._GetPathSpecificationString(path_spec),
+        'size': size}
+
+    self._BufferRecord('{0:s}\n'.format(json.dumps(json_dict)))
+
+
+class ParquetOutputWriter(OutputWriter):
+  """Output writer that writes an Apache Parquet file.
+
+  Every batch of buffered rows is written as a separate row group.
+  """
+
+  # Rows are only written when the batch size is reached, to prevent
+  # small row groups.
+  _MAXIMUM_FLUSH_INTERVAL = None
+
+  def __init__(self, path, batch_size=OutputWriter.DEFAULT_BATCH_SIZE):
+    """Initializes an output writer.
+
+    Args:
+      path (str): name of the path.
+      batch_size (Optional[int]): maximum number of rows that are buffered
+          before they are written as a row group.
+    """
+    super(ParquetOutputWriter, self).__init__(batch_size=batch_size)
+    self._parquet_writer = None
+    self._path = path
+    self._schema = None
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[tuple[object, ...]]): buffered rows of output.
+    """
+    arrays = [
+        pyarrow.array(values, type=field.type)
+        for values, field in zip(zip(*records), self._schema)]
+    table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+    self._parquet_writer.write_table(table)
+
+  def Close(self):
+    """Closes the output writer object."""
+    self.Flush()
+    self._parquet_writer.close()
+
+  def Open(self):
+    """Opens the output writer object.
+
+    Raises:
+      IOError: if pyarrow is not available or the file cannot be opened.
+      OSError: if the file cannot be opened.
+    """
+    if not pyarrow:
+      raise IOError('Missing pyarrow, which is required for Parquet output.')
+
+    self._schema = pyarrow.schema([
+        ('path', pyarrow.string()),
+        ('path_spec', pyarrow.string()),
+        ('size', pyarrow.uint64())])
+    self._parquet_writer = parquet.ParquetWriter(self._path, self._schema)
+
+  def WriteFileEntry(self, path, path_spec=None, size=None):
+    """Writes the file path to file.
+
+    Args:
+      path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
+    """
+    self._BufferRecord((
+        path, self._GetPathSpecificationString(path_spec), size))
+
+
+class SpoolOutputWriter(OutputWriter):
+  """Output writer that spools the output of a worker process to a file.
+
+  Every batch of buffered records is pickled separately, so that the spooled
+  output can be read back without reading the entire file into memory.
+  """
+
+  # Records are only written when the batch size is reached or on flush,
+  # since the spooled output is only read back after the file is closed.
+  _MAXIMUM_FLUSH_INTERVAL = None
+
+  def __init__(self, path, batch_size=OutputWriter.DEFAULT_BATCH_SIZE):
+    """Initializes an output writer.
+
+    Args:
+      path (str): name of the path.
+      batch_size (Optional[int]): maximum number of records that are buffered
+          before they are written.
+    """
+    super(SpoolOutputWriter, self).__init__(batch_size=batch_size)
+    self._file_object = None
+    self._path = path
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[FileEntryRecord]): buffered records of output.
+    """
+    pickle.dump(records, self._file_object, protocol=pickle.HIGHEST_PROTOCOL)
+
+  def Close(self):
+    """Closes the output writer object."""
+    self.Flush()
+    self._file_object.close()
+    self._file_object = None
+
+  def Open(self):
+    """Opens the output writer object."""
+    self._file_object = open(self._path, 'wb')  # pylint: disable=consider-using-with
+
+  def ReadRecords(self):
+    """Reads the spooled records.
+
+    Yields:
+      FileEntryRecord: file entry.
+    """
+    with open(self._path, 'rb') as file_object:
+      while True:
+        try:
+          records = pickle.load(file_object)
+        except EOFError:
+          break
+
+        yield from records
+
+  def WriteFileEntry(self, path, path_spec=None, size=None):
+    """Writes the file path to the spool file.
+
+    Args:
+      path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
+    """
+    self.WriteRecord(FileEntryRecord(path, path_spec=path_spec, size=size))
+
+  def WriteRecord(self, record):
+    """Writes a record to the spool file.
+
+    Args:
+      record (FileEntryRecord): file entry.
+    """
+    self._BufferRecord(record)
 
 
 class StdoutWriter(OutputWriter):
   """Output writer that writes to stdout."""
 
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[str]): buffered lines of output.
+    """
+    sys.stdout.write(''.join(records))
+
   def Close(self):
     """Closes the output writer object."""
+    self.Flush()
+
+  def Flush(self):
+    """Flushes buffered output."""
+    super(StdoutWriter, self).Flush()
+    sys.stdout.flush()
 
   def Open(self):
     """Opens the output writer object."""
 
-  def WriteFileEntry(self, path):
+  def WriteFileEntry(self, path, path_spec=None, size=None):
     """Writes the file path to stdout.
 
     Args:
       path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
     """
-    print(path)
+    self._BufferRecord('{0:s}\n'.format(path))
 
 
 def Main():
@@ -239,11 +777,29 @@ def Main():
       '--back_end', '--back-end', dest='back_end', action='store',
       metavar='NTFS', default=None, help='preferred dfVFS back-end.')
 
+  helpers.AddFileEntryFilterArguments(argument_parser)
+
+  argument_parser.add_argument(
+      '--output_batch_size', '--output-batch-size', dest='output_batch_size',
+      action='store', type=int, default=OutputWriter.DEFAULT_BATCH_SIZE,
+      metavar='N', help=(
+          'maximum number of output lines that are buffered before they are '
+          'written, default is {0:d}.').format(
+              OutputWriter.DEFAULT_BATCH_SIZE))
+
   argument_parser.add_argument(
       '--output_file', '--output-file', dest='output_file', action='store',
       metavar='source.hashes', default=None, help=(
           'path of the output file, default is to output to stdout.'))
 
+  argument_parser.add_argument(
+      '--output_format', '--output-format', dest='output_format',
+      action='store', choices=['csv', 'jsonl', 'parquet', 'text'],
+      default='text', help=(
+          'format of the output, where csv, jsonl and parquet also contain '
+          'the path specification and size and require an output file. The '
+          'parquet format requires pyarrow. The default is: text.'))
+
   argument_parser.add_argument(
       '--partitions', '--partition', dest='partitions', action='store',
       type=str, default=None, help=(
@@ -253,6 +809,33 @@ def Main():
           'combined as: "1,3..5". The first partition is 1. All partitions '
           'can be specified with: "all".'))
 
+  argument_parser.add_argument(
+      '--profile', dest='profile', action='store_true', default=False, help=(
+          'print a breakdown of the time spent in volume scanning, directory '
+          'enumeration and writing the output.'))
+
+  argument_parser.add_argument(
+      '--profile_output', '--profile-output', dest='profile_output',
+      action='store', metavar='FILE', default=None, help=(
+          'path of a file to write cProfile statistics to, which can be '
+          'analyzed with pstats. If --profile is also specified the functions '
+          'with the most cumulative time are printed as well.'))
+
+  argument_parser.add_argument(
+      '--rescan', dest='rescan', action='store_true', default=False, help=(
+          'scan the source for volumes and file systems, even if the scan '
+          'result cache contains the results of the source, and update the '
+          'cached results.'))
+
+  argument_parser.add_argument(
+      '--scan_cache', '--scan-cache', dest='scan_cache', action='store',
+      metavar='FILE', default=None, help=(
+          'path of a file that caches the results of scanning storage media '
+          'images for volumes and file systems between runs. Cached results '
+          'are used if the size, modification time and a hash of the first '
+          'and last 64 KiB of the image are unchanged. Results of images '
+          'with encrypted volumes are not cached.'))
+
   argument_parser.add_argument(
       '--snapshots', '--snapshot', dest='snapshots', action='store', type=str,
       default=None, help=(
@@ -271,6 +854,14 @@ def Main():
           'as: "1,3..5". The first volume is 1. All volumes can be specified '
           'with: "all".'))
 
+  argument_parser.add_argument(
+      '--workers', dest='workers', action='store', type=int, default=1,
+      metavar='N', help=(
+          'number of worker processes that concurrently list the file '
+          'entries of different volumes and snapshots, where the output is '
+          'written in the order of the volumes and snapshots. Default is to '
+          'list the volumes and snapshots sequentially.'))
+
   argument_parser.add_argument(
       'source', nargs='?', action='store', metavar='image.raw',
       default=None, help='path of the directory or storage media image.')
@@ -284,15 +875,64 @@ def Main():
     print('')
     return False
 
+  if options.workers < 1:
+    print('Unsupported number of workers: {0:d}.'.format(options.workers))
+    print('')
+    return False
+
+  if options.output_batch_size < 1:
+    print('Unsupported output batch size: {0:d}.'.format(
+        options.output_batch_size))
+    print('')
+    return False
+
+  if options.output_format != 'text' and not options.output_file:
+    print('Output format: {0:s} requires an output file.'.format(
+        options.output_format))
+    print('')
+    return False
+
+  try:
+    file_entry_filter = helpers.GetFileEntryFilter(options)
+  except ValueError as exception:
+    print('Unsupported file entry filter: {0!s}.'.format(exception))
+    print('')
+    return False
+
   helpers.SetDFVFSBackEnd(options.back_end)
 
   logging.basicConfig(
       level=logging.INFO, format='[%(levelname)s] %(message)s')
 
-  if options.output_file:
-    output_writer = FileOutputWriter(options.output_file)
+  scan_result_cache = None
+  if options.scan_cache:
+    scan_result_cache = helpers.ScanResultCache(options.scan_cache)
+
+    try:
+      scan_result_cache.Open()
+    except (IOError, OSError) as exception:
+      print('Unable to open scan result cache with error: {0!s}.'.format(
+          exception))
+      print('')
+      return False
+
+    if options.rescan:
+      scan_result_cache.RemoveSource(options.source)
+
+  if options.output_format == 'csv':
+    output_writer = CSVOutputWriter(
+        options.output_file, batch_size=options.output_batch_size)
+  elif options.output_format == 'jsonl':
+    output_writer = JSONLinesOutputWriter(
+        options.output_file, batch_size=options.output_batch_size)
+  elif options.output_format == 'parquet':
+    output_writer = ParquetOutputWriter(
+        options.output_file, batch_size=options.output_batch_size)
+  elif options.output_file:
+    output_writer = FileOutputWriter(
+        options.output_file, batch_size=options.output_batch_size)
   else:
-    output_writer = StdoutWriter()
+    output_writer = StdoutWriter(batch_size=options.output_batch_size)
 
   try:
     output_writer.Open()
@@ -302,8 +942,13 @@ def Main():
     print('')
     return False
 
+  profiler = helpers.StageProfiler()
+
   mediator = command_line.CLIVolumeScannerMediator()
-  file_entry_lister = FileEntryLister(mediator=mediator)
+  file_entry_lister = FileEntryLister(
+      file_entry_filter=file_entry_filter, mediator=mediator,
+      number_of_workers=options.workers, profiler=profiler,
+      scan_result_cache=scan_result_cache)
 
   volume_scanner_options = volume_scanner.VolumeScannerOptions()
   volume_scanner_options.partitions = mediator.ParseVolumeIdentifiersString(
@@ -320,18 +965,27 @@ def Main():
 
   return_value = True
 
+  python_profiler = None
+  if options.profile_output:
+    python_profiler = cProfile.Profile()
+    python_profiler.enable()
+
   try:
     base_path_specs = file_entry_lister.GetBasePathSpecs(
         options.source, options=volume_scanner_options)
     if not base_path_specs:
+      return_value = False
+
       print('No supported file system found in source.')
       print('')
-      return False
+    else:
+      file_entry_lister.ListFileEntries(base_path_specs, output_writer)
 
-    file_entry_lister.ListFileEntries(base_path_specs, output_writer)
+      with profiler.Time('output'):
+        output_writer.Flush()
 
-    print('')
-    print('Completed.')
+      print('')
+      print('Completed.')
 
   except errors.ScannerError as exception:
     return_value = False
@@ -345,8 +999,29 @@ def Main():
     print('')
     print('Aborted by user.')
 
+  if python_profiler:
+    python_profiler.disable()
+    python_profiler.dump_stats(options.profile_output)
+
+  if options.profile:
+    print('')
+    print(profiler.FormatReport())
+
+    if python_profiler:
+      print('')
+      stats = pstats.Stats(python_profiler, stream=sys.stdout)
+      stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
   output_writer.Close()
 
+  if scan_result_cache:
+    try:
+      scan_result_cache.Close()
+    except (IOError, OSError) as exception:
+      logging.warning(
+          'Unable to write scan result cache with error: {0!s}'.format(
+              exception))
+
   return return_value
 
 
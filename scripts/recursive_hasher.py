@@ -7,9 +7,23 @@
 
 import abc
 import argparse
+import collections
+import cProfile
+import csv
 import hashlib
+import io
+import json
 import logging
+import multiprocessing
+import os
+import pickle
+import pstats
+import queue
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
 
 from dfvfs.analyzer import analyzer
 from dfvfs.analyzer import fvde_analyzer_helper
@@ -17,8 +31,15 @@ from dfvfs.lib import definitions as dfvfs_definitions
 from dfvfs.lib import errors as dfvfs_errors
 from dfvfs.helpers import command_line
 from dfvfs.helpers import volume_scanner
+from dfvfs.resolver import context as dfvfs_context
 from dfvfs.resolver import resolver
 
+try:
+  import pyarrow
+  from pyarrow import parquet
+except ImportError:
+  pyarrow = None
+
 from scripts import helpers
 
 
@@ -29,264 +50,2828 @@ except KeyError:
   pass
 
 
-class RecursiveHasher(volume_scanner.VolumeScanner):
-  """Recursively calculates message digest hashes of data streams."""
+# Recursive hasher and resolver context of a worker process.
+_worker_hasher = None
+_worker_resolver_context = None
+
+
+def _CalculateHashesBasePathSpec(work_item):
+  """Calculates message digest hashes of a base path specification.
+
+  This function is run in a worker process, which writes the output to
+  a spool file that is merged by the parent process.
+
+  Args:
+    work_item (tuple[dfvfs.PathSpec, str]): base path specification and path
+        of the spool file to write the output to.
+
+  Returns:
+    dict[str, int]: values of the counters, such as the number of bytes read,
+        per counter name.
+  """
+  base_path_spec, spool_path = work_item
+
+  # pylint: disable=protected-access
+  counters = _worker_hasher._profiler.GetCounters()
+
+  output_writer = SpoolOutputWriter(spool_path)
+  output_writer.Open()
+
+  try:
+    for record in _worker_hasher.IterateHashes([base_path_spec]):
+      output_writer.WriteRecord(record)
+  finally:
+    output_writer.Close()
+
+  return {
+      counter_name: value - counters.get(counter_name, 0)
+      for counter_name, value in _worker_hasher._profiler.GetCounters().items()}
+
+
+def _CalculateHashWorkItem(work_item):
+  """Calculates message digest hashes of a work item in a worker process.
+
+  Args:
+    work_item (tuple[dfvfs.PathSpec, str]): path specification of the file
+        entry and name of the data stream.
+
+  Returns:
+    tuple[dict[str, str], str]: digest hashes per hash name or None and
+        description of the error that prevented the data stream from being
+        hashed or None.
+  """
+  path_spec, data_stream_name = work_item
+
+  try:
+    file_entry = resolver.Resolver.OpenFileEntry(
+        path_spec, resolver_context=_worker_resolver_context)
+  except (IOError, dfvfs_errors.AccessError,
+          dfvfs_errors.BackEndError) as exception:
+    path_specification_string = helpers.GetPathSpecificationString(path_spec)
+    logging.warning((
+        'Unable to open path specification:\n{0:s}'
+        'with error: {1!s}').format(path_specification_string, exception))
+    return None, 'Unable to open file entry with error: {0!s}'.format(
+        exception)
+
+  if not file_entry:
+    return None, 'Unable to open file entry'
+
+  # pylint: disable=protected-access
+  return _worker_hasher._CalculateHashDataStream(file_entry, data_stream_name)
+
+
+def _InitializeWorkerProcess(
+    hash_names, read_buffer_size, maximum_read_buffer_memory,
+    extent_order=False, file_entry_filter=None, hard_link_cache_size=None,
+    skip_hashing_patterns=None):
+  """Initializes a worker process.
+
+  Every worker process uses its own resolver context, so that file objects
+  and file systems opened by the parent process are not shared.
+
+  Args:
+    hash_names (list[str]): names of the message digest hashes to calculate.
+    read_buffer_size (int): size of a read buffer.
+    maximum_read_buffer_memory (int): maximum number of bytes of the read
+        buffers of the worker process or None for the default.
+    extent_order (Optional[bool]): True if the data streams of a file system
+        should be hashed in the order of the offset of their first extent.
+    file_entry_filter (Optional[helpers.FileEntryFilter]): file entry filter.
+    hard_link_cache_size (Optional[int]): maximum number of data streams
+        with multiple links of which the digest hashes are cached, where 0
+        represents no cache and None the default.
+    skip_hashing_patterns (Optional[list[str]]): glob patterns of paths of
+        data streams that should not be hashed, where None represents the
+        default patterns.
+  """
+  global _worker_hasher  # pylint: disable=global-statement,invalid-name
+  global _worker_resolver_context  # pylint: disable=global-statement,invalid-name
+
+  _worker_resolver_context = dfvfs_context.Context()
+  _worker_hasher = RecursiveHasher(
+      extent_order=extent_order, file_entry_filter=file_entry_filter,
+      hard_link_cache_size=hard_link_cache_size, hash_names=hash_names,
+      maximum_read_buffer_memory=maximum_read_buffer_memory,
+      read_buffer_size=read_buffer_size,
+      resolver_context=_worker_resolver_context,
+      skip_hashing_patterns=skip_hashing_patterns)
+
+
+class FileHashRecord(object):
+  """Message digest hashes of a data stream.
+
+  Attributes:
+    data_stream_name (str): name of the data stream, where an empty string
+        represents the default data stream.
+    error (str): description of the error that prevented the data stream from
+        being hashed or None.
+    hash_values (dict[str, str]): digest hashes per hash name or None if the
+        data stream was not hashed.
+    path (str): path to display.
+    path_spec (dfvfs.PathSpec): path specification of the file entry.
+    size (int): size of the data stream or None if not available.
+    tag (str): tag of the data stream, such as "known_bad", or None.
+  """
+
+  __slots__ = [
+      'data_stream_name', 'error', 'hash_values', 'path', 'path_spec', 'size',
+      'tag']
+
+  def __init__(
+      self, path, hash_values, data_stream_name='', error=None, path_spec=None,
+      size=None, tag=None):
+    """Initializes a file hash record.
+
+    Args:
+      path (str): path to display.
+      hash_values (dict[str, str]): digest hashes per hash name or None if
+          the data stream was not hashed.
+      data_stream_name (Optional[str]): name of the data stream.
+      error (Optional[str]): description of the error that prevented the data
+          stream from being hashed.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file
+          entry.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
+    """
+    super(FileHashRecord, self).__init__()
+    self.data_stream_name = data_stream_name
+    self.error = error
+    self.hash_values = hash_values
+    self.path = path
+    self.path_spec = path_spec
+    self.size = size
+    self.tag = tag
+
+
+class RecursiveHasher(volume_scanner.VolumeScanner):
+  """Recursively calculates message digest hashes of data streams."""
+
+  SUPPORTED_HASH_NAMES = frozenset([
+      'md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512'])
+
+  # Class constant that defines the default read buffer size.
+  _READ_BUFFER_SIZE = 16 * 1024 * 1024
+
+  # Type of an extent that contains no data. Note that file entry extents are
+  # not supported by all versions of dfVFS.
+  _EXTENT_TYPE_SPARSE = getattr(
+      dfvfs_definitions, 'EXTENT_TYPE_SPARSE', 'sparse')
+
+  # NTFS file attribute flag that indicates the data is stored compressed.
+  _NTFS_FILE_ATTRIBUTE_FLAG_COMPRESSED = 0x00000800
+
+  # TSK metadata flag that indicates the data is stored compressed.
+  _TSK_FS_META_FLAG_COMP = 0x0010
+
+  # Default number of read buffers per process, which allows to read a buffer
+  # while another buffer is hashed and a third is queued.
+  _NUMBER_OF_READ_BUFFERS = 3
+
+  # Maximum number of work items, per worker process, that are queued
+  # before the results are written.
+  _MAXIMUM_QUEUED_WORK_ITEMS_PER_WORKER = 64
+
+  # Size of the blocks at the start and end of a data stream that are hashed
+  # to eliminate candidate duplicates before the data is fully hashed.
+  _PARTIAL_HASH_BLOCK_SIZE = 64 * 1024
+
+  # Default glob patterns of paths of data streams that should not be hashed,
+  # where the name of a data stream other than the default data stream is
+  # appended to the path as ":name".
+  DEFAULT_SKIP_HASHING_PATTERNS = [
+      '/$BadClus:$Bad',
+      '/hiberfil.sys',
+      '/pagefile.sys',
+      '/swapfile.sys']
+
+  def __init__(  # pylint: disable=too-many-arguments
+      self, checkpoint_journal=None, duplicates_only=False, extent_order=False,
+      file_entry_filter=None, hard_link_cache_size=None, hash_cache=None,
+      hash_names=None, known_hashes=None, maximum_read_buffer_memory=None,
+      mediator=None, number_of_volume_workers=1, number_of_workers=1,
+      profiler=None, read_buffer_size=None, resolver_context=None,
+      scan_result_cache=None, skip_hashing_patterns=None):
+    """Initializes a recursive hasher.
+
+    Args:
+      checkpoint_journal (Optional[CheckpointJournal]): checkpoint journal,
+          where data streams that are recorded in the journal are skipped
+          and data streams that have been hashed are recorded.
+      duplicates_only (Optional[bool]): True if only data streams of which
+          the content is duplicated should be hashed and written.
+      extent_order (Optional[bool]): True if the data streams of a file
+          system should be hashed in the order of the offset of their first
+          extent, to read the underlying storage sequentially, instead of in
+          the order in which they are enumerated.
+      file_entry_filter (Optional[helpers.FileEntryFilter]): file entry filter
+          that determines the file entries of which the data streams are
+          hashed, where None represents all file entries.
+      hard_link_cache_size (Optional[int]): maximum number of data streams
+          with multiple links, such as hard links, of which the digest hashes
+          are cached, so that the data is only read once for all links, where
+          0 represents no cache and None the default.
+      hash_cache (Optional[HashCache]): cache of digest hashes of previous
+          runs, where the data of a data stream is not read if the cache
+          contains its digest hashes.
+      hash_names (Optional[list[str]]): names of the message digest hashes to
+          calculate, where None represents SHA-256 only. All the hashes are
+          calculated in a single pass over the data.
+      known_hashes (Optional[list[tuple[helpers.KnownHashesIndex, str,
+          bool]]]): indexes of known message digest hashes, with the tag of
+          data streams of which the digest is in the index, such as
+          "known_good" or "known_bad", and whether these data streams should
+          be suppressed from the output instead of tagged. The indexes are
+          looked up in order and the first index that contains the digest
+          determines the tag.
+      maximum_read_buffer_memory (Optional[int]): maximum number of bytes of
+          the read buffers of all concurrently hashed data streams, which is
+          divided between the worker processes, where None represents
+          3 read buffers per process.
+      mediator (Optional[VolumeScannerMediator]): a volume scanner mediator.
+      number_of_volume_workers (Optional[int]): number of worker processes
+          that concurrently calculate the message digest hashes of different
+          base path specifications, such as volumes and snapshots, where 1
+          represents that the base path specifications are processed
+          sequentially. Cannot be combined with multiple workers, a hash
+          cache, a checkpoint journal or duplicates only. Known hashes are
+          looked up in the current process.
+      number_of_workers (Optional[int]): number of worker processes that
+          calculate the message digest hashes, where 1 represents that the
+          hashes are calculated in the current process.
+      profiler (Optional[helpers.StageProfiler]): profiler that records the
+          time spent in the processing stages, where None represents a
+          profiler private to the hasher.
+      read_buffer_size (Optional[int]): size of a read buffer, where None
+          represents 16 MiB. The read buffer size is reduced if it exceeds
+          the maximum read buffer memory.
+      resolver_context (Optional[dfvfs.Context]): resolver context, where
+          None represents the built in context.
+      scan_result_cache (Optional[helpers.ScanResultCache]): cache of the
+          results of scanning sources.
+      skip_hashing_patterns (Optional[list[str]]): glob patterns of paths of
+          data streams that are written without being hashed, such as
+          the page file, where None represents the default patterns and
+          an empty list that all data streams are hashed.
+
+    Raises:
+      ValueError: if multiple volume workers are combined with an option that
+          the volume workers do not support.
+    """
+    if number_of_volume_workers > 1 and (
+        checkpoint_journal or duplicates_only or hash_cache or
+        number_of_workers > 1):
+      raise ValueError((
+          'Volume workers cannot be combined with a checkpoint journal, '
+          'duplicates only mode, a hash cache or multiple workers.'))
+
+    if skip_hashing_patterns is None:
+      skip_hashing_patterns = self.DEFAULT_SKIP_HASHING_PATTERNS
+
+    read_buffer_size = read_buffer_size or self._READ_BUFFER_SIZE
+    number_of_read_buffers = self._NUMBER_OF_READ_BUFFERS
+    if maximum_read_buffer_memory:
+      read_buffer_size = min(read_buffer_size, maximum_read_buffer_memory)
+      number_of_read_buffers = min(
+          number_of_read_buffers,
+          maximum_read_buffer_memory // read_buffer_size)
+
+    super(RecursiveHasher, self).__init__(mediator=mediator)
+    self._checkpoint_journal = checkpoint_journal
+    self._display_path_builder = helpers.DisplayPathBuilder()
+    self._duplicates_only = duplicates_only
+    self._extent_order = extent_order
+    self._file_entry_filter = file_entry_filter
+    self._hard_link_cache = None
+    self._hard_link_cache_size = hard_link_cache_size
+    self._hash_cache = hash_cache
+    self._hash_names = hash_names or ['sha256']
+    self._known_hashes = known_hashes or []
+    self._maximum_read_buffer_memory = maximum_read_buffer_memory
+    self._number_of_volume_workers = number_of_volume_workers
+    self._number_of_workers = number_of_workers
+    self._profiler = profiler or helpers.StageProfiler()
+    self._read_buffer_pool = ReadBufferPool(
+        read_buffer_size, number_of_read_buffers)
+    self._resolver_context = resolver_context
+    self._scan_result_cache = scan_result_cache
+    self._skip_hashing_patterns = list(skip_hashing_patterns)
+    self._skip_hashing_trie = None
+    self._zero_data = None
+    self._unavailable_hash_values = {
+        hash_name: 'N/A' for hash_name in self._hash_names}
+
+    if hard_link_cache_size != 0:
+      self._hard_link_cache = HardLinkCache(
+          maximum_number_of_entries=hard_link_cache_size)
+
+    if skip_hashing_patterns:
+      self._skip_hashing_trie = helpers.PathPatternTrie(skip_hashing_patterns)
+
+  def _CalculateHashDataStream(self, file_entry, data_stream_name):
+    """Calculates message digest hashes of the data of the file entry.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      tuple[dict[str, str], str]: digest hashes per hash name or None and
+          description of the error that prevented the data stream from being
+          hashed or None.
+    """
+    if file_entry.IsDevice() or file_entry.IsPipe() or file_entry.IsSocket():
+      # Ignore devices, FIFOs/pipes and sockets.
+      return None, None
+
+    hash_contexts = {
+        hash_name: hashlib.new(hash_name) for hash_name in self._hash_names}
+
+    try:
+      with self._profiler.Time('open'):
+        file_object = file_entry.GetFileObject(
+            data_stream_name=data_stream_name)
+    except IOError as exception:
+      path_specification_string = helpers.GetPathSpecificationString(
+          file_entry.path_spec)
+      logging.warning((
+          'Unable to open path specification:\n{0:s}'
+          'with error: {1!s}').format(path_specification_string, exception))
+      return None, 'Unable to open data stream with error: {0!s}'.format(
+          exception)
+
+    if not file_object:
+      return None, 'Unable to open data stream'
+
+    sparse_ranges = self._GetSparseRanges(
+        file_entry, data_stream_name, file_object.get_size())
+    if sparse_ranges:
+      if not self._zero_data:
+        self._zero_data = bytes(self._read_buffer_pool.buffer_size)
+
+      file_object = SparseFileObject(
+          file_object, sparse_ranges, self._zero_data)
+
+    data_queue = None
+    hash_exceptions = []
+    hash_thread = None
+
+    try:
+      read_buffer, data = self._ReadData(file_object)
+
+      if (len(data) < self._read_buffer_pool.buffer_size or
+          self._read_buffer_pool.maximum_number_of_buffers < 2):
+        while data:
+          self._profiler.IncrementCounter('bytes_read', len(data))
+          with self._profiler.Time('hash'):
+            for hash_context in hash_contexts.values():
+              hash_context.update(data)
+
+          self._read_buffer_pool.Free(read_buffer)
+          read_buffer, data = self._ReadData(file_object)
+
+        self._read_buffer_pool.Free(read_buffer)
+
+      else:
+        # The data stream spans multiple read buffers, hence the data is
+        # hashed on a separate thread, so that reading the next buffer
+        # overlaps with hashing the current one. Note that hashlib releases
+        # the GIL when hashing large buffers. The hash thread frees the read
+        # buffers, hence reading blocks when all read buffers are in use.
+        data_queue = queue.Queue()
+        hash_thread = threading.Thread(
+            target=self._UpdateHashContexts,
+            args=(list(hash_contexts.values()), data_queue, hash_exceptions))
+        hash_thread.start()
+
+        while data and not hash_exceptions:
+          self._profiler.IncrementCounter('bytes_read', len(data))
+          data_queue.put((read_buffer, data))
+
+          read_buffer, data = self._ReadData(file_object)
+
+        self._read_buffer_pool.Free(read_buffer)
+
+    except IOError as exception:
+      path_specification_string = helpers.GetPathSpecificationString(
+          file_entry.path_spec)
+      logging.warning((
+          'Unable to read from path specification:\n{0:s}'
+          'with error: {1!s}').format(path_specification_string, exception))
+      return None, 'Unable to read data stream with error: {0!s}'.format(
+          exception)
+
+    finally:
+      if hash_thread:
+        data_queue.put(None)
+        hash_thread.join()
+
+    if hash_exceptions:
+      # Raise the exception of the hash thread in the thread that reads.
+      raise hash_exceptions[0]
+
+    if sparse_ranges:
+      self._profiler.IncrementCounter(
+          'bytes_sparse', file_object.number_of_sparse_bytes)
+
+    hash_values = {
+        hash_name: hash_context.hexdigest()
+        for hash_name, hash_context in hash_contexts.items()}
+    return hash_values, None
+
+  def _CalculateHashes(self, base_path_specs):
+    """Recursively calculates hashes starting with the base path specifications.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream, of which the
+          tag has not been determined.
+    """
+    if self._number_of_volume_workers > 1 and len(base_path_specs) > 1:
+      yield from self._CalculateHashesWithVolumeWorkers(base_path_specs)
+      return
+
+    pool = None
+    if self._number_of_workers > 1:
+      pool = multiprocessing.Pool(  # pylint: disable=consider-using-with
+          processes=self._number_of_workers,
+          initializer=_InitializeWorkerProcess,
+          initargs=(
+              self._hash_names, self._read_buffer_pool.buffer_size,
+              self._GetWorkerMaximumReadBufferMemory(self._number_of_workers),
+              self._extent_order))
+
+    try:
+      if self._duplicates_only:
+        yield from self._CalculateHashesDuplicatesOnly(pool, base_path_specs)
+        base_path_specs = []
+
+      for base_path_spec in base_path_specs:
+        file_entry = resolver.Resolver.OpenFileEntry(
+            base_path_spec, resolver_context=self._resolver_context)
+        if file_entry is None:
+          path_specification_string = helpers.GetPathSpecificationString(
+              base_path_spec)
+          logging.warning(
+              'Unable to open base path specification:\n{0:s}'.format(
+                  path_specification_string))
+          continue
+
+        if self._extent_order:
+          yield from self._CalculateHashesFileEntryInExtentOrder(
+              pool, file_entry, [])
+        elif pool:
+          yield from self._CalculateHashesFileEntryWithWorkers(
+              pool, file_entry, [])
+        else:
+          yield from self._CalculateHashesFileEntry(file_entry, [])
+
+    finally:
+      if pool:
+        # Note that at this point all the results have been retrieved, unless
+        # the iteration was stopped.
+        pool.terminate()
+        pool.join()
+
+  def _CalculateHashesFileEntry(self, file_entry, parent_path_segments):
+    """Calculates hashes starting with the file entry.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      parent_path_segments (str): path segments of the full path of the parent
+          file entry.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    for data_stream_file_entry, path_segments, data_stream_name in (
+        self._GetDataStreams(file_entry, parent_path_segments)):
+      path_spec = data_stream_file_entry.path_spec
+
+      error = None
+      hash_values = None
+      if not self._IsIgnoredDataStream(path_segments, data_stream_name):
+        cache_key, hash_values = self._GetCachedHashValues(
+            data_stream_file_entry, data_stream_name)
+
+        if not hash_values:
+          link_key, hash_values = self._GetHardLinkHashValues(
+              data_stream_file_entry, data_stream_name)
+
+          if not hash_values:
+            hash_values, error = self._CalculateHashDataStream(
+                data_stream_file_entry, data_stream_name)
+
+            if link_key and hash_values:
+              self._hard_link_cache.SetHashValues(link_key, hash_values)
+
+          if cache_key and hash_values:
+            self._hash_cache.SetHashValues(cache_key, hash_values)
+
+      display_path = self._GetDisplayPath(
+          path_spec, path_segments, data_stream_name)
+      size = self._GetDataStreamSize(data_stream_file_entry, data_stream_name)
+      yield FileHashRecord(
+          display_path, hash_values, data_stream_name=data_stream_name,
+          error=error, path_spec=path_spec, size=size)
+
+  def _CalculateHashesDuplicatesOnly(self, pool, base_path_specs):
+    """Calculates hashes of data streams with duplicated content.
+
+    Candidate duplicates are eliminated in 3 passes:
+    1. data streams with a unique size are eliminated without reading data;
+    2. data streams with a unique partial hash, calculated over the first and
+       last block, are eliminated;
+    3. data streams with unique digest hashes of the full data are
+       eliminated.
+
+    Empty data streams are not considered duplicates. The remaining data
+    streams are yielded in the order in which they were enumerated.
+
+    Args:
+      pool (multiprocessing.Pool): pool of worker processes or None if
+          the hashes should be calculated in the current process.
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    candidates = []
+    for base_path_spec in base_path_specs:
+      file_entry = resolver.Resolver.OpenFileEntry(
+          base_path_spec, resolver_context=self._resolver_context)
+      if file_entry is None:
+        path_specification_string = helpers.GetPathSpecificationString(
+            base_path_spec)
+        logging.warning(
+            'Unable to open base path specification:\n{0:s}'.format(
+                path_specification_string))
+        continue
+
+      for data_stream_file_entry, path_segments, data_stream_name in (
+          self._GetDataStreams(file_entry, [])):
+        if self._IsIgnoredDataStream(path_segments, data_stream_name):
+          continue
+
+        size = self._GetDataStreamSize(data_stream_file_entry, data_stream_name)
+        if size:
+          path_spec = data_stream_file_entry.path_spec
+          display_path = self._GetDisplayPath(
+              path_spec, path_segments, data_stream_name)
+          candidates.append((display_path, path_spec, data_stream_name, size))
+
+    candidates = self._GetDuplicateCandidates(
+        candidates, [candidate[3] for candidate in candidates])
+
+    opened_candidates = []
+    partial_hashes = []
+    for candidate in candidates:
+      _, path_spec, data_stream_name, size = candidate
+      partial_hash = None
+      if size > 2 * self._PARTIAL_HASH_BLOCK_SIZE:
+        file_entry = self._OpenFileEntry(path_spec)
+        if not file_entry:
+          continue
+
+        partial_hash = self._CalculatePartialHashDataStream(
+            file_entry, data_stream_name, size)
+
+      opened_candidates.append(candidate)
+      partial_hashes.append((size, partial_hash))
+
+    candidates = self._GetDuplicateCandidates(
+        opened_candidates, partial_hashes)
+
+    opened_candidates = []
+    candidate_hash_values = []
+    for candidate in candidates:
+      _, path_spec, data_stream_name, _ = candidate
+      file_entry = self._OpenFileEntry(path_spec)
+      if not file_entry:
+        continue
+
+      cache_key, hash_values = self._GetCachedHashValues(
+          file_entry, data_stream_name)
+
+      error = None
+      result = None
+      if not hash_values:
+        if pool:
+          work_item = (path_spec, data_stream_name)
+          result = pool.apply_async(_CalculateHashWorkItem, (work_item, ))
+        else:
+          hash_values, error = self._CalculateHashDataStream(
+              file_entry, data_stream_name)
+
+          if cache_key and hash_values:
+            self._hash_cache.SetHashValues(cache_key, hash_values)
+
+      opened_candidates.append(candidate)
+      candidate_hash_values.append((cache_key, hash_values, error, result))
+
+    hashed_candidates = []
+    full_hashes = []
+    for candidate, (cache_key, hash_values, error, result) in zip(
+        opened_candidates, candidate_hash_values):
+      if result:
+        with self._profiler.Time('worker_wait'):
+          hash_values, error = result.get()
+
+        if hash_values:
+          self._profiler.IncrementCounter('bytes_read', candidate[3])
+
+        if cache_key and hash_values:
+          self._hash_cache.SetHashValues(cache_key, hash_values)
+
+      full_hash = None
+      if hash_values:
+        full_hash = (candidate[3], tuple(sorted(hash_values.items())))
+
+      hashed_candidates.append((candidate, hash_values, error))
+      full_hashes.append(full_hash)
+
+    for candidate, hash_values, error in self._GetDuplicateCandidates(
+        hashed_candidates, full_hashes):
+      display_path, path_spec, data_stream_name, size = candidate
+      yield FileHashRecord(
+          display_path, hash_values, data_stream_name=data_stream_name,
+          error=error, path_spec=path_spec, size=size)
+
+  def _CalculateHashesFileEntryWithWorkers(
+      self, pool, file_entry, parent_path_segments):
+    """Calculates hashes starting with the file entry using workers.
+
+    The file entries are enumerated in the current process and the data
+    streams are hashed by the worker processes. The results are yielded in
+    the order in which the data streams were enumerated. A data stream with
+    multiple links is only hashed for the first link, other links that are
+    queued before its result is yielded use the result.
+
+    Args:
+      pool (multiprocessing.Pool): pool of worker processes.
+      file_entry (dfvfs.FileEntry): file entry.
+      parent_path_segments (str): path segments of the full path of the parent
+          file entry.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    maximum_queued_work_items = (
+        self._number_of_workers * self._MAXIMUM_QUEUED_WORK_ITEMS_PER_WORKER)
+
+    queued_link_keys = set()
+    queued_results = collections.deque()
+    for data_stream_file_entry, path_segments, data_stream_name in (
+        self._GetDataStreams(file_entry, parent_path_segments)):
+      path_spec = data_stream_file_entry.path_spec
+
+      cache_key = None
+      hash_values = None
+      link_key = None
+      result = None
+      if not self._IsIgnoredDataStream(path_segments, data_stream_name):
+        cache_key, hash_values = self._GetCachedHashValues(
+            data_stream_file_entry, data_stream_name)
+
+        if not hash_values:
+          link_key, hash_values = self._GetHardLinkHashValues(
+              data_stream_file_entry, data_stream_name)
+
+        if not hash_values and link_key not in queued_link_keys:
+          work_item = (path_spec, data_stream_name)
+          result = pool.apply_async(_CalculateHashWorkItem, (work_item, ))
+
+          if link_key:
+            queued_link_keys.add(link_key)
+
+      display_path = self._GetDisplayPath(
+          path_spec, path_segments, data_stream_name)
+      size = self._GetDataStreamSize(data_stream_file_entry, data_stream_name)
+      queued_results.append((
+          display_path, path_spec, data_stream_name, size, cache_key,
+          hash_values, result, link_key, None))
+
+      if len(queued_results) >= maximum_queued_work_items:
+        queued_result = queued_results.popleft()
+        yield self._GetQueuedResultRecord(queued_result)
+        queued_link_keys.discard(queued_result[7])
+
+    while queued_results:
+      yield self._GetQueuedResultRecord(queued_results.popleft())
+
+  def _CalculateHashesFileEntryInExtentOrder(
+      self, pool, file_entry, parent_path_segments):
+    """Calculates hashes starting with the file entry in extent order.
+
+    The data streams are hashed in 2 phases:
+    1. the data streams are enumerated and the offsets of their first extent
+       are determined;
+    2. the data streams are hashed in ascending order of the offset of their
+       first extent, where data streams without extents are hashed last in
+       the order in which they were enumerated.
+
+    The results are yielded in the order in which the data streams were
+    enumerated. Note that the results are retained until all the data streams
+    of the file system have been hashed.
+
+    Args:
+      pool (multiprocessing.Pool): pool of worker processes or None if
+          the hashes should be calculated in the current process.
+      file_entry (dfvfs.FileEntry): file entry.
+      parent_path_segments (str): path segments of the full path of the parent
+          file entry.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    queued_link_keys = set()
+    queued_results = []
+    extent_offsets = []
+    for data_stream_file_entry, path_segments, data_stream_name in (
+        self._GetDataStreams(file_entry, parent_path_segments)):
+      path_spec = data_stream_file_entry.path_spec
+
+      cache_key = None
+      hash_values = None
+      link_key = None
+      if not self._IsIgnoredDataStream(path_segments, data_stream_name):
+        cache_key, hash_values = self._GetCachedHashValues(
+            data_stream_file_entry, data_stream_name)
+
+        if not hash_values:
+          link_key, hash_values = self._GetHardLinkHashValues(
+              data_stream_file_entry, data_stream_name)
+
+        # A data stream with multiple links is only hashed for the first
+        # link, other links use its digest hashes when yielded.
+        if not hash_values and link_key not in queued_link_keys:
+          extent_offset = self._GetFirstExtentOffset(
+              data_stream_file_entry, data_stream_name)
+          extent_offsets.append((
+              extent_offset is None, extent_offset or 0, len(queued_results)))
+
+          if link_key:
+            queued_link_keys.add(link_key)
+
+      display_path = self._GetDisplayPath(
+          path_spec, path_segments, data_stream_name)
+      size = self._GetDataStreamSize(data_stream_file_entry, data_stream_name)
+      queued_results.append([
+          display_path, path_spec, data_stream_name, size, cache_key,
+          hash_values, None, link_key, None])
+
+    for _, _, index in sorted(extent_offsets):
+      queued_result = queued_results[index]
+      _, path_spec, data_stream_name, _, cache_key, _, _, link_key, _ = (
+          queued_result)
+
+      if pool:
+        work_item = (path_spec, data_stream_name)
+        queued_result[6] = pool.apply_async(
+            _CalculateHashWorkItem, (work_item, ))
+        continue
+
+      data_stream_file_entry = self._OpenFileEntry(path_spec)
+      if not data_stream_file_entry:
+        queued_result[8] = 'Unable to open file entry'
+        continue
+
+      hash_values, error = self._CalculateHashDataStream(
+          data_stream_file_entry, data_stream_name)
+
+      if link_key and hash_values:
+        self._hard_link_cache.SetHashValues(link_key, hash_values)
+
+      if cache_key and hash_values:
+        self._hash_cache.SetHashValues(cache_key, hash_values)
+
+      queued_result[5] = hash_values
+      queued_result[8] = error
+
+    for queued_result in queued_results:
+      yield self._GetQueuedResultRecord(tuple(queued_result))
+
+  def _CalculateHashesWithVolumeWorkers(self, base_path_specs):
+    """Calculates hashes of base path specifications in worker processes.
+
+    Every base path specification, such as a volume or snapshot, is processed
+    by a worker process with its own resolver context. The records of a worker
+    process are spooled to a temporary file, which is read in the order of
+    the base path specifications once the worker process has completed it.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): base path specifications.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    number_of_processes = min(
+        self._number_of_volume_workers, len(base_path_specs))
+
+    with tempfile.TemporaryDirectory() as spool_directory:
+      pool = multiprocessing.Pool(  # pylint: disable=consider-using-with
+          processes=number_of_processes,
+          initializer=_InitializeWorkerProcess,
+          initargs=(
+              self._hash_names, self._read_buffer_pool.buffer_size,
+              self._GetWorkerMaximumReadBufferMemory(number_of_processes),
+              self._extent_order, self._file_entry_filter,
+              self._hard_link_cache_size, self._skip_hashing_patterns))
+
+      try:
+        queued_results = []
+        for index, base_path_spec in enumerate(base_path_specs):
+          spool_path = os.path.join(
+              spool_directory, '{0:d}.spool'.format(index))
+          result = pool.apply_async(
+              _CalculateHashesBasePathSpec, ((base_path_spec, spool_path), ))
+          queued_results.append((spool_path, result))
+
+        for spool_path, result in queued_results:
+          with self._profiler.Time('worker_wait'):
+            counters = result.get()
+
+          for counter_name, value in counters.items():
+            self._profiler.IncrementCounter(counter_name, value)
+
+          spool_reader = SpoolOutputWriter(spool_path)
+          yield from spool_reader.ReadRecords()
+
+          os.remove(spool_path)
+
+      finally:
+        # Note that at this point all the results have been retrieved, unless
+        # an exception was raised or the iteration was stopped.
+        pool.terminate()
+        pool.join()
+
+  def _CalculatePartialHashDataStream(
+      self, file_entry, data_stream_name, size):
+    """Calculates a partial hash over the first and last block of the data.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+      size (int): size of the data stream.
+
+    Returns:
+      str: partial hash or None if the data could not be read.
+    """
+    try:
+      with self._profiler.Time('partial_hash'):
+        file_object = file_entry.GetFileObject(
+            data_stream_name=data_stream_name)
+        if not file_object:
+          return None
+
+        hash_context = hashlib.sha256()
+        hash_context.update(file_object.read(self._PARTIAL_HASH_BLOCK_SIZE))
+
+        file_object.seek(size - self._PARTIAL_HASH_BLOCK_SIZE, os.SEEK_SET)
+        hash_context.update(file_object.read(self._PARTIAL_HASH_BLOCK_SIZE))
+
+    except IOError as exception:
+      path_specification_string = helpers.GetPathSpecificationString(
+          file_entry.path_spec)
+      logging.warning((
+          'Unable to read from path specification:\n{0:s}'
+          'with error: {1!s}').format(path_specification_string, exception))
+      return None
+
+    return hash_context.hexdigest()
+
+  def _FlushCheckpoint(self, output_writer):
+    """Flushes the output and then the checkpoint journal.
+
+    The output is flushed before the journal, so that the journal does not
+    record data streams of which the output was not written. The offset of
+    the end of the output is recorded in the journal, so that output that is
+    written after the last flush of the journal can be removed on resume.
+
+    Args:
+      output_writer (OutputWriter): output writer.
+    """
+    with self._profiler.Time('output'):
+      output_writer.Flush()
+
+    self._checkpoint_journal.Flush(output_offset=output_writer.GetOffset())
+
+  def _GetCachedHashValues(self, file_entry, data_stream_name):
+    """Retrieves digest hashes of a data stream from the hash cache.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      tuple[tuple[object, ...], dict[str, str]]: key of the data stream in
+          the hash cache or None if the data stream cannot be cached and
+          digest hashes per hash name or None if not cached.
+    """
+    if not self._hash_cache:
+      return None, None
+
+    cache_key = self._hash_cache.GetCacheKey(file_entry, data_stream_name)
+    if not cache_key:
+      return None, None
+
+    hash_values = self._hash_cache.GetHashValues(cache_key, self._hash_names)
+    return cache_key, hash_values
+
+  def _GetDataStreams(self, file_entry, parent_path_segments):
+    """Retrieves the data streams starting with the file entry.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      parent_path_segments (str): path segments of the full path of the parent
+          file entry.
+
+    Yields:
+      tuple[dfvfs.FileEntry, list[str], str]: file entry, path segments of
+          the full path of the file entry and name of the data stream. Note
+          that the list of path segments is shared between the yielded values.
+    """
+    for sub_file_entry, path_segments in helpers.IterateFileEntries(
+        file_entry, file_entry_filter=self._file_entry_filter,
+        parent_path_segments=parent_path_segments, profiler=self._profiler):
+      self._profiler.IncrementCounter('file_entries')
+
+      for data_stream in sub_file_entry.data_streams:
+        self._profiler.IncrementCounter('data_streams')
+
+        if not self._checkpoint_journal or (
+            not self._checkpoint_journal.HasEntry(
+                sub_file_entry.path_spec, data_stream.name)):
+          yield sub_file_entry, path_segments, data_stream.name
+
+  def _GetDataStreamSize(self, file_entry, data_stream_name):
+    """Retrieves the size of a data stream.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      int: size of the data stream or None if not available.
+    """
+    if file_entry.IsDevice() or file_entry.IsPipe() or file_entry.IsSocket():
+      return None
+
+    if not data_stream_name:
+      return file_entry.size
+
+    try:
+      with self._profiler.Time('open'):
+        file_object = file_entry.GetFileObject(
+            data_stream_name=data_stream_name)
+    except IOError:
+      return None
+
+    if not file_object:
+      return None
+
+    return file_object.get_size()
+
+  def _GetDisplayPath(self, path_spec, path_segments, data_stream_name):
+    """Retrieves a path to display.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+      path_segments (list[str]): path segments of the full path of the file
+          entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      str: path to display.
+    """
+    return self._display_path_builder.GetDisplayPath(
+        path_spec, path_segments, data_stream_name=data_stream_name)
+
+  def _GetDuplicateCandidates(self, candidates, keys):
+    """Retrieves the candidates of which the key is not unique.
+
+    Args:
+      candidates (list[object]): candidates.
+      keys (list[object]): key per candidate, where None represents a key
+          that cannot be compared.
+
+    Returns:
+      list[object]: candidates of which the key is shared with at least
+          one other candidate, in their original order.
+    """
+    key_counts = collections.Counter(keys)
+    return [
+        candidate for candidate, key in zip(candidates, keys)
+        if key is not None and key_counts[key] > 1]
+
+  def _GetFirstExtentOffset(self, file_entry, data_stream_name):
+    """Retrieves the offset of the first extent of a data stream.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      int: offset of the first extent that contains data, relative to the
+          start of the underlying storage, or None if not available.
+    """
+    get_extents = getattr(file_entry, 'GetExtents', None)
+    if not get_extents:
+      return None
+
+    try:
+      extents = get_extents(data_stream_name=data_stream_name)
+    except (IOError, NotImplementedError, dfvfs_errors.BackEndError):
+      return None
+
+    for extent in extents or []:
+      if extent.extent_type != self._EXTENT_TYPE_SPARSE:
+        return extent.offset
+
+    return None
+
+  def _GetHardLinkHashValues(self, file_entry, data_stream_name):
+    """Retrieves digest hashes of a data stream from the hard link cache.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      tuple[tuple[object, ...], dict[str, str]]: key of the data stream in
+          the hard link cache or None if the data stream does not have
+          multiple links and digest hashes per hash name or None if not
+          cached.
+    """
+    if not self._hard_link_cache:
+      return None, None
+
+    link_key = self._hard_link_cache.GetCacheKey(file_entry, data_stream_name)
+    if not link_key:
+      return None, None
+
+    hash_values = self._hard_link_cache.GetHashValues(link_key)
+    if hash_values:
+      self._profiler.IncrementCounter('hard_links')
+
+    return link_key, hash_values
+
+  def _GetKnownHashesTag(self, hash_values):
+    """Determines the tag of a data stream based on the known hashes.
+
+    Args:
+      hash_values (dict[str, str]): digest hashes per hash name.
+
+    Returns:
+      tuple[str, bool]: tag of the data stream or None if its digest is not
+          known and True if the data stream should be suppressed.
+    """
+    for known_hashes_index, tag, suppress in self._known_hashes:
+      hash_value = hash_values.get(known_hashes_index.hash_name, None)
+      if not hash_value:
+        continue
+
+      try:
+        digest = bytes.fromhex(hash_value)
+      except ValueError:
+        continue
+
+      if known_hashes_index.Contains(digest):
+        self._profiler.IncrementCounter(tag)
+        return tag, suppress
+
+    return None, False
+
+  def _GetQueuedResultRecord(self, queued_result):
+    """Retrieves the record of a queued result of a worker process.
+
+    A data stream with multiple links that was not hashed, since another
+    link was queued before, uses the digest hashes of that link. Since
+    results are retrieved in order, these have been stored in the hard link
+    cache, unless they were evicted, in which case the data stream is hashed
+    in the current process.
+
+    Args:
+      queued_result (tuple[str, dfvfs.PathSpec, str, int,
+          tuple[object, ...], dict[str, str], AsyncResult,
+          tuple[object, ...], str]): display path, path specification of the
+          file entry, name of the data stream, size of the data stream, key
+          of the data stream in the hash cache or None, cached digest hashes
+          or None, asynchronous result of the worker process or None if
+          the data stream was not hashed by a worker process, key of the data
+          stream in the hard link cache or None and description of the error
+          that prevented the data stream from being hashed or None.
+
+    Returns:
+      FileHashRecord: message digest hashes of the data stream.
+    """
+    (display_path, path_spec, data_stream_name, size, cache_key, hash_values,
+     result, link_key, error) = queued_result
+
+    if result:
+      with self._profiler.Time('worker_wait'):
+        hash_values, error = result.get()
+
+      if hash_values and size:
+        # The data is read by the worker process, hence the bytes read are
+        # counted when the result is retrieved.
+        self._profiler.IncrementCounter('bytes_read', size)
+
+      if link_key and hash_values:
+        self._hard_link_cache.SetHashValues(link_key, hash_values)
+
+      if cache_key and hash_values:
+        self._hash_cache.SetHashValues(cache_key, hash_values)
+
+    elif link_key and not hash_values:
+      hash_values = self._hard_link_cache.GetHashValues(link_key)
+      if hash_values:
+        self._profiler.IncrementCounter('hard_links')
+
+      else:
+        file_entry = self._OpenFileEntry(path_spec)
+        if file_entry:
+          hash_values, error = self._CalculateHashDataStream(
+              file_entry, data_stream_name)
+        else:
+          error = 'Unable to open file entry'
+
+      if cache_key and hash_values:
+        self._hash_cache.SetHashValues(cache_key, hash_values)
+
+    return FileHashRecord(
+        display_path, hash_values, data_stream_name=data_stream_name,
+        error=error, path_spec=path_spec, size=size)
+
+  def _GetSparseRanges(self, file_entry, data_stream_name, size):
+    """Retrieves the sparse ranges of a data stream.
+
+    The sparse ranges are determined from the extents of the data stream,
+    if the back-end exposes them. The offsets of the extents in the data
+    stream are only known if the extents map the data 1 to 1, hence no
+    sparse ranges are returned if the data is stored compressed or if the
+    extents do not cover the data stream exactly, where only the last extent
+    can extend beyond the end of the data stream.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+      size (int): size of the data stream.
+
+    Returns:
+      list[tuple[int, int]]: offset and size of the sparse ranges, relative
+          to the start of the data stream, in ascending order.
+    """
+    get_extents = getattr(file_entry, 'GetExtents', None)
+    if not get_extents:
+      return []
+
+    try:
+      extents = get_extents(data_stream_name=data_stream_name)
+    except (IOError, NotImplementedError, dfvfs_errors.BackEndError):
+      return []
+
+    extents = list(extents or [])
+    if not extents or self._IsCompressed(file_entry):
+      return []
+
+    extent_sizes = [extent.size for extent in extents]
+    if min(extent_sizes) <= 0 or not (
+        sum(extent_sizes[:-1]) < size <= sum(extent_sizes)):
+      return []
+
+    sparse_ranges = []
+    offset = 0
+    for extent in extents:
+      range_size = min(extent.size, size - offset)
+      if extent.extent_type == self._EXTENT_TYPE_SPARSE and range_size > 0:
+        if sparse_ranges and sum(sparse_ranges[-1]) == offset:
+          range_offset, previous_range_size = sparse_ranges.pop()
+          sparse_ranges.append((range_offset, previous_range_size + range_size))
+        else:
+          sparse_ranges.append((offset, range_size))
+
+      offset += extent.size
+
+    return sparse_ranges
+
+  def _GetWorkerMaximumReadBufferMemory(self, number_of_processes):
+    """Determines the maximum read buffer memory of a worker process.
+
+    Args:
+      number_of_processes (int): number of worker processes.
+
+    The maximum read buffer memory is divided between the worker processes,
+    which reduces the read buffer size of a worker process if its share is
+    smaller than the read buffer size.
+
+    Returns:
+      int: maximum number of bytes of the read buffers of a worker process or
+          None for the default.
+    """
+    if not self._maximum_read_buffer_memory:
+      return None
+
+    return max(1, self._maximum_read_buffer_memory // number_of_processes)
+
+  def _IsCompressed(self, file_entry):
+    """Determines if the data of a file entry is stored compressed.
+
+    dfVFS does not expose if the data is stored compressed, hence the flags
+    of the back-ends that support compression are checked.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+
+    Returns:
+      bool: True if the data of the file entry is stored compressed.
+    """
+    type_indicator = getattr(file_entry, 'type_indicator', None)
+
+    if type_indicator == dfvfs_definitions.TYPE_INDICATOR_NTFS:
+      fsntfs_file_entry = getattr(file_entry, '_fsntfs_file_entry', None)
+      file_attribute_flags = getattr(
+          fsntfs_file_entry, 'file_attribute_flags', None) or 0
+      return bool(
+          file_attribute_flags & self._NTFS_FILE_ATTRIBUTE_FLAG_COMPRESSED)
+
+    if type_indicator == dfvfs_definitions.TYPE_INDICATOR_TSK:
+      tsk_file = getattr(file_entry, '_tsk_file', None)
+      tsk_meta = getattr(getattr(tsk_file, 'info', None), 'meta', None)
+      try:
+        meta_flags = int(getattr(tsk_meta, 'flags', 0))
+      except (TypeError, ValueError):
+        meta_flags = 0
+      return bool(meta_flags & self._TSK_FS_META_FLAG_COMP)
+
+    return False
+
+  def _IsIgnoredDataStream(self, path_segments, data_stream_name):
+    """Determines if a data stream should not be hashed.
+
+    Args:
+      path_segments (list[str]): path segments of the full path of the file
+          entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      bool: True if the data stream should not be hashed.
+    """
+    if not self._skip_hashing_trie:
+      return False
+
+    lookup_path = path_segments[1:]
+    if data_stream_name and lookup_path:
+      lookup_path = lookup_path[:-1] + [
+          ':'.join([lookup_path[-1], data_stream_name])]
+
+    return self._skip_hashing_trie.Matches(lookup_path)
+
+  def _OpenFileEntry(self, path_spec):
+    """Opens a file entry.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+
+    Returns:
+      dfvfs.FileEntry: file entry or None if the file entry cannot be opened.
+    """
+    try:
+      file_entry = resolver.Resolver.OpenFileEntry(
+          path_spec, resolver_context=self._resolver_context)
+    except (IOError, dfvfs_errors.AccessError,
+            dfvfs_errors.BackEndError) as exception:
+      path_specification_string = helpers.GetPathSpecificationString(
+          path_spec)
+      logging.warning((
+          'Unable to open path specification:\n{0:s}'
+          'with error: {1!s}').format(path_specification_string, exception))
+      return None
+
+    if not file_entry:
+      path_specification_string = helpers.GetPathSpecificationString(
+          path_spec)
+      logging.warning('Unable to open path specification:\n{0:s}'.format(
+          path_specification_string))
+
+    return file_entry
+
+  def _ReadData(self, file_object):
+    """Reads data from a file object into a read buffer of the pool.
+
+    The data is read directly into a reusable read buffer if the file object
+    supports readinto(), otherwise the read buffer only reserves the memory
+    of the data that is read. Note that the file objects of dfVFS do not
+    support readinto(), hence their data is read into a new bytes object.
+
+    A file object can return less data than requested before the end of the
+    data, for example SparseFileObject at the boundary of a sparse range,
+    hence reading continues until the read buffer is filled or no more data
+    is returned.
+
+    Args:
+      file_object (dfvfs.FileIO): file-like object.
+
+    Returns:
+      tuple[bytearray, bytes|memoryview]: read buffer, which must be freed
+          when the data is no longer used, and the data, which is empty at
+          the end of the data.
+    """
+    readinto = getattr(file_object, 'readinto', None)
+    read_buffer = self._read_buffer_pool.Allocate(reuse=bool(readinto))
+
+    try:
+      with self._profiler.Time('read'):
+        buffer_size = self._read_buffer_pool.buffer_size
+        if readinto:
+          read_view = memoryview(read_buffer)
+          read_count = 0
+          while read_count < buffer_size:
+            count = readinto(read_view[read_count:])
+            if not count:
+              break
+            read_count += count
+
+          data = read_view[:read_count]
+        else:
+          data = file_object.read(buffer_size)
+          if data and len(data) < buffer_size:
+            data_segments = [data]
+            read_count = len(data)
+            while read_count < buffer_size:
+              data = file_object.read(buffer_size - read_count)
+              if not data:
+                break
+              data_segments.append(data)
+              read_count += len(data)
+
+            data = b''.join(data_segments)
+
+    except Exception:
+      self._read_buffer_pool.Free(read_buffer)
+      raise
+
+    return read_buffer, data
+
+  def _UpdateHashContexts(self, hash_contexts, data_queue, exceptions):
+    """Updates hash contexts with the data from a queue.
+
+    The read buffers are freed even if updating the hash contexts fails, so
+    that the thread that reads does not block while allocating a read buffer.
+    After a failure the remaining data is not hashed.
+
+    Args:
+      hash_contexts (list[hashlib.hash]): hash contexts.
+      data_queue (queue.Queue): queue that contains the read buffers and
+          data to hash, where None represents the end of the data.
+      exceptions (list[Exception]): exceptions raised while updating the hash
+          contexts, to which the exception of a failure is appended.
+    """
+    queued_data = data_queue.get()
+    while queued_data is not None:
+      read_buffer, data = queued_data
+      try:
+        if not exceptions:
+          with self._profiler.Time('hash'):
+            for hash_context in hash_contexts:
+              hash_context.update(data)
+
+      except Exception as exception:  # pylint: disable=broad-except
+        exceptions.append(exception)
+
+      finally:
+        self._read_buffer_pool.Free(read_buffer)
+
+      queued_data = data_queue.get()
+
+  def GetAllocatedSize(self, base_path_specs):
+    """Estimates the number of bytes allocated by the file systems.
+
+    Only the allocated size of the operating system file system is known,
+    which includes the data of files outside the base path specifications.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+
+    Returns:
+      int: estimated number of bytes allocated or None if not known.
+    """
+    if not hasattr(os, 'statvfs'):
+      return None
+
+    allocated_size = 0
+    for base_path_spec in base_path_specs:
+      if base_path_spec.type_indicator != dfvfs_definitions.TYPE_INDICATOR_OS:
+        return None
+
+      try:
+        stat_object = os.statvfs(base_path_spec.location)
+      except OSError:
+        return None
+
+      allocated_size += (
+          (stat_object.f_blocks - stat_object.f_bfree) * stat_object.f_frsize)
+
+    return allocated_size
+
+  def GetBasePathSpecs(self, source_path, options=None):
+    """Determines the base path specifications.
+
+    The time spent scanning the source for volumes and file systems is
+    recorded as the "volume_scan" stage. If a scan result cache is used,
+    cached base path specifications are used instead of scanning the source.
+    Base path specifications that were selected at a prompt are not cached,
+    since the selection is not part of the volume scanner options.
+
+    Args:
+      source_path (str): source path.
+      options (Optional[VolumeScannerOptions]): volume scanner options. If None
+          the default volume scanner options are used, which are defined in the
+          VolumeScannerOptions class.
+
+    Returns:
+      list[dfvfs.PathSpec]: path specifications.
+
+    Raises:
+      dfvfs.ScannerError: if the source path does not exists, or if the source
+          path is not a file or directory, or if the format of or within
+          the source file is not supported.
+    """
+    with self._profiler.Time('volume_scan'):
+      if self._scan_result_cache:
+        base_path_specs = self._scan_result_cache.GetBasePathSpecs(
+            source_path, options=options)
+        if base_path_specs:
+          return base_path_specs
+
+      prompt_tracking_mediator = None
+      if self._scan_result_cache and self._mediator:
+        prompt_tracking_mediator = helpers.PromptTrackingMediator(
+            self._mediator)
+        self._mediator = prompt_tracking_mediator
+
+      try:
+        base_path_specs = super(RecursiveHasher, self).GetBasePathSpecs(
+            source_path, options=options)
+
+      finally:
+        if prompt_tracking_mediator:
+          self._mediator = prompt_tracking_mediator.mediator
+
+      if self._scan_result_cache and not (
+          prompt_tracking_mediator and prompt_tracking_mediator.prompted):
+        self._scan_result_cache.SetBasePathSpecs(
+            source_path, base_path_specs, options=options)
+
+      return base_path_specs
+
+  def CalculateHashes(self, base_path_specs, output_writer):
+    """Recursive calculates hashes starting with the base path specification.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+      output_writer (StdoutWriter): output writer.
+    """
+    for record in self.IterateHashes(base_path_specs):
+      with self._profiler.Time('output'):
+        output_writer.WriteFileHash(
+            record.path, record.hash_values or self._unavailable_hash_values,
+            data_stream_name=record.data_stream_name,
+            path_spec=record.path_spec, size=record.size, tag=record.tag)
+
+      if self._checkpoint_journal:
+        # The data stream is only recorded once the output writer accepted
+        # its output.
+        self._checkpoint_journal.WriteEntry(
+            record.path_spec, record.data_stream_name, record.hash_values)
+
+        if self._checkpoint_journal.IsFlushRequired():
+          self._FlushCheckpoint(output_writer)
+
+    if self._checkpoint_journal:
+      self._FlushCheckpoint(output_writer)
+
+  def IterateHashes(self, base_path_specs):
+    """Recursively calculates hashes starting with the base path specification.
+
+    If the digest of a data stream is known, its record is tagged or not
+    yielded, depending on the known hashes. Data streams of which the record
+    is not yielded are recorded in the checkpoint journal, the consumer
+    should record the data streams of the yielded records after it has
+    written their output and flush the journal after the output was flushed.
+
+    Args:
+      base_path_specs (list[dfvfs.PathSpec]): source path specification.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    for record in self._CalculateHashes(base_path_specs):
+      suppress = False
+      if record.hash_values and self._known_hashes:
+        record.tag, suppress = self._GetKnownHashesTag(record.hash_values)
+
+      if not suppress:
+        yield record
+
+      elif self._checkpoint_journal:
+        self._checkpoint_journal.WriteEntry(
+            record.path_spec, record.data_stream_name, record.hash_values)
+
+
+class CheckpointJournal(object):
+  """Checkpoint journal of data streams that have been hashed.
+
+  The journal is a JSON Lines file where every line records the path
+  specification, the name of the data stream and the digest hashes of a data
+  stream that has been hashed. Entries are buffered in memory as data streams
+  are hashed and are only written to the journal file when the journal is
+  flushed, which is after the output of the data streams has been flushed.
+  Every flush ends with a checkpoint line that records the offset of the end
+  of the output, hence entries without a subsequent checkpoint line are
+  ignored and data streams hashed after the last flush are hashed again when
+  a run is restarted.
+  """
+
+  # Maximum number of entries that are buffered before the journal is
+  # flushed.
+  _MAXIMUM_NUMBER_OF_BUFFERED_ENTRIES = 1000
+
+  # Maximum number of seconds between flushes of the journal.
+  _MAXIMUM_FLUSH_INTERVAL = 10.0
+
+  def __init__(self, path):
+    """Initializes a checkpoint journal.
+
+    Args:
+      path (str): path of the journal file.
+    """
+    super(CheckpointJournal, self).__init__()
+    self._buffered_entries = []
+    self._entries = set()
+    self._file_object = None
+    self._last_flush_time = 0.0
+    self._output_offset = None
+    self._path = path
+
+  @property
+  def number_of_entries(self):
+    """int: number of data streams recorded in the journal."""
+    return len(self._entries)
+
+  @property
+  def output_offset(self):
+    """int: offset of the end of the output at the last checkpoint or None
+        if not available."""
+    return self._output_offset
+
+  def _ReadEntries(self):
+    """Reads the entries from an existing journal file.
+
+    Returns:
+      bool: True if the last line of the journal file is incomplete.
+    """
+    # Entries are only valid once they are followed by a checkpoint line,
+    # since the output of entries written after the last checkpoint line
+    # might not have been written.
+    entries = set()
+    line = '\n'
+    with open(self._path, 'r', encoding='utf-8') as file_object:
+      for line in file_object:
+        try:
+          json_dict = json.loads(line)
+          if 'checkpoint' in json_dict:
+            self._output_offset = json_dict['checkpoint']['output_offset']
+            self._entries.update(entries)
+            entries = set()
+            continue
+
+          path_spec_string = json_dict['path_spec']
+          data_stream_name = json_dict['data_stream']
+        except (KeyError, TypeError, ValueError):
+          # A journal of a run that was killed can end with a partial line.
+          continue
+
+        entries.add((path_spec_string, data_stream_name))
+
+    return not line.endswith('\n')
+
+  def Close(self):
+    """Closes the journal.
+
+    Entries that have not been flushed are discarded, since the output of
+    their data streams might not have been written.
+    """
+    self._buffered_entries = []
+    self._file_object.close()
+    self._file_object = None
+
+  def Flush(self, output_offset=None):
+    """Writes the buffered entries and a checkpoint line to the journal file.
+
+    Args:
+      output_offset (Optional[int]): offset of the end of the output, which
+          must include the output of all the recorded data streams, or None
+          if not available.
+    """
+    if self._buffered_entries:
+      self._buffered_entries.append({
+          'checkpoint': {'output_offset': output_offset}})
+
+      lines = [
+          '{0:s}\n'.format(json.dumps(json_dict))
+          for json_dict in self._buffered_entries]
+      self._file_object.write(''.join(lines))
+      self._file_object.flush()
+      os.fsync(self._file_object.fileno())
+
+      self._buffered_entries = []
+      self._output_offset = output_offset
+
+    self._last_flush_time = time.time()
+
+  def HasEntry(self, path_spec, data_stream_name):
+    """Determines if a data stream is recorded in the journal.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      bool: True if the data stream is recorded in the journal.
+    """
+    path_spec_string = helpers.GetPathSpecificationString(path_spec)
+    return (path_spec_string, data_stream_name) in self._entries
+
+  def IsFlushRequired(self):
+    """Determines if the journal should be flushed.
+
+    Returns:
+      bool: True if the journal should be flushed.
+    """
+    if not self._buffered_entries:
+      return False
+
+    return (
+        len(self._buffered_entries) >=
+        self._MAXIMUM_NUMBER_OF_BUFFERED_ENTRIES or
+        time.time() - self._last_flush_time >= self._MAXIMUM_FLUSH_INTERVAL)
+
+  def Open(self):
+    """Opens the journal.
+
+    Entries of an existing journal file are read and new entries are
+    appended to it.
+    """
+    self._buffered_entries = []
+    self._entries = set()
+    self._output_offset = None
+
+    has_incomplete_line = False
+    if os.path.exists(self._path):
+      has_incomplete_line = self._ReadEntries()
+
+    self._file_object = open(self._path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+    if has_incomplete_line:
+      self._file_object.write('\n')
+    self._last_flush_time = time.time()
+
+  def WriteEntry(self, path_spec, data_stream_name, hash_values):
+    """Records a data stream that has been hashed in the journal.
+
+    The entry is buffered until the journal is flushed.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+      data_stream_name (str): name of the data stream.
+      hash_values (dict[str, str]): digest hashes per hash name or None if
+          not available.
+    """
+    path_spec_string = helpers.GetPathSpecificationString(path_spec)
+
+    self._buffered_entries.append({
+        'data_stream': data_stream_name,
+        'hashes': hash_values,
+        'path_spec': path_spec_string})
+
+    self._entries.add((path_spec_string, data_stream_name))
+
+
+class HardLinkCache(object):
+  """Bounded cache of digest hashes of data streams with multiple links.
+
+  Hard links, such as the links of an ext inode or of a NTFS MFT entry, share
+  their data streams, hence a data stream only needs to be hashed once for
+  all its links. Data streams are identified by the file system, the inode
+  number, which includes the sequence number for NTFS, and the data stream
+  name. Only data streams of file entries that are known to have multiple
+  links are cached and the least recently used entries are evicted.
+  """
+
+  DEFAULT_MAXIMUM_NUMBER_OF_ENTRIES = 65536
+
+  def __init__(self, maximum_number_of_entries=None):
+    """Initializes a hard link cache.
+
+    Args:
+      maximum_number_of_entries (Optional[int]): maximum number of cached
+          data streams, where None represents the default.
+    """
+    super(HardLinkCache, self).__init__()
+    self._entries = collections.OrderedDict()
+    self._maximum_number_of_entries = (
+        maximum_number_of_entries or self.DEFAULT_MAXIMUM_NUMBER_OF_ENTRIES)
+
+  def GetCacheKey(self, file_entry, data_stream_name):
+    """Retrieves the key of a data stream in the cache.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      tuple[object, ...]: key of the data stream, which consists of the file
+          system, inode and data stream name, or None if the file entry does
+          not have multiple links.
+    """
+    stat_attribute = file_entry.GetStatAttribute()
+    if not stat_attribute or stat_attribute.inode_number is None:
+      return None
+
+    number_of_links = stat_attribute.number_of_links
+    if number_of_links is None or number_of_links < 2:
+      return None
+
+    path_spec = file_entry.path_spec
+    if path_spec.HasParent():
+      file_system = path_spec.parent.comparable
+    else:
+      # Inode numbers of the operating system are unique per device.
+      try:
+        file_system = os.stat(path_spec.location).st_dev
+      except (OSError, TypeError):
+        return None
+
+    return file_system, stat_attribute.inode_number, data_stream_name
+
+  def GetHashValues(self, cache_key):
+    """Retrieves the digest hashes of a data stream.
+
+    Args:
+      cache_key (tuple[object, ...]): key of the data stream.
+
+    Returns:
+      dict[str, str]: digest hashes per hash name or None if not cached.
+    """
+    hash_values = self._entries.get(cache_key, None)
+    if hash_values:
+      self._entries.move_to_end(cache_key)
+
+    return hash_values
+
+  def SetHashValues(self, cache_key, hash_values):
+    """Sets the digest hashes of a data stream.
+
+    Args:
+      cache_key (tuple[object, ...]): key of the data stream.
+      hash_values (dict[str, str]): digest hashes per hash name.
+    """
+    self._entries[cache_key] = hash_values
+    self._entries.move_to_end(cache_key)
+
+    if len(self._entries) > self._maximum_number_of_entries:
+      self._entries.popitem(last=False)
+
+
+class HashCache(object):
+  """SQLite cache of digest hashes of data streams.
+
+  The digest hashes are stored per source, location of the file entry and
+  name of the data stream, together with the inode, the size of the data
+  stream and the modification and change time of the file entry. Cached
+  digest hashes are only used when all of these values match, otherwise the
+  data stream is hashed again and its cache entry replaced. Digest hashes of
+  runs with different hash names are merged into the same cache entry.
+  """
+
+  # Maximum number of changes that are made before they are committed.
+  _MAXIMUM_NUMBER_OF_UNCOMMITTED_CHANGES = 1000
+
+  _CREATE_TABLE_QUERY = (
+      'CREATE TABLE IF NOT EXISTS hashes ('
+      'source TEXT NOT NULL, location TEXT NOT NULL, '
+      'data_stream TEXT NOT NULL, inode TEXT, size INTEGER, '
+      'modification_time TEXT, change_time TEXT, hashes TEXT NOT NULL, '
+      'PRIMARY KEY (source, location, data_stream))')
+
+  _INSERT_QUERY = (
+      'INSERT OR REPLACE INTO hashes (source, location, data_stream, inode, '
+      'size, modification_time, change_time, hashes) '
+      'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+  _SELECT_QUERY = (
+      'SELECT inode, size, modification_time, change_time, hashes '
+      'FROM hashes WHERE source = ? AND location = ? AND data_stream = ?')
+
+  def __init__(self, path):
+    """Initializes a hash cache.
+
+    Args:
+      path (str): path of the SQLite database file.
+    """
+    super(HashCache, self).__init__()
+    self._connection = None
+    self._number_of_uncommitted_changes = 0
+    self._path = path
+
+  def Close(self):
+    """Closes the hash cache."""
+    self._connection.commit()
+    self._connection.close()
+    self._connection = None
+
+  def GetCacheKey(self, file_entry, data_stream_name):
+    """Retrieves the key of a data stream in the cache.
+
+    Args:
+      file_entry (dfvfs.FileEntry): file entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      tuple[object, ...]: key of the data stream, which consists of the
+          source, location, data stream name, inode, size of the data stream,
+          modification and change time, or None if the data stream cannot be
+          cached.
+    """
+    modification_time = file_entry.modification_time
+    change_time = file_entry.change_time
+    if not modification_time and not change_time:
+      # Without timestamps changes to the data cannot be detected.
+      return None
+
+    path_spec = file_entry.path_spec
+
+    inode = None
+    stat_attribute = file_entry.GetStatAttribute()
+    if stat_attribute:
+      inode = stat_attribute.inode_number
+    if inode is None:
+      inode = getattr(path_spec, 'inode', None)
+
+    location = getattr(path_spec, 'location', None)
+    if location is None:
+      if inode is None:
+        return None
+      location = '#{0:d}'.format(inode)
+
+    source = ''
+    if path_spec.HasParent():
+      source = helpers.GetPathSpecificationString(path_spec.parent)
+
+    if modification_time:
+      modification_time = modification_time.CopyToDateTimeString()
+    if change_time:
+      change_time = change_time.CopyToDateTimeString()
+
+    if inode is not None:
+      inode = '{0:d}'.format(inode)
+
+    # The size of the file entry is that of the default data stream.
+    size = file_entry.size
+    if data_stream_name:
+      try:
+        file_object = file_entry.GetFileObject(
+            data_stream_name=data_stream_name)
+      except IOError:
+        file_object = None
+
+      if not file_object:
+        return None
+
+      size = file_object.get_size()
+
+    return (
+        source, location, data_stream_name, inode, size, modification_time,
+        change_time)
+
+  def GetHashValues(self, cache_key, hash_names):
+    """Retrieves cached digest hashes.
+
+    Args:
+      cache_key (tuple[object, ...]): key of the data stream.
+      hash_names (list[str]): names of the digest hashes.
+
+    Returns:
+      dict[str, str]: digest hashes per hash name or None if not cached, if
+          the metadata of the file entry changed or if not all of the digest
+          hashes are cached.
+    """
+    cursor = self._connection.execute(self._SELECT_QUERY, cache_key[:3])
+    row = cursor.fetchone()
+    if not row or tuple(row[:4]) != cache_key[3:]:
+      return None
+
+    cached_hash_values = json.loads(row[4])
+    if not all(hash_name in cached_hash_values for hash_name in hash_names):
+      return None
+
+    return {
+        hash_name: cached_hash_values[hash_name] for hash_name in hash_names}
+
+  def Open(self):
+    """Opens the hash cache.
+
+    Raises:
+      IOError: if the SQLite database file cannot be opened.
+      OSError: if the SQLite database file cannot be opened.
+    """
+    try:
+      self._connection = sqlite3.connect(self._path)
+      self._connection.execute('PRAGMA synchronous = NORMAL')
+      self._connection.execute(self._CREATE_TABLE_QUERY)
+      self._connection.commit()
+    except sqlite3.Error as exception:
+      raise IOError(exception)
+
+    self._number_of_uncommitted_changes = 0
+
+  def SetHashValues(self, cache_key, hash_values):
+    """Stores digest hashes in the cache.
+
+    Args:
+      cache_key (tuple[object, ...]): key of the data stream.
+      hash_values (dict[str, str]): digest hashes per hash name.
+    """
+    cursor = self._connection.execute(self._SELECT_QUERY, cache_key[:3])
+    row = cursor.fetchone()
+    if row and tuple(row[:4]) == cache_key[3:]:
+      # Retain the digest hashes cached by runs with other hash names.
+      cached_hash_values = json.loads(row[4])
+      cached_hash_values.update(hash_values)
+      hash_values = cached_hash_values
+
+    self._connection.execute(
+        self._INSERT_QUERY, cache_key + (json.dumps(hash_values), ))
+
+    self._number_of_uncommitted_changes += 1
+    if (self._number_of_uncommitted_changes >=
+        self._MAXIMUM_NUMBER_OF_UNCOMMITTED_CHANGES):
+      self._connection.commit()
+      self._number_of_uncommitted_changes = 0
+
+
+class SparseFileObject(object):
+  """File-like object that reads sparse ranges of a data stream as zeros.
+
+  The sparse ranges are not read from the underlying file-like object,
+  which prevents I/O through the back-end for data that is known to be zero.
+
+  Attributes:
+    number_of_sparse_bytes (int): number of bytes returned from sparse ranges.
+  """
+
+  # pylint: disable=invalid-name
+
+  def __init__(self, file_object, sparse_ranges, zero_data):
+    """Initializes a sparse file-like object.
+
+    Args:
+      file_object (dfvfs.FileIO): file-like object of the data stream.
+      sparse_ranges (list[tuple[int, int]]): offset and size of the sparse
+          ranges, in ascending order.
+      zero_data (bytes): zero bytes to return for sparse ranges, at least
+          the size of a read.
+    """
+    super(SparseFileObject, self).__init__()
+    self._current_offset = 0
+    self._file_object = file_object
+    self._size = file_object.get_size()
+    self._sparse_ranges = sparse_ranges
+    self._sparse_range_index = 0
+    self._zero_data = memoryview(zero_data)
+    self.number_of_sparse_bytes = 0
+
+  def get_size(self):
+    """Retrieves the size of the data stream.
+
+    Returns:
+      int: size of the data stream.
+    """
+    return self._size
+
+  def read(self, size):
+    """Reads a byte string from the current offset.
+
+    A read stops at the start or end of a sparse range, hence less data than
+    requested can be returned before the end of the data stream.
+
+    Args:
+      size (int): number of bytes to read.
+
+    Returns:
+      bytes|memoryview: data read or empty at the end of the data stream.
+    """
+    while self._sparse_range_index < len(self._sparse_ranges) and sum(
+        self._sparse_ranges[self._sparse_range_index]) <= self._current_offset:
+      self._sparse_range_index += 1
+
+    size = min(size, self._size - self._current_offset)
+    if size <= 0:
+      return b''
+
+    if self._sparse_range_index < len(self._sparse_ranges):
+      range_offset, range_size = self._sparse_ranges[self._sparse_range_index]
+
+      if range_offset <= self._current_offset:
+        size = min(
+            size, len(self._zero_data),
+            range_offset + range_size - self._current_offset)
+
+        self._current_offset += size
+        self.number_of_sparse_bytes += size
+        return self._zero_data[:size]
+
+      size = min(size, range_offset - self._current_offset)
+
+    self._file_object.seek(self._current_offset, os.SEEK_SET)
+    data = self._file_object.read(size)
+    self._current_offset += len(data)
+    return data
+
+
+class ReadBufferPool(object):
+  """Pool of reusable read buffers with a limit on the number of buffers.
+
+  Allocating a read buffer blocks while all the read buffers are in use,
+  which limits the memory used by the read buffers of concurrently hashed
+  data streams.
+
+  Read buffers are only reused for file objects that support readinto().
+  The file objects of dfVFS do not support readinto(), hence for these the
+  pool only limits the number of read buffers in use and every read still
+  allocates a new bytes object.
+  """
+
+  def __init__(self, buffer_size, maximum_number_of_buffers):
+    """Initializes a read buffer pool.
+
+    Args:
+      buffer_size (int): size of a read buffer.
+      maximum_number_of_buffers (int): maximum number of read buffers that
+          are in use at the same time.
+    """
+    super(ReadBufferPool, self).__init__()
+    self._condition = threading.Condition()
+    self._free_buffers = []
+    self._number_of_buffers_in_use = 0
+    self.buffer_size = buffer_size
+    self.maximum_number_of_buffers = max(1, maximum_number_of_buffers)
+
+  def Allocate(self, reuse=True):
+    """Allocates a read buffer.
+
+    Args:
+      reuse (Optional[bool]): True if a reusable read buffer should be
+          returned, False if only the memory of a read buffer should be
+          reserved, for data that is read into a new bytes object.
+
+    Returns:
+      bytearray: read buffer or None if not reused.
+    """
+    with self._condition:
+      while self._number_of_buffers_in_use >= self.maximum_number_of_buffers:
+        self._condition.wait()
+
+      self._number_of_buffers_in_use += 1
+
+      if not reuse:
+        return None
+
+      if self._free_buffers:
+        return self._free_buffers.pop()
+
+    return bytearray(self.buffer_size)
+
+  def Free(self, read_buffer):
+    """Frees a read buffer.
+
+    Args:
+      read_buffer (bytearray): read buffer or None if not reused.
+    """
+    with self._condition:
+      if read_buffer is not None:
+        self._free_buffers.append(read_buffer)
+
+      self._number_of_buffers_in_use -= 1
+      self._condition.notify()
+
+
+class ProgressReporter(object):
+  """Reports the progress of a run on a background thread.
+
+  The progress is derived from the counters of the stage profiler, hence
+  the hashing itself is not slowed down by reporting.
+  """
+
+  _MEBIBYTE = 1024 * 1024
+
+  def __init__(
+      self, profiler, interval=1.0, output=None, status_file=None,
+      total_size=None):
+    """Initializes a progress reporter.
+
+    Args:
+      profiler (helpers.StageProfiler): profiler of which the "file_entries"
+          and "bytes_read" counters are reported.
+      interval (Optional[float]): number of seconds between reports.
+      output (Optional[file]): file-like object to write human readable
+          progress to, where None represents no human readable progress.
+      status_file (Optional[str]): path of a file to write the progress to
+          as a JSON object, where None represents no status file.
+      total_size (Optional[int]): estimated total number of bytes to hash,
+          used to determine the estimated time remaining, where None
+          represents that the total is not known.
+    """
+    super(ProgressReporter, self).__init__()
+    self._interval = interval
+    self._last_bytes_read = 0
+    self._last_report_time = None
+    self._output = output
+    self._profiler = profiler
+    self._start_time = None
+    self._status_file = status_file
+    self._stop_event = threading.Event()
+    self._thread = None
+    self._total_size = total_size
+
+  def _GetStatus(self, status):
+    """Retrieves the current status.
+
+    Args:
+      status (str): status of the run, such as "running" or "completed".
+
+    Returns:
+      dict[str, object]: status values per name.
+    """
+    current_time = time.monotonic()
+    bytes_read = self._profiler.GetCounter('bytes_read')
+
+    elapsed_time = current_time - self._start_time
+    interval_time = current_time - self._last_report_time
+
+    bytes_per_second = 0.0
+    if interval_time > 0.0:
+      bytes_per_second = (bytes_read - self._last_bytes_read) / interval_time
+
+    remaining_time = None
+    if status == 'running' and self._total_size and bytes_read and (
+        bytes_read < self._total_size):
+      # The estimate is based on the average throughput of the run, which is
+      # more stable than the throughput of the last interval.
+      remaining_time = (
+          (self._total_size - bytes_read) * elapsed_time / bytes_read)
+
+    self._last_bytes_read = bytes_read
+    self._last_report_time = current_time
+
+    return {
+        'bytes_read': bytes_read,
+        'bytes_per_second': bytes_per_second,
+        'elapsed_time': elapsed_time,
+        'file_entries': self._profiler.GetCounter('file_entries'),
+        'remaining_time': remaining_time,
+        'status': status,
+        'total_size': self._total_size}
+
+  def _Report(self, status):
+    """Reports the current status.
+
+    Args:
+      status (str): status of the run, such as "running" or "completed".
+    """
+    status_values = self._GetStatus(status)
+
+    if self._output:
+      remaining_time = status_values['remaining_time']
+      if remaining_time is None:
+        remaining_time_string = 'N/A'
+      else:
+        remaining_time_string = '{0:d}s'.format(int(remaining_time))
+
+      self._output.write((
+          '{0:s}: {1:d} file entries, {2:.1f} MiB hashed, {3:.1f} MiB/s, '
+          'ETA: {4:s}\n').format(
+              status, status_values['file_entries'],
+              status_values['bytes_read'] / self._MEBIBYTE,
+              status_values['bytes_per_second'] / self._MEBIBYTE,
+              remaining_time_string))
+      self._output.flush()
+
+    if self._status_file:
+      self._WriteStatusFile(status_values)
+
+  def _ReportPeriodically(self):
+    """Reports the status periodically until stopped."""
+    while not self._stop_event.wait(self._interval):
+      self._Report('running')
+
+  def _WriteStatusFile(self, status_values):
+    """Writes the status file.
+
+    The status file is replaced atomically so that a reader never sees a
+    partially written file.
+
+    Args:
+      status_values (dict[str, object]): status values per name.
+    """
+    temporary_path = '{0:s}.tmp'.format(self._status_file)
+    try:
+      with open(temporary_path, 'w', encoding='utf-8') as file_object:
+        json.dump(status_values, file_object)
+
+      os.replace(temporary_path, self._status_file)
+
+    except (IOError, OSError) as exception:
+      logging.warning('Unable to write status file with error: {0!s}'.format(
+          exception))
+
+  def Start(self):
+    """Starts reporting."""
+    self._last_bytes_read = self._profiler.GetCounter('bytes_read')
+    self._start_time = time.monotonic()
+    self._last_report_time = self._start_time
+
+    self._stop_event.clear()
+    self._thread = threading.Thread(
+        target=self._ReportPeriodically, name='ProgressReporter', daemon=True)
+    self._thread.start()
+
+  def Stop(self, status='completed'):
+    """Stops reporting and reports the final status.
+
+    Args:
+      status (Optional[str]): final status of the run, such as "completed"
+          or "aborted".
+    """
+    self._stop_event.set()
+    self._thread.join()
+    self._thread = None
+
+    self._Report(status)
+
+
+class OutputWriter(object):
+  """Output writer interface."""
+
+  # Default maximum number of records that are buffered before they are
+  # written.
+  DEFAULT_BATCH_SIZE = 4096
+
+  # Maximum number of seconds between writes of the buffered records, where
+  # None represents that the records are only written when the batch size is
+  # reached or on flush.
+  _MAXIMUM_FLUSH_INTERVAL = 1.0
+
+  def __init__(self, batch_size=DEFAULT_BATCH_SIZE, encoding='utf-8'):
+    """Initializes an output writer.
+
+    Args:
+      batch_size (Optional[int]): maximum number of records that are buffered
+          before they are written.
+      encoding (Optional[str]): input encoding.
+    """
+    super(OutputWriter, self).__init__()
+    self._batch_size = batch_size
+    self._buffered_records = []
+    self._encoding = encoding
+    self._errors = 'strict'
+    self._last_flush_time = time.monotonic()
+
+  def _BufferRecord(self, record):
+    """Buffers a record of output.
+
+    The buffered records are written, as a single batch, when the batch size
+    is reached or when the flush interval has passed.
+
+    Args:
+      record (object): record of output, such as a line of text including
+          the end of line character.
+    """
+    self._buffered_records.append(record)
+
+    if len(self._buffered_records) >= self._batch_size or (
+        self._MAXIMUM_FLUSH_INTERVAL is not None and
+        time.monotonic() - self._last_flush_time >=
+        self._MAXIMUM_FLUSH_INTERVAL):
+      self.Flush()
+
+  def _EncodeString(self, string):
+    """Encodes the string.
+
+    Args:
+      string (str): string to encode.
+
+    Returns:
+      bytes: encoded string.
+    """
+    try:
+      # Note that encode() will first convert string into a Unicode string
+      # if necessary.
+      encoded_string = string.encode(self._encoding, errors=self._errors)
+    except UnicodeEncodeError:
+      if self._errors == 'strict':
+        logging.error(
+            'Unable to properly write output due to encoding error. '
+            'Switching to error tolerant encoding which can result in '
+            'non Basic Latin (C0) characters to be replaced with "?" or '
+            '"\\ufffd".')
+        self._errors = 'replace'
+
+      encoded_string = string.encode(self._encoding, errors=self._errors)
+
+    return encoded_string
+
+  def _GetPathSpecificationString(self, path_spec):
+    """Retrieves a printable string representation of a path specification.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification or None.
+
+    Returns:
+      str: printable string representation of the path specification or None
+          if not available.
+    """
+    if not path_spec:
+      return None
+
+    return helpers.GetPathSpecificationString(path_spec)
+
+  @abc.abstractmethod
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+
+  @abc.abstractmethod
+  def Close(self):
+    """Closes the output writer object."""
+
+  def Flush(self):
+    """Flushes buffered output."""
+    if self._buffered_records:
+      self._WriteRecords(self._buffered_records)
+      self._buffered_records = []
+
+    self._last_flush_time = time.monotonic()
+
+  def GetOffset(self):  # pylint: disable=redundant-returns-doc
+    """Retrieves the offset of the end of the flushed output.
+
+    Returns:
+      int: offset of the end of the flushed output or None if not available.
+    """
+    return None
+
+  @abc.abstractmethod
+  def Open(self):
+    """Opens the output writer object."""
+
+  @abc.abstractmethod
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes.
+
+    Args:
+      path (str): path of the file.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
+    """
+
+
+class FileOutputWriter(OutputWriter):
+  """Output writer that writes to a file."""
+
+  def __init__(
+      self, path, append=False, batch_size=OutputWriter.DEFAULT_BATCH_SIZE,
+      encoding='utf-8'):
+    """Initializes an output writer.
+
+    Args:
+      path (str): name of the path.
+      append (Optional[bool]): True if the output should be appended to
+          an existing file.
+      batch_size (Optional[int]): maximum number of lines that are buffered
+          before they are written.
+      encoding (Optional[str]): input encoding.
+    """
+    super(FileOutputWriter, self).__init__(
+        batch_size=batch_size, encoding=encoding)
+    self._append = append
+    self._file_object = None
+    self._path = path
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[str]): buffered lines of output.
+    """
+    encoded_string = self._EncodeString(''.join(records))
+    self._file_object.write(encoded_string)
+
+  def Close(self):
+    """Closes the output writer object."""
+    self.Flush()
+    self._file_object.close()
+
+  def Flush(self):
+    """Flushes buffered output."""
+    super(FileOutputWriter, self).Flush()
+    self._file_object.flush()
+
+  def GetOffset(self):
+    """Retrieves the offset of the end of the flushed output.
+
+    Returns:
+      int: offset of the end of the flushed output or None if not available.
+    """
+    return self._file_object.tell()
+
+  def Open(self):
+    """Opens the output writer object."""
+    # Using binary mode to make sure to write Unix end of lines, so we can
+    # compare output files cross-platform.
+    mode = 'ab' if self._append else 'wb'
+    self._file_object = open(self._path, mode)  # pylint: disable=consider-using-with
+
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to file.
+
+    Args:
+      path (str): path of the file.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
+    """
+    hash_values_string = '\t'.join(hash_values.values())
+    if tag:
+      self._BufferRecord('{0:s}\t{1:s}\t{2:s}\n'.format(
+          hash_values_string, path, tag))
+    else:
+      self._BufferRecord('{0:s}\t{1:s}\n'.format(hash_values_string, path))
+
+
+class CSVOutputWriter(FileOutputWriter):
+  """Output writer that writes comma separated values (CSV) to a file."""
 
-  # Class constant that defines the default read buffer size.
-  _READ_BUFFER_SIZE = 16 * 1024 * 1024
+  _COLUMN_NAMES = ['path', 'data_stream', 'path_spec', 'size']
 
-  # List of tuple that contain:
-  #    tuple: full path represented as a tuple of path segments
-  #    str: data stream name
-  _PATHS_TO_IGNORE = frozenset([
-      (('$BadClus', ), '$Bad')])
+  def __init__(
+      self, path, hash_names, append=False,
+      batch_size=OutputWriter.DEFAULT_BATCH_SIZE, encoding='utf-8',
+      include_tag=False):
+    """Initializes an output writer.
 
-  _NON_PRINTABLE_CHARACTERS = list(range(0, 0x20)) + list(range(0x7f, 0xa0))
-  _ESCAPE_CHARACTERS = str.maketrans({
-      value: '\\x{0:02x}'.format(value)
-      for value in _NON_PRINTABLE_CHARACTERS})
+    Args:
+      path (str): name of the path.
+      hash_names (list[str]): names of the message digest hashes, in the
+          order in which their columns are written.
+      append (Optional[bool]): True if the output should be appended to
+          an existing file.
+      batch_size (Optional[int]): maximum number of rows that are buffered
+          before they are written.
+      encoding (Optional[str]): input encoding.
+      include_tag (Optional[bool]): True if a tag column should be written
+          after the hash columns.
+    """
+    super(CSVOutputWriter, self).__init__(
+        path, append=append, batch_size=batch_size, encoding=encoding)
+    self._csv_buffer = io.StringIO()
+    self._csv_writer = csv.writer(self._csv_buffer, lineterminator='\n')
+    self._hash_names = hash_names
+    self._include_tag = include_tag
 
-  def _CalculateHashDataStream(self, file_entry, data_stream_name):
-    """Calculates a message digest hash of the data of the file entry.
+  def _FormatRow(self, values):
+    """Formats a row of comma separated values.
 
     Args:
-      file_entry (dfvfs.FileEntry): file entry.
-      data_stream_name (str): name of the data stream.
+      values (list[object]): values of the row.
 
     Returns:
-      str: digest hash or None.
+      str: row of comma separated values, including the end of line
+          character.
     """
-    if file_entry.IsDevice() or file_entry.IsPipe() or file_entry.IsSocket():
-      # Ignore devices, FIFOs/pipes and sockets.
-      return None
+    self._csv_writer.writerow(values)
+    row = self._csv_buffer.getvalue()
 
-    hash_context = hashlib.sha256()
+    self._csv_buffer.seek(0, os.SEEK_SET)
+    self._csv_buffer.truncate()
 
-    try:
-      file_object = file_entry.GetFileObject(data_stream_name=data_stream_name)
-    except IOError as exception:
-      path_specification_string = helpers.GetPathSpecificationString(
-          file_entry.path_spec)
-      logging.warning((
-          'Unable to open path specification:\n{0:s}'
-          'with error: {1!s}').format(path_specification_string, exception))
-      return None
+    return row
 
-    if not file_object:
-      return None
+  def Open(self):
+    """Opens the output writer object."""
+    super(CSVOutputWriter, self).Open()
 
-    try:
-      data = file_object.read(self._READ_BUFFER_SIZE)
-      while data:
-        hash_context.update(data)
-        data = file_object.read(self._READ_BUFFER_SIZE)
-    except IOError as exception:
-      path_specification_string = helpers.GetPathSpecificationString(
-          file_entry.path_spec)
-      logging.warning((
-          'Unable to read from path specification:\n{0:s}'
-          'with error: {1!s}').format(path_specification_string, exception))
-      return None
+    if self._file_object.tell() == 0:
+      column_names = self._COLUMN_NAMES + self._hash_names
+      if self._include_tag:
+        column_names.append('tag')
 
-    return hash_context.hexdigest()
+      self._BufferRecord(self._FormatRow(column_names))
 
-  def _CalculateHashesFileEntry(
-      self, file_system, file_entry, parent_path_segments, output_writer):
-    """Recursive calculates hashes starting with the file entry.
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to file.
 
     Args:
-      file_system (dfvfs.FileSystem): file system.
-      file_entry (dfvfs.FileEntry): file entry.
-      parent_path_segments (str): path segments of the full path of the parent
-          file entry.
-      output_writer (StdoutWriter): output writer.
+      path (str): path of the file.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
-    path_segments = parent_path_segments + [file_entry.name]
-    lookup_path = tuple(path_segments[1:])
+    values = [
+        path, data_stream_name, self._GetPathSpecificationString(path_spec),
+        size]
+    values.extend([
+        hash_values.get(hash_name, None) for hash_name in self._hash_names])
+    if self._include_tag:
+      values.append(tag)
 
-    for data_stream in file_entry.data_streams:
-      hash_value = None
-      if (lookup_path, data_stream.name) not in self._PATHS_TO_IGNORE:
-        hash_value = self._CalculateHashDataStream(file_entry, data_stream.name)
+    self._BufferRecord(self._FormatRow(values))
 
-      display_path = self._GetDisplayPath(
-          file_entry.path_spec, path_segments, data_stream.name)
-      output_writer.WriteFileHash(display_path, hash_value or 'N/A')
-
-    try:
-      for sub_file_entry in file_entry.sub_file_entries:
-        self._CalculateHashesFileEntry(
-            file_system, sub_file_entry, path_segments, output_writer)
 
-    except (IOError, dfvfs_errors.AccessError,
-            dfvfs_errors.BackEndError) as exception:
-      path_specification_string = helpers.GetPathSpecificationString(
-          file_entry.path_spec)
-      logging.warning((
-          'Unable to open path specification:\n{0:s}'
-          'with error: {1!s}').format(path_specification_string, exception))
+class JSONLinesOutputWriter(FileOutputWriter):
+  """Output writer that writes JSON Lines to a file."""
 
-  def _GetDisplayPath(self, path_spec, path_segments, data_stream_name):
-    """Retrieves a path to display.
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to file.
 
     Args:
-      path_spec (dfvfs.PathSpec): path specification of the file entry.
-      path_segments (list[str]): path segments of the full path of the file
-          entry.
-      data_stream_name (str): name of the data stream.
-
-    Returns:
-      str: path to display.
+      path (str): path of the file.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
-    display_path = ''
+    json_dict = {
+        'path': path,
+        'data_stream': data_stream_name,
+        'path_spec': self._GetPathSpecificationString(path_spec),
+        'size': size}
+    json_dict.update(hash_values)
 
-    if path_spec.HasParent():
-      parent_path_spec = path_spec.parent
-      if parent_path_spec and parent_path_spec.type_indicator in (
-          dfvfs_definitions.PARTITION_TABLE_TYPE_INDICATORS):
-        display_path = ''.join([display_path, parent_path_spec.location])
-
-    path_segments = [
-        segment.translate(self._ESCAPE_CHARACTERS) for segment in path_segments]
-    display_path = ''.join([display_path, '/'.join(path_segments)])
-
-    if data_stream_name:
-      data_stream_name = data_stream_name.translate(self._ESCAPE_CHARACTERS)
-      display_path = ':'.join([display_path, data_stream_name])
+    if tag:
+      json_dict['tag'] = tag
 
-    return display_path or '/'
+    self._BufferRecord('{0:s}\n'.format(json.dumps(json_dict)))
 
-  def CalculateHashes(self, base_path_specs, output_writer):
-    """Recursive calculates hashes starting with the base path specification.
-
-    Args:
-      base_path_specs (list[dfvfs.PathSpec]): source path specification.
-      output_writer (StdoutWriter): output writer.
-    """
-    for base_path_spec in base_path_specs:
-      file_system = resolver.Resolver.OpenFileSystem(base_path_spec)
-      file_entry = resolver.Resolver.OpenFileEntry(base_path_spec)
-      if file_entry is None:
-        path_specification_string = helpers.GetPathSpecificationString(
-            base_path_spec)
-        logging.warning('Unable to open base path specification:\n{0:s}'.format(
-            path_specification_string))
-        continue
 
-      self._CalculateHashesFileEntry(file_system, file_entry, [], output_writer)
+class ParquetOutputWriter(OutputWriter):
+  """Output writer that writes an Apache Parquet file.
 
+  Every batch of buffered rows is written as a separate row group.
+  """
 
-class OutputWriter(object):
-  """Output writer interface."""
+  # Rows are only written when the batch size is reached, to prevent
+  # small row groups.
+  _MAXIMUM_FLUSH_INTERVAL = None
 
-  def __init__(self, encoding='utf-8'):
+  def __init__(
+      self, path, hash_names, batch_size=OutputWriter.DEFAULT_BATCH_SIZE,
+      include_tag=False):
     """Initializes an output writer.
 
     Args:
-      encoding (Optional[str]): input encoding.
+      path (str): name of the path.
+      hash_names (list[str]): names of the message digest hashes, in the
+          order in which their columns are written.
+      batch_size (Optional[int]): maximum number of rows that are buffered
+          before they are written as a row group.
+      include_tag (Optional[bool]): True if a tag column should be written
+          after the hash columns.
     """
-    super(OutputWriter, self).__init__()
-    self._encoding = encoding
-    self._errors = 'strict'
+    super(ParquetOutputWriter, self).__init__(batch_size=batch_size)
+    self._hash_names = hash_names
+    self._include_tag = include_tag
+    self._parquet_writer = None
+    self._path = path
+    self._schema = None
 
-  def _EncodeString(self, string):
-    """Encodes the string.
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
 
     Args:
-      string (str): string to encode.
-
-    Returns:
-      bytes: encoded string.
+      records (list[tuple[object, ...]]): buffered rows of output.
     """
-    try:
-      # Note that encode() will first convert string into a Unicode string
-      # if necessary.
-      encoded_string = string.encode(self._encoding, errors=self._errors)
-    except UnicodeEncodeError:
-      if self._errors == 'strict':
-        logging.error(
-            'Unable to properly write output due to encoding error. '
-            'Switching to error tolerant encoding which can result in '
-            'non Basic Latin (C0) characters to be replaced with "?" or '
-            '"\\ufffd".')
-        self._errors = 'replace'
-
-      encoded_string = string.encode(self._encoding, errors=self._errors)
-
-    return encoded_string
+    arrays = [
+        pyarrow.array(values, type=field.type)
+        for values, field in zip(zip(*records), self._schema)]
+    table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+    self._parquet_writer.write_table(table)
 
-  @abc.abstractmethod
   def Close(self):
     """Closes the output writer object."""
+    self.Flush()
+    self._parquet_writer.close()
 
-  @abc.abstractmethod
   def Open(self):
-    """Opens the output writer object."""
+    """Opens the output writer object.
 
-  @abc.abstractmethod
-  def WriteFileHash(self, path, hash_value):
-    """Writes the file path and hash.
+    Raises:
+      IOError: if pyarrow is not available or the file cannot be opened.
+      OSError: if the file cannot be opened.
+    """
+    if not pyarrow:
+      raise IOError('Missing pyarrow, which is required for Parquet output.')
+
+    fields = [
+        ('path', pyarrow.string()),
+        ('data_stream', pyarrow.string()),
+        ('path_spec', pyarrow.string()),
+        ('size', pyarrow.uint64())]
+    fields.extend([
+        (hash_name, pyarrow.string()) for hash_name in self._hash_names])
+    if self._include_tag:
+      fields.append(('tag', pyarrow.string()))
+
+    self._schema = pyarrow.schema(fields)
+    self._parquet_writer = parquet.ParquetWriter(self._path, self._schema)
+
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to file.
 
     Args:
       path (str): path of the file.
-      hash_value (str): message digest hash calculated over the file data.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
+    values = [
+        path, data_stream_name, self._GetPathSpecificationString(path_spec),
+        size]
+    values.extend([
+        hash_values.get(hash_name, None) for hash_name in self._hash_names])
+    if self._include_tag:
+      values.append(tag)
 
+    self._BufferRecord(tuple(values))
 
-class FileOutputWriter(OutputWriter):
-  """Output writer that writes to a file."""
 
-  def __init__(self, path, encoding='utf-8'):
+class SpoolOutputWriter(OutputWriter):
+  """Output writer that spools the output of a worker process to a file.
+
+  Every batch of buffered records is pickled separately, so that the spooled
+  output can be read back without reading the entire file into memory.
+  """
+
+  # Records are only written when the batch size is reached or on flush,
+  # since the spooled output is only read back after the file is closed.
+  _MAXIMUM_FLUSH_INTERVAL = None
+
+  def __init__(self, path, batch_size=OutputWriter.DEFAULT_BATCH_SIZE):
     """Initializes an output writer.
 
     Args:
       path (str): name of the path.
-      encoding (Optional[str]): input encoding.
+      batch_size (Optional[int]): maximum number of records that are buffered
+          before they are written.
     """
-    super(FileOutputWriter, self).__init__(encoding=encoding)
+    super(SpoolOutputWriter, self).__init__(batch_size=batch_size)
     self._file_object = None
     self._path = path
 
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[FileHashRecord]): buffered records of output.
+    """
+    pickle.dump(records, self._file_object, protocol=pickle.HIGHEST_PROTOCOL)
+
   def Close(self):
     """Closes the output writer object."""
+    self.Flush()
     self._file_object.close()
+    self._file_object = None
 
   def Open(self):
     """Opens the output writer object."""
-    # Using binary mode to make sure to write Unix end of lines, so we can
-    # compare output files cross-platform.
     self._file_object = open(self._path, 'wb')  # pylint: disable=consider-using-with
 
-  def WriteFileHash(self, path, hash_value):
-    """Writes the file path and hash to file.
+  def ReadRecords(self):
+    """Reads the spooled records.
+
+    Yields:
+      FileHashRecord: message digest hashes of a data stream.
+    """
+    with open(self._path, 'rb') as file_object:
+      while True:
+        try:
+          records = pickle.load(file_object)
+        except EOFError:
+          break
+
+        yield from records
+
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to the spool file.
 
     Args:
       path (str): path of the file.
-      hash_value (str): message digest hash calculated over the file data.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
-    string = '{0:s}\t{1:s}\n'.format(hash_value, path)
+    self.WriteRecord(FileHashRecord(
+        path, hash_values, data_stream_name=data_stream_name,
+        path_spec=path_spec, size=size, tag=tag))
 
-    encoded_string = self._EncodeString(string)
-    self._file_object.write(encoded_string)
+  def WriteRecord(self, record):
+    """Writes a record to the spool file.
+
+    Args:
+      record (FileHashRecord): message digest hashes of a data stream.
+    """
+    self._BufferRecord(record)
 
 
 class StdoutWriter(OutputWriter):
   """Output writer that writes to stdout."""
 
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[str]): buffered lines of output.
+    """
+    sys.stdout.write(''.join(records))
+
   def Close(self):
     """Closes the output writer object."""
+    self.Flush()
+
+  def Flush(self):
+    """Flushes buffered output."""
+    super(StdoutWriter, self).Flush()
+    sys.stdout.flush()
 
   def Open(self):
     """Opens the output writer object."""
 
-  def WriteFileHash(self, path, hash_value):
-    """Writes the file path and hash to stdout.
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes to stdout.
 
     Args:
       path (str): path of the file.
-      hash_value (str): message digest hash calculated over the file data.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
-    print('{0:s}\t{1:s}'.format(hash_value, path))
+    hash_values_string = '\t'.join(hash_values.values())
+    if tag:
+      self._BufferRecord('{0:s}\t{1:s}\t{2:s}\n'.format(
+          hash_values_string, path, tag))
+    else:
+      self._BufferRecord('{0:s}\t{1:s}\n'.format(hash_values_string, path))
 
 
 def Main():
@@ -303,11 +2888,121 @@ def Main():
       '--back_end', '--back-end', dest='back_end', action='store',
       metavar='NTFS', default=None, help='preferred dfVFS back-end.')
 
+  helpers.AddFileEntryFilterArguments(argument_parser)
+
+  argument_parser.add_argument(
+      '--checkpoint', dest='checkpoint', action='store', metavar='FILE',
+      default=None, help=(
+          'path of a checkpoint journal that records the data streams that '
+          'have been hashed. If the journal already exists, the data streams '
+          'recorded in it are skipped and the output is appended to the '
+          'output file, which allows to resume an interrupted run.'))
+
+  argument_parser.add_argument(
+      '--duplicates_only', '--duplicates-only', dest='duplicates_only',
+      action='store_true', default=False, help=(
+          'only output data streams of which the content is duplicated. Data '
+          'streams with a unique size or a unique hash of their first and '
+          'last block are skipped without reading all their data.'))
+
+  argument_parser.add_argument(
+      '--extent_order', '--extent-order', dest='extent_order',
+      action='store_true', default=False, help=(
+          'hash the data streams of a file system in the order of the offset '
+          'of their first extent, which reads spinning or network storage '
+          'more sequentially. The output is still written in the order in '
+          'which the file entries are enumerated. Requires a dfVFS version '
+          'that exposes file entry extents.'))
+
+  argument_parser.add_argument(
+      '--hard_link_cache_size', '--hard-link-cache-size',
+      dest='hard_link_cache_size', action='store', type=int, default=None,
+      metavar='N', help=(
+          'maximum number of data streams with multiple hard links of which '
+          'the digest hashes are cached, so that the data of these data '
+          'streams is only read once. Every link is still written to the '
+          'output. Use 0 to disable the cache. The default is {0:d}.').format(
+              HardLinkCache.DEFAULT_MAXIMUM_NUMBER_OF_ENTRIES))
+
+  argument_parser.add_argument(
+      '--hash_cache', '--hash-cache', dest='hash_cache', action='store',
+      metavar='FILE', default=None, help=(
+          'path of a SQLite database that caches digest hashes between runs. '
+          'The data of a data stream is not read if the cache contains its '
+          'digest hashes and the inode, size, modification and change time '
+          'of the file entry are unchanged.'))
+
+  argument_parser.add_argument(
+      '--hashes', '--hash', dest='hashes', action='store', type=str,
+      metavar='md5,sha1,sha256', default='sha256', help=(
+          'comma separated list of the message digest hashes to calculate, '
+          'the hashes are written as separate columns in the order they are '
+          'specified. Supported hashes are: {0:s}. The default is: '
+          'sha256.').format(', '.join(sorted(
+              RecursiveHasher.SUPPORTED_HASH_NAMES))))
+
+  argument_parser.add_argument(
+      '--known_bad_hashes', '--known-bad-hashes', dest='known_bad_hashes',
+      action='store', metavar='FILE', default=None, help=(
+          'path of an index of known bad message digest hashes, which can be '
+          'built with build_known_hashes_index.py. Data streams of which the '
+          'digest is in the index are tagged as: known_bad. The hash of '
+          'the index must be one of the calculated hashes.'))
+
+  argument_parser.add_argument(
+      '--known_bad_hashes_mode', '--known-bad-hashes-mode',
+      dest='known_bad_hashes_mode', action='store',
+      choices=['suppress', 'tag'], default='tag', help=(
+          'whether data streams of which the digest is in the known bad '
+          'hashes index are tagged or suppressed from the output. The default '
+          'is: tag.'))
+
+  argument_parser.add_argument(
+      '--known_hashes', '--known-hashes', dest='known_hashes',
+      action='store', metavar='FILE', default=None, help=(
+          'path of an index of known good message digest hashes, such as '
+          'the NSRL, which can be built with build_known_hashes_index.py. '
+          'Data streams of which the digest is in the index are suppressed '
+          'from the output or tagged as: known_good. The hash of the index '
+          'must be one of the calculated hashes.'))
+
+  argument_parser.add_argument(
+      '--known_hashes_mode', '--known-hashes-mode', dest='known_hashes_mode',
+      action='store', choices=['suppress', 'tag'], default='suppress', help=(
+          'whether data streams of which the digest is in the known good '
+          'hashes index are tagged or suppressed from the output. The default '
+          'is: suppress.'))
+
+  argument_parser.add_argument(
+      '--maximum_read_memory', '--maximum-read-memory',
+      dest='maximum_read_memory', action='store', type=int, default=None,
+      metavar='MiB', help=(
+          'maximum amount of memory, in MiB, used by the read buffers of all '
+          'concurrently hashed data streams, including those of the worker '
+          'processes. The default is 3 read buffers per process.'))
+
+  argument_parser.add_argument(
+      '--output_batch_size', '--output-batch-size', dest='output_batch_size',
+      action='store', type=int, default=OutputWriter.DEFAULT_BATCH_SIZE,
+      metavar='N', help=(
+          'maximum number of output lines that are buffered before they are '
+          'written, default is {0:d}.').format(
+              OutputWriter.DEFAULT_BATCH_SIZE))
+
   argument_parser.add_argument(
       '--output_file', '--output-file', dest='output_file', action='store',
       metavar='source.hashes', default=None, help=(
           'path of the output file, default is to output to stdout.'))
 
+  argument_parser.add_argument(
+      '--output_format', '--output-format', dest='output_format',
+      action='store', choices=['csv', 'jsonl', 'parquet', 'text'],
+      default='text', help=(
+          'format of the output, where csv, jsonl and parquet also contain '
+          'the data stream name, path specification and size and require '
+          'an output file. The parquet format requires pyarrow. The default '
+          'is: text.'))
+
   argument_parser.add_argument(
       '--partitions', '--partition', dest='partitions', action='store',
       type=str, default=None, help=(
@@ -317,6 +3012,60 @@ def Main():
           'combined as: "1,3..5". The first partition is 1. All partitions '
           'can be specified with: "all".'))
 
+  argument_parser.add_argument(
+      '--profile', dest='profile', action='store_true', default=False, help=(
+          'print a breakdown of the time spent in volume scanning, directory '
+          'enumeration, opening, reading, hashing and writing the output. '
+          'Note that with multiple workers the data streams are opened, read '
+          'and hashed by the worker processes, hence only the time spent '
+          'waiting for the workers is shown.'))
+
+  argument_parser.add_argument(
+      '--profile_output', '--profile-output', dest='profile_output',
+      action='store', metavar='FILE', default=None, help=(
+          'path of a file to write cProfile statistics to, which can be '
+          'analyzed with pstats. If --profile is also specified the functions '
+          'with the most cumulative time are printed as well.'))
+
+  argument_parser.add_argument(
+      '--progress', dest='progress', action='store_true', default=False,
+      help=(
+          'periodically print the number of file entries visited, the number '
+          'of bytes hashed, the current throughput and the estimated time '
+          'remaining to stderr.'))
+
+  argument_parser.add_argument(
+      '--read_buffer_size', '--read-buffer-size', dest='read_buffer_size',
+      action='store', type=int, default=None, metavar='MiB', help=(
+          'size of a read buffer, in MiB, default is {0:d}.').format(
+              RecursiveHasher._READ_BUFFER_SIZE // (1024 * 1024)))  # pylint: disable=protected-access
+
+  argument_parser.add_argument(
+      '--rescan', dest='rescan', action='store_true', default=False, help=(
+          'scan the source for volumes and file systems, even if the scan '
+          'result cache contains the results of the source, and update the '
+          'cached results.'))
+
+  argument_parser.add_argument(
+      '--scan_cache', '--scan-cache', dest='scan_cache', action='store',
+      metavar='FILE', default=None, help=(
+          'path of a file that caches the results of scanning storage media '
+          'images for volumes and file systems between runs. Cached results '
+          'are used if the size, modification time and a hash of the first '
+          'and last 64 KiB of the image are unchanged. Results of images '
+          'with encrypted volumes are not cached.'))
+
+  argument_parser.add_argument(
+      '--skip_hashing', '--skip-hashing', dest='skip_hashing',
+      action='append', metavar='GLOB', default=None, help=(
+          'glob pattern of paths of data streams that are listed without '
+          'being hashed, with the same syntax as --exclude, where the name '
+          'of a data stream other than the default data stream is appended '
+          'to the path as ":name". Specifying a pattern replaces the default '
+          'patterns: {0:s}. Skipping can be disabled with: "none". Can be '
+          'specified multiple times.').format(', '.join(
+              RecursiveHasher.DEFAULT_SKIP_HASHING_PATTERNS)))
+
   argument_parser.add_argument(
       '--snapshots', '--snapshot', dest='snapshots', action='store', type=str,
       default=None, help=(
@@ -326,6 +3075,23 @@ def Main():
           'combined as: "1,3..5". The first snapshot is 1. All snapshots can '
           'be specified with: "all".'))
 
+  argument_parser.add_argument(
+      '--status_file', '--status-file', dest='status_file', action='store',
+      metavar='FILE', default=None, help=(
+          'path of a file to periodically write the progress to as a JSON '
+          'object, which is replaced atomically so that it can be polled. '
+          'The status is "running" until the run has "completed" or was '
+          '"aborted".'))
+
+  argument_parser.add_argument(
+      '--volume_workers', '--volume-workers', dest='volume_workers',
+      action='store', type=int, default=1, metavar='N', help=(
+          'number of worker processes that concurrently hash different '
+          'volumes and snapshots, where the output is written in the order '
+          'of the volumes and snapshots. Default is to hash the volumes and '
+          'snapshots sequentially. Cannot be combined with --checkpoint, '
+          '--duplicates_only, --hash_cache or multiple --workers.'))
+
   argument_parser.add_argument(
       '--volumes', '--volume', dest='volumes', action='store', type=str,
       default=None, help=(
@@ -335,6 +3101,12 @@ def Main():
           'as: "1,3..5". The first volume is 1. All volumes can be specified '
           'with: "all".'))
 
+  argument_parser.add_argument(
+      '--workers', dest='workers', action='store', type=int, default=1,
+      metavar='N', help=(
+          'number of worker processes that calculate the message digest '
+          'hashes, default is to calculate the hashes in the main process.'))
+
   argument_parser.add_argument(
       'source', nargs='?', action='store', metavar='image.raw',
       default=None, help='path of the directory or storage media image.')
@@ -348,70 +3120,370 @@ def Main():
     print('')
     return False
 
-  helpers.SetDFVFSBackEnd(options.back_end)
+  if options.workers < 1:
+    print('Unsupported number of workers: {0:d}.'.format(options.workers))
+    print('')
+    return False
 
-  logging.basicConfig(
-      level=logging.INFO, format='[%(levelname)s] %(message)s')
+  if options.volume_workers < 1:
+    print('Unsupported number of volume workers: {0:d}.'.format(
+        options.volume_workers))
+    print('')
+    return False
 
-  if options.output_file:
-    output_writer = FileOutputWriter(options.output_file)
-  else:
-    output_writer = StdoutWriter()
+  if options.volume_workers > 1 and (
+      options.checkpoint or options.duplicates_only or options.hash_cache or
+      options.workers > 1):
+    print('Volume workers cannot be combined with a checkpoint journal, '
+          'duplicates only mode, a hash cache or multiple workers.')
+    print('')
+    return False
 
-  try:
-    output_writer.Open()
-  except IOError as exception:
-    print('Unable to open output writer with error: {0!s}.'.format(
-        exception))
+  hash_names = []
+  for hash_name in options.hashes.split(','):
+    hash_name = hash_name.strip().lower()
+    if hash_name and hash_name not in hash_names:
+      hash_names.append(hash_name)
+
+  unsupported_hash_names = [
+      hash_name for hash_name in hash_names
+      if hash_name not in RecursiveHasher.SUPPORTED_HASH_NAMES]
+  if not hash_names or unsupported_hash_names:
+    print('Unsupported hashes: {0:s}.'.format(options.hashes))
     print('')
     return False
 
-  mediator = command_line.CLIVolumeScannerMediator()
-  recursive_hasher = RecursiveHasher(mediator=mediator)
+  if options.duplicates_only and options.checkpoint:
+    print('Checkpoint journal is not supported in duplicates only mode.')
+    print('')
+    return False
 
-  volume_scanner_options = volume_scanner.VolumeScannerOptions()
-  volume_scanner_options.partitions = mediator.ParseVolumeIdentifiersString(
-      options.partitions)
+  if options.duplicates_only and options.extent_order:
+    print('Extent order is not supported in duplicates only mode.')
+    print('')
+    return False
 
-  if options.snapshots == 'none':
-    volume_scanner_options.snapshots = ['none']
-  else:
-    volume_scanner_options.snapshots = mediator.ParseVolumeIdentifiersString(
-        options.snapshots)
+  if options.output_batch_size < 1:
+    print('Unsupported output batch size: {0:d}.'.format(
+        options.output_batch_size))
+    print('')
+    return False
+
+  if options.hard_link_cache_size is not None and (
+      options.hard_link_cache_size < 0):
+    print('Unsupported hard link cache size: {0:d}.'.format(
+        options.hard_link_cache_size))
+    print('')
+    return False
+
+  if options.read_buffer_size is not None and options.read_buffer_size < 1:
+    print('Unsupported read buffer size: {0:d}.'.format(
+        options.read_buffer_size))
+    print('')
+    return False
+
+  if options.maximum_read_memory is not None and (
+      options.maximum_read_memory < 1):
+    print('Unsupported maximum read memory: {0:d}.'.format(
+        options.maximum_read_memory))
+    print('')
+    return False
+
+  if options.output_format != 'text' and not options.output_file:
+    print('Output format: {0:s} requires an output file.'.format(
+        options.output_format))
+    print('')
+    return False
+
+  try:
+    file_entry_filter = helpers.GetFileEntryFilter(options)
+  except ValueError as exception:
+    print('Unsupported file entry filter: {0!s}.'.format(exception))
+    print('')
+    return False
+
+  skip_hashing_patterns = None
+  if options.skip_hashing == ['none']:
+    skip_hashing_patterns = []
+  elif options.skip_hashing:
+    skip_hashing_patterns = options.skip_hashing
+
+  helpers.SetDFVFSBackEnd(options.back_end)
 
-  volume_scanner_options.volumes = mediator.ParseVolumeIdentifiersString(
-      options.volumes)
+  logging.basicConfig(
+      level=logging.INFO, format='[%(levelname)s] %(message)s')
 
-  return_value = True
+  # Known bad hashes are looked up first, so that a digest that is in both
+  # indexes is tagged as known bad.
+  known_hashes = []
+  scan_result_cache = None
+  hash_cache = None
+  checkpoint_journal = None
+  output_writer = None
 
+  # The resources are closed in the finally clause, so that pending changes,
+  # such as those of the hash cache, are also written when the run fails.
   try:
-    base_path_specs = recursive_hasher.GetBasePathSpecs(
-        options.source, options=volume_scanner_options)
-    if not base_path_specs:
-      print('No supported file system found in source.')
+    for path, tag, mode in (
+        (options.known_bad_hashes, 'known_bad', options.known_bad_hashes_mode),
+        (options.known_hashes, 'known_good', options.known_hashes_mode)):
+      if not path:
+        continue
+
+      known_hashes_index = helpers.KnownHashesIndex(path)
+
+      try:
+        known_hashes_index.Open()
+      except (IOError, OSError) as exception:
+        print('Unable to open known hashes index with error: {0!s}.'.format(
+            exception))
+        print('')
+        return False
+
+      known_hashes.append((known_hashes_index, tag, mode == 'suppress'))
+
+      if known_hashes_index.hash_name not in hash_names:
+        print((
+            'Hash: {0:s} of known hashes index: {1:s} is not '
+            'calculated.').format(known_hashes_index.hash_name, path))
+        print('')
+        return False
+
+    include_tag = any(not suppress for _, _, suppress in known_hashes)
+
+    if options.scan_cache:
+      scan_result_cache = helpers.ScanResultCache(options.scan_cache)
+
+      try:
+        scan_result_cache.Open()
+      except (IOError, OSError) as exception:
+        print('Unable to open scan result cache with error: {0!s}.'.format(
+            exception))
+        print('')
+        scan_result_cache = None
+        return False
+
+      if options.rescan:
+        scan_result_cache.RemoveSource(options.source)
+
+    if options.hash_cache:
+      hash_cache = HashCache(options.hash_cache)
+
+      try:
+        hash_cache.Open()
+      except IOError as exception:
+        print('Unable to open hash cache with error: {0!s}.'.format(
+            exception))
+        print('')
+        hash_cache = None
+        return False
+
+    if options.checkpoint:
+      checkpoint_journal = CheckpointJournal(options.checkpoint)
+
+      try:
+        checkpoint_journal.Open()
+      except IOError as exception:
+        print('Unable to open checkpoint journal with error: {0!s}.'.format(
+            exception))
+        print('')
+        checkpoint_journal = None
+        return False
+
+      if checkpoint_journal.number_of_entries:
+        # Hash output can be written to stdout, hence use logging (stderr).
+        logging.info(
+            'Resuming from checkpoint with {0:d} data streams hashed.'.format(
+                checkpoint_journal.number_of_entries))
+
+    append = bool(checkpoint_journal and checkpoint_journal.number_of_entries)
+
+    if options.output_format == 'parquet' and append:
+      print('Resuming from checkpoint is not supported with output format: '
+            'parquet.')
       print('')
       return False
 
-    recursive_hasher.CalculateHashes(base_path_specs, output_writer)
+    if append and checkpoint_journal.output_offset is not None:
+      # Output that was written after the last checkpoint is removed, since
+      # the corresponding data streams are hashed again.
+      try:
+        with open(options.output_file, 'r+b') as file_object:
+          file_object.truncate(checkpoint_journal.output_offset)
+
+      except IOError as exception:
+        print('Unable to truncate output file with error: {0!s}.'.format(
+            exception))
+        print('')
+        return False
+
+    if options.output_format == 'csv':
+      output_writer = CSVOutputWriter(
+          options.output_file, hash_names, append=append,
+          batch_size=options.output_batch_size, include_tag=include_tag)
+    elif options.output_format == 'jsonl':
+      output_writer = JSONLinesOutputWriter(
+          options.output_file, append=append,
+          batch_size=options.output_batch_size)
+    elif options.output_format == 'parquet':
+      output_writer = ParquetOutputWriter(
+          options.output_file, hash_names,
+          batch_size=options.output_batch_size, include_tag=include_tag)
+    elif options.output_file:
+      output_writer = FileOutputWriter(
+          options.output_file, append=append,
+          batch_size=options.output_batch_size)
+    else:
+      output_writer = StdoutWriter(batch_size=options.output_batch_size)
 
-    print('')
-    print('Completed.')
+    try:
+      output_writer.Open()
+    except IOError as exception:
+      print('Unable to open output writer with error: {0!s}.'.format(
+          exception))
+      print('')
+      output_writer = None
+      return False
 
-  except dfvfs_errors.ScannerError as exception:
-    return_value = False
+    maximum_read_buffer_memory = None
+    if options.maximum_read_memory:
+      maximum_read_buffer_memory = options.maximum_read_memory * 1024 * 1024
+
+    read_buffer_size = None
+    if options.read_buffer_size:
+      read_buffer_size = options.read_buffer_size * 1024 * 1024
+
+    profiler = helpers.StageProfiler()
+
+    mediator = command_line.CLIVolumeScannerMediator()
+    recursive_hasher = RecursiveHasher(
+        checkpoint_journal=checkpoint_journal,
+        duplicates_only=options.duplicates_only,
+        extent_order=options.extent_order, file_entry_filter=file_entry_filter,
+        hard_link_cache_size=options.hard_link_cache_size,
+        hash_cache=hash_cache, hash_names=hash_names, known_hashes=known_hashes,
+        maximum_read_buffer_memory=maximum_read_buffer_memory,
+        mediator=mediator, number_of_volume_workers=options.volume_workers,
+        number_of_workers=options.workers,
+        profiler=profiler, read_buffer_size=read_buffer_size,
+        scan_result_cache=scan_result_cache,
+        skip_hashing_patterns=skip_hashing_patterns)
+
+    volume_scanner_options = volume_scanner.VolumeScannerOptions()
+    volume_scanner_options.partitions = mediator.ParseVolumeIdentifiersString(
+        options.partitions)
+
+    if options.snapshots == 'none':
+      volume_scanner_options.snapshots = ['none']
+    else:
+      volume_scanner_options.snapshots = mediator.ParseVolumeIdentifiersString(
+          options.snapshots)
+
+    volume_scanner_options.volumes = mediator.ParseVolumeIdentifiersString(
+        options.volumes)
+
+    return_value = True
+
+    python_profiler = None
+    if options.profile_output:
+      python_profiler = cProfile.Profile()
+      python_profiler.enable()
 
-    print('')
-    print('[ERROR] {0!s}'.format(exception))
+    try:
+      base_path_specs = recursive_hasher.GetBasePathSpecs(
+          options.source, options=volume_scanner_options)
+      if not base_path_specs:
+        print('No supported file system found in source.')
+        print('')
+        return False
+
+      progress_reporter = None
+      if options.progress or options.status_file:
+        total_size = recursive_hasher.GetAllocatedSize(base_path_specs)
+        if total_size is None and os.path.isfile(options.source):
+          # The size of a storage media image is an upper bound of the size
+          # of the data of its file systems.
+          total_size = os.path.getsize(options.source)
+
+        progress_output = None
+        if options.progress:
+          progress_output = sys.stderr
+
+        progress_reporter = ProgressReporter(
+            profiler, output=progress_output, status_file=options.status_file,
+            total_size=total_size)
+        progress_reporter.Start()
+
+      status = 'aborted'
+      try:
+        recursive_hasher.CalculateHashes(base_path_specs, output_writer)
+
+        with profiler.Time('output'):
+          output_writer.Flush()
+
+        status = 'completed'
+
+      finally:
+        if progress_reporter:
+          progress_reporter.Stop(status=status)
+
+      print('')
+      print('Completed.')
 
-  except dfvfs_errors.UserAbort as exception:
-    return_value = False
+    except dfvfs_errors.ScannerError as exception:
+      return_value = False
 
-    print('')
-    print('Aborted.')
+      print('')
+      print('[ERROR] {0!s}'.format(exception))
+
+    except dfvfs_errors.UserAbort as exception:
+      return_value = False
+
+      print('')
+      print('Aborted.')
+
+    if python_profiler:
+      python_profiler.disable()
+      python_profiler.dump_stats(options.profile_output)
+
+    if options.profile:
+      print('')
+      print(profiler.FormatReport())
+
+      if python_profiler:
+        print('')
+        stats = pstats.Stats(python_profiler, stream=sys.stdout)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
+    return return_value
+
+  finally:
+    if output_writer:
+      output_writer.Flush()
+
+      # The journal is only flushed after the output was flushed, so that it
+      # does not record data streams of which the output was not written.
+      if checkpoint_journal:
+        checkpoint_journal.Flush(output_offset=output_writer.GetOffset())
+
+      output_writer.Close()
+
+    if checkpoint_journal:
+      checkpoint_journal.Close()
+
+    if hash_cache:
+      hash_cache.Close()
 
-  output_writer.Close()
+    for known_hashes_index, _, _ in known_hashes:
+      known_hashes_index.Close()
 
-  return return_value
+    if scan_result_cache:
+      try:
+        scan_result_cache.Close()
+      except (IOError, OSError) as exception:
+        logging.warning(
+            'Unable to write scan result cache with error: {0!s}'.format(
+                exception))
 
 
 if __name__ == '__main__':
@@ -23,19 +23,23 @@ class SourceAnalyzer(object):
   # Class constant that defines the default read buffer size.
   _READ_BUFFER_SIZE = 32768
 
-  def __init__(self, auto_recurse=True, mediator=None):
+  def __init__(self, auto_recurse=True, mediator=None, scan_result_cache=None):
     """Initializes a source analyzer.
 
     Args:
       auto_recurse (Optional[bool]): True if the scan should automatically
           recurse as far as possible.
       mediator (Optional[VolumeScannerMediator]): a volume scanner mediator.
+      scan_result_cache (Optional[helpers.ScanResultCache]): cache of the
+          results of scanning sources, which is only used if the scan
+          automatically recurses.
     """
     super(SourceAnalyzer, self).__init__()
     self._auto_recurse = auto_recurse
     self._encode_errors = 'strict'
     self._mediator = mediator
     self._preferred_encoding = locale.getpreferredencoding()
+    self._scan_result_cache = scan_result_cache
     self._source_scanner = source_scanner.SourceScanner()
 
   def Analyze(self, source_path, output_writer):
@@ -54,6 +58,12 @@ class SourceAnalyzer(object):
         not os.path.exists(source_path)):
       raise RuntimeError('No such source: {0:s}.'.format(source_path))
 
+    if self._auto_recurse and self._scan_result_cache:
+      scan_context = self._scan_result_cache.GetScanContext(source_path)
+      if scan_context:
+        output_writer.WriteScanContext(scan_context)
+        return
+
     scan_context = source_scanner.SourceScannerContext()
     scan_path_spec = None
     scan_step = 0
@@ -96,6 +106,9 @@ class SourceAnalyzer(object):
     if self._auto_recurse:
       output_writer.WriteScanContext(scan_context)
 
+      if self._scan_result_cache:
+        self._scan_result_cache.SetScanContext(source_path, scan_context)
+
 
 class StdoutWriter(command_line.StdoutOutputWriter):
   """Stdout output writer."""
@@ -193,6 +206,20 @@ def Main():
       action='store_true', default=False, help=(
           'Indicate that the source scanner should not auto-recurse.'))
 
+  argument_parser.add_argument(
+      '--rescan', dest='rescan', action='store_true', default=False, help=(
+          'scan the source, even if the scan result cache contains the '
+          'results of the source, and update the cached results.'))
+
+  argument_parser.add_argument(
+      '--scan_cache', '--scan-cache', dest='scan_cache', action='store',
+      metavar='FILE', default=None, help=(
+          'path of a file that caches the results of scanning storage media '
+          'images between runs. Cached results are used if the size, '
+          'modification time and a hash of the first and last 64 KiB of the '
+          'image are unchanged. Results of images with encrypted volumes are '
+          'not cached and the cache is not used with --no-auto-recurse.'))
+
   options = argument_parser.parse_args()
 
   if not options.source:
@@ -207,13 +234,29 @@ def Main():
   logging.basicConfig(
       level=logging.INFO, format='[%(levelname)s] %(message)s')
 
+  scan_result_cache = None
+  if options.scan_cache:
+    scan_result_cache = helpers.ScanResultCache(options.scan_cache)
+
+    try:
+      scan_result_cache.Open()
+    except (IOError, OSError) as exception:
+      print('Unable to open scan result cache with error: {0!s}.'.format(
+          exception))
+      print('')
+      return False
+
+    if options.rescan:
+      scan_result_cache.RemoveSource(options.source)
+
   output_writer = StdoutWriter()
 
   mediator = command_line.CLIVolumeScannerMediator(
       output_writer=output_writer)
 
   source_analyzer = SourceAnalyzer(
-      auto_recurse=not options.no_auto_recurse, mediator=mediator)
+      auto_recurse=not options.no_auto_recurse, mediator=mediator,
+      scan_result_cache=scan_result_cache)
 
   return_value = True
 
@@ -227,6 +270,14 @@ def Main():
 
     print('Aborted by user.')
 
+  if scan_result_cache:
+    try:
+      scan_result_cache.Close()
+    except (IOError, OSError) as exception:
+      logging.warning(
+          'Unable to write scan result cache with error: {0!s}'.format(
+              exception))
+
   return return_value
 
 
@@ -0,0 +1,809 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the dfVFS scripts against synthetic test sources.
+
+Run from the top level directory with:
+PYTHONPATH=. python ./tests/benchmark.py --output-file results.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+import dfvfs
+
+from dfvfs.lib import definitions as dfvfs_definitions
+from dfvfs.resolver import resolver
+
+from scripts import helpers
+from scripts import list_file_entries
+from scripts import recursive_hasher
+from scripts import source_analyzer
+
+
+class SyntheticSourceGenerator(object):
+  """Generator of synthetic test sources.
+
+  The test sources are a directory tree with files of random content and
+  optionally a raw ext4 storage media image and a QCOW2 image of the tree,
+  when mke2fs and qemu-img are available.
+  """
+
+  # Additional space per directory and file in the storage media image.
+  _IMAGE_OVERHEAD_PER_ENTRY = 8192
+
+  # Minimum size of the storage media image.
+  _MINIMUM_IMAGE_SIZE = 16 * 1024 * 1024
+
+  def __init__(
+      self, number_of_files=1000, depth=4, minimum_file_size=0,
+      maximum_file_size=1024 * 1024, seed=0):
+    """Initializes a synthetic source generator.
+
+    Args:
+      number_of_files (Optional[int]): number of files.
+      depth (Optional[int]): maximum depth of the directory tree.
+      minimum_file_size (Optional[int]): minimum size of a file.
+      maximum_file_size (Optional[int]): maximum size of a file.
+      seed (Optional[int]): seed of the random number generator, so that
+          test sources can be regenerated.
+    """
+    super(SyntheticSourceGenerator, self).__init__()
+    self._depth = depth
+    self._maximum_file_size = maximum_file_size
+    self._minimum_file_size = minimum_file_size
+    self._number_of_files = number_of_files
+    self._random = random.Random(seed)
+
+  def _GetFileSize(self):
+    """Retrieves a random file size.
+
+    The file sizes are log-uniformly distributed, which, like on most file
+    systems, results in many small files and few large files.
+
+    Returns:
+      int: file size.
+    """
+    minimum_file_size = max(self._minimum_file_size, 1)
+    if minimum_file_size >= self._maximum_file_size:
+      return self._maximum_file_size
+
+    exponent = self._random.uniform(
+        math.log2(minimum_file_size), math.log2(self._maximum_file_size))
+    file_size = int(2.0 ** exponent)
+    file_size = min(file_size, self._maximum_file_size)
+
+    if self._minimum_file_size == 0 and self._random.random() < 0.01:
+      # Add a small fraction of empty files.
+      file_size = 0
+
+    return file_size
+
+  def _RunCommand(self, command):
+    """Runs a command.
+
+    Args:
+      command (list[str]): command to run.
+
+    Returns:
+      bool: True if the command ran successfully.
+    """
+    command_string = ' '.join(command)
+    logging.info('Running: {0:s}'.format(command_string))
+
+    result = subprocess.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+      logging.error('Running: "{0:s}" failed (exit code {1:d}).'.format(
+          command_string, result.returncode))
+      return False
+
+    return True
+
+  def CreateDirectoryTree(self, path):
+    """Creates a directory tree with files.
+
+    Args:
+      path (str): path of the directory in which to create the tree.
+
+    Returns:
+      tuple[int, int, int]: number of directories, number of files and total
+          size of the files.
+    """
+    directories = [path]
+    number_of_directories = 0
+    total_size = 0
+
+    for file_index in range(self._number_of_files):
+      # Every tenth file creates a new directory, at most depth levels deep.
+      if file_index % 10 == 0 and file_index > 0:
+        parent_directory = self._random.choice(directories)
+        relative_path = os.path.relpath(parent_directory, path)
+        if relative_path.count(os.sep) + 1 < self._depth:
+          directory = os.path.join(
+              parent_directory, 'directory{0:d}'.format(number_of_directories))
+          os.mkdir(directory)
+          directories.append(directory)
+          number_of_directories += 1
+
+      file_size = self._GetFileSize()
+      file_path = os.path.join(
+          self._random.choice(directories), 'file{0:d}'.format(file_index))
+
+      with open(file_path, 'wb') as file_object:
+        if file_size:
+          data = self._random.getrandbits(file_size * 8)
+          file_object.write(data.to_bytes(file_size, 'little'))
+
+      total_size += file_size
+
+    return number_of_directories, self._number_of_files, total_size
+
+  def CreateQCOW2Image(self, raw_image_path, path):
+    """Creates a QCOW2 image from a raw storage media image.
+
+    Args:
+      raw_image_path (str): path of the raw storage media image.
+      path (str): path of the QCOW2 image.
+
+    Returns:
+      bool: True if the QCOW2 image was created, False if qemu-img is not
+          available or failed.
+    """
+    qemu_img_path = shutil.which('qemu-img')
+    if not qemu_img_path:
+      logging.warning('Missing qemu-img, skipping QCOW2 image.')
+      return False
+
+    return self._RunCommand([
+        qemu_img_path, 'convert', '-f', 'raw', '-O', 'qcow2', raw_image_path,
+        path])
+
+  def CreateRawImage(self, directory, path, number_of_entries, total_size):
+    """Creates a raw storage media image with an ext4 file system.
+
+    Args:
+      directory (str): path of the directory tree to copy into the file
+          system.
+      path (str): path of the raw storage media image.
+      number_of_entries (int): number of directories and files in the tree.
+      total_size (int): total size of the files in the tree.
+
+    Returns:
+      bool: True if the raw image was created, False if mke2fs is not
+          available or failed.
+    """
+    mke2fs_path = shutil.which('mke2fs')
+    if not mke2fs_path:
+      logging.warning('Missing mke2fs, skipping raw image.')
+      return False
+
+    image_size = (
+        total_size + number_of_entries * self._IMAGE_OVERHEAD_PER_ENTRY)
+    image_size = max(image_size + image_size // 4, self._MINIMUM_IMAGE_SIZE)
+
+    return self._RunCommand([
+        mke2fs_path, '-q', '-F', '-t', 'ext4', '-b', '4096', '-d', directory,
+        path, '{0:d}k'.format(image_size // 1024)])
+
+
+class CountingHashOutputWriter(recursive_hasher.OutputWriter):
+  """Output writer that counts the hashed data streams and bytes.
+
+  Attributes:
+    number_of_bytes (int): number of bytes of the hashed data streams.
+    number_of_entries (int): number of hashed data streams.
+  """
+
+  def __init__(self):
+    """Initializes an output writer."""
+    super(CountingHashOutputWriter, self).__init__()
+    self.number_of_bytes = 0
+    self.number_of_entries = 0
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+    return
+
+  def Close(self):
+    """Closes the output writer object."""
+    return
+
+  def Open(self):
+    """Opens the output writer object."""
+    return
+
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Counts the file path and hashes.
+
+    Args:
+      path (str): path of the file.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
+    """
+    self.number_of_bytes += size or 0
+    self.number_of_entries += 1
+
+
+class CountingListOutputWriter(list_file_entries.OutputWriter):
+  """Output writer that counts the listed file entries.
+
+  Attributes:
+    number_of_bytes (int): number of bytes, which is not tracked since
+        listing does not read file data.
+    number_of_entries (int): number of listed file entries.
+  """
+
+  def __init__(self):
+    """Initializes an output writer."""
+    super(CountingListOutputWriter, self).__init__()
+    self.number_of_bytes = None
+    self.number_of_entries = 0
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+    return
+
+  def Close(self):
+    """Closes the output writer object."""
+    return
+
+  def Open(self):
+    """Opens the output writer object."""
+    return
+
+  def WriteFileEntry(self, path, path_spec=None, size=None):
+    """Counts the file path.
+
+    Args:
+      path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
+    """
+    self.number_of_entries += 1
+
+
+class CountingScanOutputWriter(source_analyzer.StdoutWriter):
+  """Output writer that counts the analyzed scan nodes.
+
+  Attributes:
+    number_of_bytes (int): number of bytes, which is not tracked since
+        analyzing only reads format signatures and metadata.
+    number_of_entries (int): number of scan nodes.
+  """
+
+  def __init__(self):
+    """Initializes an output writer."""
+    super(CountingScanOutputWriter, self).__init__()
+    self.number_of_bytes = None
+    self.number_of_entries = 0
+
+  def Write(self, string):
+    """Discards a string that would be written to the output.
+
+    Args:
+      string (str): output.
+    """
+    return
+
+  def WriteScanNode(self, scan_context, scan_node, indentation=''):
+    """Counts the source scanner node and its sub nodes.
+
+    Args:
+      scan_context (SourceScannerContext): the source scanner context.
+      scan_node (SourceScanNode): the scan node.
+      indentation (Optional[str]): indentation.
+    """
+    if scan_node:
+      self.number_of_entries += 1
+
+    super(CountingScanOutputWriter, self).WriteScanNode(
+        scan_context, scan_node, indentation=indentation)
+
+
+# Characters that are escaped in a path to display.
+_ESCAPE_CHARACTERS = str.maketrans({
+    value: '\\x{0:02x}'.format(value)
+    for value in list(range(0, 0x20)) + list(range(0x7f, 0xa0))})
+
+# Number of times the display paths of a test source are built, so that
+# the time is long enough to be measured.
+_NUMBER_OF_DISPLAY_PATH_ITERATIONS = 20
+
+
+def _GetDisplayPathReference(path_spec, path_segments, data_stream_name):
+  """Retrieves a path to display by escaping and joining all path segments.
+
+  This is the implementation that preceded helpers.DisplayPathBuilder, which
+  the display path benchmark is compared against.
+
+  Args:
+    path_spec (dfvfs.PathSpec): path specification of the file entry.
+    path_segments (list[str]): path segments of the full path of the file
+        entry.
+    data_stream_name (str): name of the data stream.
+
+  Returns:
+    str: path to display.
+  """
+  display_path = ''
+
+  if path_spec.HasParent():
+    parent_path_spec = path_spec.parent
+    if parent_path_spec and parent_path_spec.type_indicator in (
+        dfvfs_definitions.PARTITION_TABLE_TYPE_INDICATORS):
+      display_path = ''.join([display_path, parent_path_spec.location])
+
+  path_segments = [
+      segment.translate(_ESCAPE_CHARACTERS) for segment in path_segments]
+  display_path = ''.join([display_path, '/'.join(path_segments)])
+
+  if data_stream_name:
+    data_stream_name = data_stream_name.translate(_ESCAPE_CHARACTERS)
+    display_path = ':'.join([display_path, data_stream_name])
+
+  return display_path or '/'
+
+
+def _GetDisplayPathWorkItems(source_path):
+  """Retrieves the work items of the display path benchmarks.
+
+  Args:
+    source_path (str): path of the test source.
+
+  Returns:
+    list[tuple[dfvfs.PathSpec, list[str], str]]: path specification, path
+        segments and data stream name of every data stream, in the order
+        in which they are enumerated.
+  """
+  file_entry_lister = list_file_entries.FileEntryLister()
+  base_path_specs = file_entry_lister.GetBasePathSpecs(source_path)
+
+  work_items = []
+  for base_path_spec in base_path_specs:
+    file_entry = resolver.Resolver.OpenFileEntry(base_path_spec)
+    if not file_entry:
+      continue
+
+    for sub_file_entry, path_segments in helpers.IterateFileEntries(
+        file_entry):
+      # The list of path segments is changed when the iteration continues,
+      # hence a copy is stored.
+      path_segments = list(path_segments)
+      for data_stream in sub_file_entry.data_streams or [None]:
+        data_stream_name = getattr(data_stream, 'name', '')
+        work_items.append((
+            sub_file_entry.path_spec, path_segments, data_stream_name))
+
+  return work_items
+
+
+def _GetPeakResidentSetSize():
+  """Retrieves the peak resident set size (RSS) of the current process.
+
+  Returns:
+    int: peak resident set size in bytes or None if not available.
+  """
+  if not resource:
+    return None
+
+  peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  if sys.platform != 'darwin':
+    # On Linux ru_maxrss is in kilobytes, on Mac OS in bytes.
+    peak_rss *= 1024
+
+  return peak_rss
+
+
+def _RunBenchmark(benchmark_name, source_path):
+  """Runs a benchmark.
+
+  Args:
+    benchmark_name (str): name of the benchmark.
+    source_path (str): path of the test source.
+
+  Returns:
+    dict[str, object]: benchmark result.
+
+  Raises:
+    ValueError: if the benchmark name is not supported.
+  """
+  display_path_work_items = None
+  if benchmark_name in ('display_path', 'display_path_reference'):
+    display_path_work_items = _GetDisplayPathWorkItems(source_path)
+
+  start_time = time.perf_counter()
+
+  if benchmark_name == 'display_path':
+    output_writer = CountingListOutputWriter()
+    for _ in range(_NUMBER_OF_DISPLAY_PATH_ITERATIONS):
+      display_path_builder = helpers.DisplayPathBuilder()
+      for path_spec, path_segments, data_stream_name in (
+          display_path_work_items):
+        output_writer.WriteFileEntry(display_path_builder.GetDisplayPath(
+            path_spec, path_segments, data_stream_name=data_stream_name))
+
+  elif benchmark_name == 'display_path_reference':
+    output_writer = CountingListOutputWriter()
+    for _ in range(_NUMBER_OF_DISPLAY_PATH_ITERATIONS):
+      for path_spec, path_segments, data_stream_name in (
+          display_path_work_items):
+        output_writer.WriteFileEntry(_GetDisplayPathReference(
+            path_spec, path_segments, data_stream_name))
+
+  elif benchmark_name == 'list_file_entries':
+    output_writer = CountingListOutputWriter()
+    file_entry_lister = list_file_entries.FileEntryLister()
+    base_path_specs = file_entry_lister.GetBasePathSpecs(source_path)
+    file_entry_lister.ListFileEntries(base_path_specs, output_writer)
+
+  elif benchmark_name == 'recursive_hasher':
+    output_writer = CountingHashOutputWriter()
+    hasher = recursive_hasher.RecursiveHasher()
+    base_path_specs = hasher.GetBasePathSpecs(source_path)
+    hasher.CalculateHashes(base_path_specs, output_writer)
+
+  elif benchmark_name == 'source_analyzer':
+    output_writer = CountingScanOutputWriter()
+    analyzer = source_analyzer.SourceAnalyzer()
+    analyzer.Analyze(source_path, output_writer)
+
+  else:
+    raise ValueError('Unsupported benchmark: {0:s}'.format(benchmark_name))
+
+  elapsed_time = time.perf_counter() - start_time
+
+  entries_per_second = None
+  megabytes_per_second = None
+  if elapsed_time > 0:
+    entries_per_second = output_writer.number_of_entries / elapsed_time
+    if output_writer.number_of_bytes is not None:
+      megabytes_per_second = (
+          output_writer.number_of_bytes / (1024 * 1024) / elapsed_time)
+
+  return {
+      'bytes': output_writer.number_of_bytes,
+      'entries': output_writer.number_of_entries,
+      'entries_per_second': entries_per_second,
+      'megabytes_per_second': megabytes_per_second,
+      'peak_rss': _GetPeakResidentSetSize(),
+      'seconds': elapsed_time}
+
+
+def _RunBenchmarkProcess(benchmark_name, source_path, result_queue):
+  """Runs a benchmark in a separate process.
+
+  Args:
+    benchmark_name (str): name of the benchmark.
+    source_path (str): path of the test source.
+    result_queue (multiprocessing.Queue): queue to store the benchmark result.
+  """
+  result_queue.put(_RunBenchmark(benchmark_name, source_path))
+
+
+class BenchmarkRunner(object):
+  """Benchmark runner.
+
+  Every benchmark run is done in a separate, freshly started, process so
+  that the peak resident set size (RSS) and the dfVFS resolver caches are
+  not shared between runs. Note that the operating system page cache is
+  shared, hence runs after the first are typically warm.
+  """
+
+  BENCHMARK_NAMES = frozenset([
+      'display_path', 'display_path_reference', 'list_file_entries',
+      'recursive_hasher', 'source_analyzer'])
+
+  def __init__(self, number_of_repetitions=1):
+    """Initializes a benchmark runner.
+
+    Args:
+      number_of_repetitions (Optional[int]): number of times every benchmark
+          is run.
+    """
+    super(BenchmarkRunner, self).__init__()
+    self._multiprocessing_context = multiprocessing.get_context('spawn')
+    self._number_of_repetitions = number_of_repetitions
+
+  def _RunBenchmarkInProcess(self, benchmark_name, source_path):
+    """Runs a benchmark in a separate process.
+
+    Args:
+      benchmark_name (str): name of the benchmark.
+      source_path (str): path of the test source.
+
+    Returns:
+      dict[str, object]: benchmark result or None if the benchmark failed.
+    """
+    result_queue = self._multiprocessing_context.Queue()
+    process = self._multiprocessing_context.Process(
+        target=_RunBenchmarkProcess,
+        args=(benchmark_name, source_path, result_queue))
+    process.start()
+
+    result = None
+    while result is None and (process.is_alive() or not result_queue.empty()):
+      try:
+        result = result_queue.get(timeout=1.0)
+      except queue.Empty:
+        pass
+
+    process.join()
+
+    if process.exitcode != 0:
+      logging.error('Benchmark: {0:s} failed (exit code {1!s}).'.format(
+          benchmark_name, process.exitcode))
+      return None
+
+    return result
+
+  def Run(self, benchmark_names, sources):
+    """Runs the benchmarks.
+
+    Args:
+      benchmark_names (list[str]): names of the benchmarks to run.
+      sources (list[tuple[str, str]]): format and path of the test sources.
+
+    Returns:
+      list[dict[str, object]]: benchmark results.
+    """
+    results = []
+    for source_format, source_path in sources:
+      for benchmark_name in benchmark_names:
+        runs = []
+        for _ in range(self._number_of_repetitions):
+          logging.info('Running benchmark: {0:s} on: {1:s}'.format(
+              benchmark_name, source_path))
+
+          run = self._RunBenchmarkInProcess(benchmark_name, source_path)
+          if run:
+            runs.append(run)
+
+        if not runs:
+          continue
+
+        result = {
+            'benchmark': benchmark_name,
+            'runs': runs,
+            'source_format': source_format}
+
+        for key in (
+            'entries_per_second', 'megabytes_per_second', 'peak_rss',
+            'seconds'):
+          values = [run[key] for run in runs if run[key] is not None]
+          result[key] = statistics.median(values) if values else None
+
+        results.append(result)
+
+    return results
+
+
+def _FormatValue(value, format_string):
+  """Formats a benchmark result value.
+
+  Args:
+    value (object): value or None if not available.
+    format_string (str): format string.
+
+  Returns:
+    str: formatted value or "N/A" if not available.
+  """
+  if value is None:
+    return 'N/A'
+
+  return format_string.format(value)
+
+
+def Main():
+  """The main program function.
+
+  Returns:
+    bool: True if successful or False if not.
+  """
+  argument_parser = argparse.ArgumentParser(description=(
+      'Benchmarks the dfVFS scripts against synthetic test sources.'))
+
+  argument_parser.add_argument(
+      '--benchmarks', '--benchmark', dest='benchmarks', action='store',
+      type=str, default='all', help=(
+          'comma separated list of the benchmarks to run. Supported '
+          'benchmarks are: {0:s}. The default is: all.').format(
+              ', '.join(sorted(BenchmarkRunner.BENCHMARK_NAMES))))
+
+  argument_parser.add_argument(
+      '--depth', dest='depth', action='store', type=int, default=4,
+      metavar='N', help='maximum depth of the directory tree, default is 4.')
+
+  argument_parser.add_argument(
+      '--files', dest='files', action='store', type=int, default=1000,
+      metavar='N', help='number of files, default is 1000.')
+
+  argument_parser.add_argument(
+      '--formats', '--format', dest='formats', action='store', type=str,
+      default='directory,raw,qcow2', help=(
+          'comma separated list of the test source formats, where raw '
+          'requires mke2fs and qcow2 requires qemu-img. The default is: '
+          'directory,raw,qcow2.'))
+
+  argument_parser.add_argument(
+      '--maximum_file_size', '--maximum-file-size', dest='maximum_file_size',
+      action='store', type=int, default=1024 * 1024, metavar='SIZE', help=(
+          'maximum size of a file in bytes, default is 1 MiB.'))
+
+  argument_parser.add_argument(
+      '--minimum_file_size', '--minimum-file-size', dest='minimum_file_size',
+      action='store', type=int, default=0, metavar='SIZE', help=(
+          'minimum size of a file in bytes, default is 0.'))
+
+  argument_parser.add_argument(
+      '--output_file', '--output-file', dest='output_file', action='store',
+      metavar='results.json', default=None, help=(
+          'path of the JSON file to store the results in, so that runs can '
+          'be compared.'))
+
+  argument_parser.add_argument(
+      '--repeat', dest='repeat', action='store', type=int, default=1,
+      metavar='N', help=(
+          'number of times every benchmark is run, the median is reported. '
+          'The default is 1.'))
+
+  argument_parser.add_argument(
+      '--seed', dest='seed', action='store', type=int, default=0,
+      metavar='N', help='seed of the random number generator, default is 0.')
+
+  argument_parser.add_argument(
+      '--temporary_directory', '--temporary-directory',
+      dest='temporary_directory', action='store', metavar='DIRECTORY',
+      default=None, help=(
+          'path of the directory in which to create the test sources, '
+          'default is the system temporary directory.'))
+
+  options = argument_parser.parse_args()
+
+  if options.benchmarks == 'all':
+    benchmark_names = sorted(BenchmarkRunner.BENCHMARK_NAMES)
+  else:
+    benchmark_names = [
+        name.strip() for name in options.benchmarks.split(',') if name]
+
+  unsupported_benchmark_names = [
+      name for name in benchmark_names
+      if name not in BenchmarkRunner.BENCHMARK_NAMES]
+  if not benchmark_names or unsupported_benchmark_names:
+    print('Unsupported benchmarks: {0:s}.'.format(options.benchmarks))
+    print('')
+    return False
+
+  source_formats = [
+      source_format.strip() for source_format in options.formats.split(',')]
+  if not set(source_formats).issubset(set(['directory', 'qcow2', 'raw'])):
+    print('Unsupported formats: {0:s}.'.format(options.formats))
+    print('')
+    return False
+
+  if options.files < 1 or options.depth < 1 or options.repeat < 1:
+    print('Number of files, depth and repeat must be 1 or more.')
+    print('')
+    return False
+
+  logging.basicConfig(
+      level=logging.INFO, format='[%(levelname)s] %(message)s')
+
+  generator = SyntheticSourceGenerator(
+      number_of_files=options.files, depth=options.depth,
+      minimum_file_size=options.minimum_file_size,
+      maximum_file_size=options.maximum_file_size, seed=options.seed)
+
+  temporary_directory = tempfile.mkdtemp(dir=options.temporary_directory)
+
+  try:
+    directory = os.path.join(temporary_directory, 'source')
+    os.mkdir(directory)
+
+    logging.info('Creating directory tree with {0:d} files.'.format(
+        options.files))
+    number_of_directories, number_of_files, total_size = (
+        generator.CreateDirectoryTree(directory))
+
+    sources = []
+    if 'directory' in source_formats:
+      sources.append(('directory', directory))
+
+    raw_image_path = None
+    if 'raw' in source_formats or 'qcow2' in source_formats:
+      raw_image_path = os.path.join(temporary_directory, 'source.raw')
+      if not generator.CreateRawImage(
+          directory, raw_image_path, number_of_directories + number_of_files,
+          total_size):
+        raw_image_path = None
+
+    if raw_image_path and 'raw' in source_formats:
+      sources.append(('raw', raw_image_path))
+
+    if raw_image_path and 'qcow2' in source_formats:
+      qcow2_image_path = os.path.join(temporary_directory, 'source.qcow2')
+      if generator.CreateQCOW2Image(raw_image_path, qcow2_image_path):
+        sources.append(('qcow2', qcow2_image_path))
+
+    benchmark_runner = BenchmarkRunner(number_of_repetitions=options.repeat)
+    results = benchmark_runner.Run(benchmark_names, sources)
+
+  finally:
+    shutil.rmtree(temporary_directory, True)
+
+  print('Benchmark\tFormat\tSeconds\tEntries/s\tMB/s\tPeak RSS (MiB)')
+  for result in results:
+    peak_rss = result['peak_rss']
+    if peak_rss is not None:
+      peak_rss /= 1024 * 1024
+
+    print('\t'.join([
+        result['benchmark'], result['source_format'],
+        _FormatValue(result['seconds'], '{0:.3f}'),
+        _FormatValue(result['entries_per_second'], '{0:.1f}'),
+        _FormatValue(result['megabytes_per_second'], '{0:.1f}'),
+        _FormatValue(peak_rss, '{0:.1f}')]))
+
+  if options.output_file:
+    json_dict = {
+        'parameters': {
+            'depth': options.depth,
+            'files': options.files,
+            'maximum_file_size': options.maximum_file_size,
+            'minimum_file_size': options.minimum_file_size,
+            'repeat': options.repeat,
+            'seed': options.seed},
+        'results': results,
+        'sources': {
+            'number_of_directories': number_of_directories,
+            'number_of_files': number_of_files,
+            'total_size': total_size},
+        'system': {
+            'dfvfs': dfvfs.__version__,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'read_buffer_size': (
+                recursive_hasher.RecursiveHasher._READ_BUFFER_SIZE)}}  # pylint: disable=protected-access
+
+    with open(options.output_file, 'w') as file_object:
+      json.dump(json_dict, file_object, indent=2, sort_keys=True)
+
+  return True
+
+
+if __name__ == '__main__':
+  if not Main():
+    sys.exit(1)
+  else:
+    sys.exit(0)
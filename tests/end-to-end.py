@@ -5,14 +5,20 @@
 
 import abc
 import argparse
+import collections
+import concurrent.futures
 import configparser
 import difflib
+import itertools
+import json
 import logging
 import os
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 
 
 # Since os.path.abspath() uses the current working directory (cwd)
@@ -39,6 +45,37 @@ class TempDirectory(object):
     shutil.rmtree(self.name, True)
 
 
+class ResourceUsage(object):
+  """Resource usage of a test.
+
+  Attributes:
+    peak_rss (int): peak resident set size (RSS) of the child process in
+        bytes or None if not available.
+    throughput (float): number of megabytes (MiB) of the source processed
+        per second or None if not available.
+    wall_time (float): wall time of the child process in seconds or None if
+        not available.
+  """
+
+  def __init__(self):
+    """Initializes resource usage."""
+    super(ResourceUsage, self).__init__()
+    self.peak_rss = None
+    self.throughput = None
+    self.wall_time = None
+
+  def CopyToDict(self):
+    """Copies the resource usage to a dictionary.
+
+    Returns:
+      dict[str, object]: resource usage values per name.
+    """
+    return {
+        'peak_rss': self.peak_rss,
+        'throughput': self.throughput,
+        'wall_time': self.wall_time}
+
+
 class TestCase(object):
   """Test case interface.
 
@@ -70,7 +107,8 @@ class TestCase(object):
     self._test_results_path = test_results_path
     self._test_sources_path = test_sources_path
 
-  def _RunCommand(self, command, stdout=None, stderr=None):
+  def _RunCommand(
+      self, command, stdout=None, stderr=None, resource_usage=None):
     """Runs a command.
 
     Args:
@@ -79,6 +117,9 @@ class TestCase(object):
         https://docs.python.org/2/library/subprocess.html#popen-constructor)
       stdout (Optional[str]): path to file to send stdout to.
       stderr (Optional[str]): path to file to send stderr to.
+      resource_usage (Optional[ResourceUsage]): resource usage to update with
+          the wall time and, where os.wait4() is supported, the peak resident
+          set size (RSS) of the command.
 
     Returns:
       bool: True if the command ran successfully.
@@ -87,10 +128,30 @@ class TestCase(object):
       command.insert(0, sys.executable)
     command_string = ' '.join(command)
     logging.info('Running: {0:s}'.format(command_string))
+
+    start_time = time.monotonic()
     with subprocess.Popen(command, stdout=stdout, stderr=stderr) as child:
-      child.communicate()
+      if hasattr(os, 'wait4'):
+        _, status, rusage = os.wait4(child.pid, 0)
+        if os.WIFSIGNALED(status):
+          child.returncode = -os.WTERMSIG(status)
+        else:
+          child.returncode = os.WEXITSTATUS(status)
+
+        if resource_usage:
+          # On Mac OS ru_maxrss is in bytes, on other platforms in kilobytes.
+          resource_usage.peak_rss = rusage.ru_maxrss
+          if sys.platform != 'darwin':
+            resource_usage.peak_rss *= 1024
+
+      else:
+        child.communicate()
+
       exit_code = child.returncode
 
+    if resource_usage:
+      resource_usage.wall_time = time.monotonic() - start_time
+
     if exit_code != 0:
       logging.error('Running: "{0:s}" failed (exit code {1:d}).'.format(
           command_string, exit_code))
@@ -128,6 +189,10 @@ class TestCasesManager(object):
   _test_case_classes = {}
   _test_case_objects = {}
 
+  # Tests can run concurrently, hence the test case objects are created
+  # under a lock.
+  _test_case_objects_lock = threading.Lock()
+
   @classmethod
   def DeregisterTestCase(cls, test_case_class):
     """Deregisters a test case class.
@@ -166,21 +231,22 @@ class TestCasesManager(object):
       TestCase: test case or None if not available.
     """
     name = name.lower()
-    if name not in cls._test_case_objects:
-      test_case_object = None
+    with cls._test_case_objects_lock:
+      if name not in cls._test_case_objects:
+        test_case_object = None
 
-      if name in cls._test_case_classes:
-        test_case_class = cls._test_case_classes[name]
-        test_case_object = test_case_class(
-            scripts_path, test_sources_path, test_references_path,
-            test_results_path, debug_output=debug_output)
+        if name in cls._test_case_classes:
+          test_case_class = cls._test_case_classes[name]
+          test_case_object = test_case_class(
+              scripts_path, test_sources_path, test_references_path,
+              test_results_path, debug_output=debug_output)
 
-      if not test_case_object:
-        return None
+        if not test_case_object:
+          return None
 
-      cls._test_case_objects[name] = test_case_object
+        cls._test_case_objects[name] = test_case_object
 
-    return cls._test_case_objects[name]
+      return cls._test_case_objects[name]
 
   @classmethod
   def RegisterTestCase(cls, test_case_class):
@@ -226,6 +292,8 @@ class TestDefinition(object):
   Attributes:
     case (str): name of test case.
     name (str): name of the test.
+    resource_usage (ResourceUsage): resource usage of the test or None if
+        not measured.
   """
 
   def __init__(self, name):
@@ -237,6 +305,7 @@ class TestDefinition(object):
     super(TestDefinition, self).__init__()
     self.case = ''
     self.name = name
+    self.resource_usage = None
 
 
 class TestDefinitionReader(object):
@@ -360,11 +429,17 @@ class TestLauncher(object):
   The test launcher reads the test definitions from a file, looks up
   the corresponding test cases in the test case manager and then runs
   the test case with the parameters specified in the test definition.
+
+  Attributes:
+    resource_usages (dict[str, ResourceUsage]): resource usage per name of
+        test that has run and measured its resource usage.
+    wall_times (dict[str, float]): wall time, in seconds, per name of test
+        that has run.
   """
 
   def __init__(
       self, scripts_path, test_sources_path, test_references_path,
-      test_results_path, debug_output=False):
+      test_results_path, baseline=None, debug_output=False, tolerance=0.25):
     """Initializes a test launcher.
 
     Args:
@@ -372,15 +447,62 @@ class TestLauncher(object):
       test_sources_path (str): path to the test sources.
       test_references_path (str): path to the test references.
       test_results_path (str): path to store test results.
+      baseline (Optional[dict[str, dict[str, object]]]): resource usage
+          values, as stored by ResourceUsage.CopyToDict(), per name of test
+          of a previous run to detect performance regressions against.
       debug_output (Optional[bool]): True if debug output should be generated.
+      tolerance (Optional[float]): fraction by which the resource usage may
+          regress relative to the baseline, for example 0.25 allows a 25%
+          longer wall time.
     """
     super(TestLauncher, self).__init__()
+    self._baseline = baseline or {}
     self._debug_output = debug_output
     self._scripts_path = scripts_path
     self._test_definitions = []
     self._test_references_path = test_references_path
     self._test_results_path = test_results_path
     self._test_sources_path = test_sources_path
+    self._tolerance = tolerance
+    self.resource_usages = {}
+    self.wall_times = {}
+
+  def _CheckBaseline(self, test_definition):
+    """Checks the resource usage of a test against the baseline.
+
+    Args:
+      test_definition (TestDefinition): test definition.
+
+    Returns:
+      bool: True if the resource usage did not regress beyond the tolerance
+          or if there is no baseline for the test.
+    """
+    baseline_values = self._baseline.get(test_definition.name, None)
+    resource_usage = test_definition.resource_usage
+    if not baseline_values or not resource_usage:
+      return True
+
+    result = True
+    for value_name, higher_is_better in (
+        ('peak_rss', False), ('throughput', True), ('wall_time', False)):
+      baseline_value = baseline_values.get(value_name, None)
+      value = getattr(resource_usage, value_name, None)
+      if not baseline_value or value is None:
+        continue
+
+      if higher_is_better:
+        regressed = value < baseline_value * (1.0 - self._tolerance)
+      else:
+        regressed = value > baseline_value * (1.0 + self._tolerance)
+
+      if regressed:
+        logging.error((
+            'Test: {0:s} {1:s}: {2:.3f} regressed beyond tolerance of '
+            'baseline: {3:.3f}').format(
+                test_definition.name, value_name, value, baseline_value))
+        result = False
+
+    return result
 
   def _RunTest(self, test_definition):
     """Runs the test.
@@ -401,6 +523,27 @@ class TestLauncher(object):
 
     return test_case.Run(test_definition)
 
+  def _RunTestWithWallTime(self, test_definition):
+    """Runs the test and measures its wall time.
+
+    Args:
+      test_definition (TestDefinition): test definition.
+
+    Returns:
+      tuple[bool, float]: True if the test ran successfully and the wall time
+          of the test in seconds.
+    """
+    start_time = time.monotonic()
+
+    try:
+      result = self._RunTest(test_definition)
+    except Exception as exception:  # pylint: disable=broad-except
+      logging.error('Test: {0:s} raised exception: {1!s}'.format(
+          test_definition.name, exception))
+      result = False
+
+    return result, time.monotonic() - start_time
+
   def ReadDefinitions(self, configuration_file):
     """Reads the test definitions from the configuration file.
 
@@ -415,17 +558,48 @@ class TestLauncher(object):
       for test_definition in test_definition_reader.Read(file_object):
         self._test_definitions.append(test_definition)
 
-  def RunTests(self):
+  def RunTests(self, number_of_jobs=1):
     """Runs the tests.
 
+    Every test runs its scripts in a separate process and stores its output
+    in its own temporary directory, hence tests can run concurrently.
+
+    Args:
+      number_of_jobs (Optional[int]): maximum number of tests that run
+          concurrently.
+
     Returns:
-      list[str]: names of the failed tests.
+      list[str]: names of the failed tests, in the order of the test
+          definitions.
     """
     # TODO: set up test environment
 
+    self.resource_usages = {}
+    self.wall_times = {}
+
+    if number_of_jobs > 1:
+      with concurrent.futures.ThreadPoolExecutor(
+          max_workers=number_of_jobs) as executor:
+        results = list(executor.map(
+            self._RunTestWithWallTime, self._test_definitions))
+    else:
+      results = [
+          self._RunTestWithWallTime(test_definition)
+          for test_definition in self._test_definitions]
+
     failed_tests = []
-    for test_definition in self._test_definitions:
-      if not self._RunTest(test_definition):
+    for test_definition, (result, wall_time) in zip(
+        self._test_definitions, results):
+      self.wall_times[test_definition.name] = wall_time
+
+      if test_definition.resource_usage:
+        self.resource_usages[test_definition.name] = (
+            test_definition.resource_usage)
+
+        if result:
+          result = self._CheckBaseline(test_definition)
+
+      if not result:
         failed_tests.append(test_definition.name)
 
     return failed_tests
@@ -436,6 +610,132 @@ class ExampleScriptTestCase(TestCase):
 
   # pylint: disable=redundant-returns-doc
 
+  # Maximum number of differing lines after which comparing output files
+  # stops.
+  _MAXIMUM_NUMBER_OF_DIFFERENCES = 100
+
+  # Number of lines of context around differences.
+  _NUMBER_OF_CONTEXT_LINES = 3
+
+  def _CompareFiles(self, reference_output_file_path, output_file_path):
+    """Compares an output file with a reference output file.
+
+    The files are compared line by line, without reading them into memory.
+    Only the lines around a difference are kept to generate a unified diff
+    and the comparison stops after a maximum number of differing lines.
+
+    Args:
+      reference_output_file_path (str): path of the reference output file.
+      output_file_path (str): path of the output file.
+
+    Returns:
+      list[str]: unified diff of the differences or an empty list if the
+          files are identical.
+    """
+    context_lines = collections.deque(maxlen=self._NUMBER_OF_CONTEXT_LINES)
+    differences = []
+    number_of_differences = 0
+    number_of_trailing_lines = 0
+    reference_window = []
+    output_window = []
+    window_line_number = None
+
+    with open(reference_output_file_path, 'r') as reference_output_file:
+      with open(output_file_path, 'r') as output_file:
+        for line_number, (reference_line, output_line) in enumerate(
+            itertools.zip_longest(reference_output_file, output_file),
+            start=1):
+          if reference_line == output_line:
+            context_lines.append(reference_line)
+
+            if window_line_number is None:
+              continue
+
+            reference_window.append(reference_line)
+            output_window.append(output_line)
+            number_of_trailing_lines += 1
+
+            if number_of_trailing_lines < self._NUMBER_OF_CONTEXT_LINES:
+              continue
+
+            differences.extend(self._GetWindowDifferences(
+                reference_output_file_path, output_file_path,
+                window_line_number, reference_window, output_window))
+            window_line_number = None
+            continue
+
+          if window_line_number is None:
+            window_line_number = line_number - len(context_lines)
+            reference_window = list(context_lines)
+            output_window = list(context_lines)
+
+          if reference_line is not None:
+            reference_window.append(reference_line)
+          if output_line is not None:
+            output_window.append(output_line)
+
+          number_of_trailing_lines = 0
+
+          number_of_differences += 1
+          if number_of_differences >= self._MAXIMUM_NUMBER_OF_DIFFERENCES:
+            logging.error((
+                'Stopped comparing after {0:d} differing lines at line: '
+                '{1:d}.').format(number_of_differences, line_number))
+            break
+
+    if window_line_number is not None:
+      differences.extend(self._GetWindowDifferences(
+          reference_output_file_path, output_file_path, window_line_number,
+          reference_window, output_window))
+
+    return differences
+
+  def _CheckResourceUsage(self, test_definition, source_path):
+    """Checks the resource usage against the limits of the test definition.
+
+    The throughput is determined from the size of the source, hence it is
+    only available for sources that are files.
+
+    Args:
+      test_definition (TestDefinition): test definition.
+      source_path (str): path of the source.
+
+    Returns:
+      bool: True if the resource usage is within the limits.
+    """
+    resource_usage = test_definition.resource_usage
+    if os.path.isfile(source_path) and resource_usage.wall_time:
+      source_size = os.path.getsize(source_path) / (1024 * 1024)
+      resource_usage.throughput = source_size / resource_usage.wall_time
+
+    result = True
+
+    if (test_definition.max_wall_time is not None and
+        resource_usage.wall_time is not None and
+        resource_usage.wall_time > test_definition.max_wall_time):
+      logging.error('Wall time: {0:.3f}s exceeds maximum: {1:.3f}s'.format(
+          resource_usage.wall_time, test_definition.max_wall_time))
+      result = False
+
+    if (test_definition.max_peak_rss is not None and
+        resource_usage.peak_rss is not None and
+        resource_usage.peak_rss > test_definition.max_peak_rss * 1024 * 1024):
+      logging.error('Peak RSS: {0:.1f} MiB exceeds maximum: {1:.1f} MiB'.format(
+          resource_usage.peak_rss / (1024 * 1024),
+          test_definition.max_peak_rss))
+      result = False
+
+    if (test_definition.min_throughput is not None and
+        resource_usage.throughput is not None and
+        resource_usage.throughput < test_definition.min_throughput):
+      logging.error((
+          'Throughput: {0:.1f} MiB/s is below minimum: {1:.1f} '
+          'MiB/s').format(
+              resource_usage.throughput, test_definition.min_throughput))
+      result = False
+
+    return result
+
   def _CompareOutputFile(self, test_definition, temp_directory):
     """Compares the output file with a reference output file.
 
@@ -460,19 +760,11 @@ class ExampleScriptTestCase(TestCase):
             reference_output_file_path))
         return False
 
-      with open(reference_output_file_path, 'r') as reference_output_file:
-        with open(output_file_path, 'r') as output_file:
-          reference_output_list = reference_output_file.readlines()
-          output_list = output_file.readlines()
-          differences = list(difflib.unified_diff(
-              reference_output_list, output_list,
-              fromfile=reference_output_file_path, tofile=output_file_path))
+      differences = self._CompareFiles(
+          reference_output_file_path, output_file_path)
 
       if differences:
-        differences_output = []
-        for difference in differences:
-          differences_output.append(difference)
-        differences_output = '\n'.join(differences_output)
+        differences_output = '\n'.join(differences)
         logging.error('Differences: {0:s}'.format(differences_output))
 
       if not differences:
@@ -480,6 +772,46 @@ class ExampleScriptTestCase(TestCase):
 
     return result
 
+  def _CopyTestResults(self, test_definition, file_paths):
+    """Copies files to the test results directory of the test definition.
+
+    Every test definition has its own test results directory, since tests
+    that run concurrently can have output files with the same name.
+
+    Args:
+      test_definition (TestDefinition): test definition.
+      file_paths (list[str]): paths of the files to copy, where paths that
+          are None or do not exist are ignored.
+    """
+    test_results_path = os.path.join(
+        self._test_results_path, test_definition.name)
+
+    for file_path in file_paths:
+      if file_path and os.path.exists(file_path):
+        os.makedirs(test_results_path, exist_ok=True)
+        shutil.copy(file_path, test_results_path)
+
+  def _GetWindowDifferences(
+      self, reference_output_file_path, output_file_path, line_number,
+      reference_window, output_window):
+    """Retrieves a unified diff of a window of lines around differences.
+
+    Args:
+      reference_output_file_path (str): path of the reference output file.
+      output_file_path (str): path of the output file.
+      line_number (int): line number of the first line in the window.
+      reference_window (list[str]): lines of the reference output file.
+      output_window (list[str]): lines of the output file.
+
+    Returns:
+      list[str]: unified diff of the window.
+    """
+    return list(difflib.unified_diff(
+        reference_window, output_window,
+        fromfile='{0:s}:{1:d}'.format(reference_output_file_path, line_number),
+        tofile='{0:s}:{1:d}'.format(output_file_path, line_number),
+        n=self._NUMBER_OF_CONTEXT_LINES))
+
   def ReadAttributes(self, test_definition_reader, test_definition):
     """Reads the test definition attributes into to the test definition.
 
@@ -500,6 +832,18 @@ class ExampleScriptTestCase(TestCase):
     test_definition.source = test_definition_reader.GetConfigValue(
         test_definition.name, 'source')
 
+    for value_name in ('max_peak_rss', 'max_wall_time', 'min_throughput'):
+      value = test_definition_reader.GetConfigValue(
+          test_definition.name, value_name)
+      if value is not None:
+        try:
+          value = float(value)
+        except ValueError:
+          logging.error('Unsupported {0:s}: {1:s}'.format(value_name, value))
+          return False
+
+      setattr(test_definition, value_name, value)
+
     return True
 
   @abc.abstractmethod
@@ -550,13 +894,16 @@ class ListFileEntriesTestCase(ExampleScriptTestCase):
       if os.path.exists(self._list_file_entries_path):
         break
 
-  def _RunListFileEntries(self, test_definition, temp_directory, source_path):
+  def _RunListFileEntries(
+      self, test_definition, temp_directory, source_path,
+      resource_usage=None):
     """Runs list_file_entries on a storage media image.
 
     Args:
       test_definition (TestDefinition): test definition.
       temp_directory (str): name of a temporary directory.
       source_path (str): path of the source.
+      resource_usage (Optional[ResourceUsage]): resource usage to update.
 
     Returns:
       bool: True if list_file_entries ran successfully.
@@ -580,20 +927,17 @@ class ListFileEntriesTestCase(ExampleScriptTestCase):
 
     with open(stdout_file, 'w') as stdout:
       with open(stderr_file, 'w') as stderr:
-        result = self._RunCommand(command, stdout=stdout, stderr=stderr)
+        result = self._RunCommand(
+            command, stdout=stdout, stderr=stderr,
+            resource_usage=resource_usage)
 
     if self._debug_output:
       with open(stderr_file, 'rb') as file_object:
         output_data = file_object.read()
         print(output_data)
 
-    if output_file_path and os.path.exists(output_file_path):
-      shutil.copy(output_file_path, self._test_results_path)
-
-    if os.path.exists(stdout_file):
-      shutil.copy(stdout_file, self._test_results_path)
-    if os.path.exists(stderr_file):
-      shutil.copy(stderr_file, self._test_results_path)
+    self._CopyTestResults(
+        test_definition, [output_file_path, stdout_file, stderr_file])
 
     return result
 
@@ -616,8 +960,13 @@ class ListFileEntriesTestCase(ExampleScriptTestCase):
 
     with TempDirectory() as temp_directory:
       # List file entries with list_file_entries.
+      test_definition.resource_usage = ResourceUsage()
       if not self._RunListFileEntries(
-          test_definition, temp_directory, source_path):
+          test_definition, temp_directory, source_path,
+          resource_usage=test_definition.resource_usage):
+        return False
+
+      if not self._CheckResourceUsage(test_definition, source_path):
         return False
 
       # Compare output file with a reference output file.
@@ -663,13 +1012,16 @@ class RecursiveHasherTestCase(ExampleScriptTestCase):
       if os.path.exists(self._recursive_hasher_path):
         break
 
-  def _RunRecursiveHasher(self, test_definition, temp_directory, source_path):
+  def _RunRecursiveHasher(
+      self, test_definition, temp_directory, source_path,
+      resource_usage=None):
     """Runs recursive_hasher on a storage media image.
 
     Args:
       test_definition (TestDefinition): test definition.
       temp_directory (str): name of a temporary directory.
       source_path (str): path of the source.
+      resource_usage (Optional[ResourceUsage]): resource usage to update.
 
     Returns:
       bool: True if recursive_hasher ran successfully.
@@ -693,20 +1045,17 @@ class RecursiveHasherTestCase(ExampleScriptTestCase):
 
     with open(stdout_file, 'w') as stdout:
       with open(stderr_file, 'w') as stderr:
-        result = self._RunCommand(command, stdout=stdout, stderr=stderr)
+        result = self._RunCommand(
+            command, stdout=stdout, stderr=stderr,
+            resource_usage=resource_usage)
 
     if self._debug_output:
       with open(stderr_file, 'rb') as file_object:
         output_data = file_object.read()
         print(output_data)
 
-    if output_file_path and os.path.exists(output_file_path):
-      shutil.copy(output_file_path, self._test_results_path)
-
-    if os.path.exists(stdout_file):
-      shutil.copy(stdout_file, self._test_results_path)
-    if os.path.exists(stderr_file):
-      shutil.copy(stderr_file, self._test_results_path)
+    self._CopyTestResults(
+        test_definition, [output_file_path, stdout_file, stderr_file])
 
     return result
 
@@ -729,8 +1078,13 @@ class RecursiveHasherTestCase(ExampleScriptTestCase):
 
     with TempDirectory() as temp_directory:
       # Recursively hash data streams with recursive_hasher.
+      test_definition.resource_usage = ResourceUsage()
       if not self._RunRecursiveHasher(
-          test_definition, temp_directory, source_path):
+          test_definition, temp_directory, source_path,
+          resource_usage=test_definition.resource_usage):
+        return False
+
+      if not self._CheckResourceUsage(test_definition, source_path):
         return False
 
       # Compare output file with a reference output file.
@@ -751,6 +1105,13 @@ def Main():
       description='End-to-end test launcher.', add_help=False,
       formatter_class=argparse.RawDescriptionHelpFormatter)
 
+  argument_parser.add_argument(
+      '--baseline', dest='baseline_file', action='store', metavar='FILE',
+      default=None, help=(
+          'path of a JSON file with the resource usage per test of a previous '
+          'run. A test fails when its wall time, peak RSS or throughput '
+          'regresses beyond the tolerance.'))
+
   argument_parser.add_argument(
       '-c', '--config', dest='config_file', action='store',
       metavar='CONFIG_FILE', default=None,
@@ -764,6 +1125,11 @@ def Main():
       '-h', '--help', action='help',
       help='show this help message and exit.')
 
+  argument_parser.add_argument(
+      '-j', '--jobs', dest='jobs', action='store', type=int, default=1,
+      metavar='N', help=(
+          'maximum number of tests to run concurrently, default is 1.'))
+
   argument_parser.add_argument(
       '--references-directory', '--references_directory', action='store',
       metavar='DIRECTORY', dest='references_directory', type=str,
@@ -777,6 +1143,17 @@ def Main():
       default=None, help=(
           'The location of the directory where to store the test results.'))
 
+  argument_parser.add_argument(
+      '--tolerance', dest='tolerance', action='store', type=float,
+      default=0.25, metavar='FRACTION', help=(
+          'fraction by which the resource usage may regress relative to the '
+          'baseline, default is 0.25.'))
+
+  argument_parser.add_argument(
+      '--update-baseline', '--update_baseline', dest='update_baseline',
+      action='store_true', default=False, help=(
+          'write the resource usage of the tests to the baseline file.'))
+
   argument_parser.add_argument(
       '--scripts-directory', '--scripts_directory', action='store',
       metavar='DIRECTORY', dest='scripts_directory', type=str,
@@ -801,6 +1178,27 @@ def Main():
     print('')
     return False
 
+  if options.jobs < 1:
+    print('Unsupported number of jobs: {0:d}.'.format(options.jobs))
+    print('')
+    return False
+
+  if options.tolerance < 0.0:
+    print('Unsupported tolerance: {0:f}.'.format(options.tolerance))
+    print('')
+    return False
+
+  if options.update_baseline and not options.baseline_file:
+    print('Missing baseline file to update.')
+    print('')
+    return False
+
+  baseline = None
+  if (options.baseline_file and not options.update_baseline and
+      os.path.exists(options.baseline_file)):
+    with open(options.baseline_file, 'r') as file_object:
+      baseline = json.load(file_object)
+
   logging.basicConfig(
       format='[%(levelname)s] %(message)s', level=logging.INFO)
 
@@ -840,10 +1238,27 @@ def Main():
 
   test_launcher = TestLauncher(
       scripts_path, test_sources_path, test_references_path,
-      test_results_path, debug_output=options.debug_output)
+      test_results_path, baseline=baseline, debug_output=options.debug_output,
+      tolerance=options.tolerance)
   test_launcher.ReadDefinitions(options.config_file)
 
-  failed_tests = test_launcher.RunTests()
+  failed_tests = test_launcher.RunTests(number_of_jobs=options.jobs)
+
+  print('Wall time per test:')
+  for test_name, wall_time in test_launcher.wall_times.items():
+    status = 'FAILED' if test_name in failed_tests else 'OK'
+    print(' {0:s}\t{1:.3f}s\t{2:s}'.format(test_name, wall_time, status))
+
+  print('')
+
+  if options.update_baseline:
+    baseline = {
+        test_name: resource_usage.CopyToDict()
+        for test_name, resource_usage in test_launcher.resource_usages.items()}
+
+    with open(options.baseline_file, 'w') as file_object:
+      json.dump(baseline, file_object, indent=2, sort_keys=True)
+
   if failed_tests:
     print('Failed tests:')
     for failed_test in failed_tests:
@@ -0,0 +1,659 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests for the helper functions for dfVFS snippets CLI tools."""
+
+import hashlib
+import os
+import shutil
+import sys
+import unittest
+
+from unittest import mock
+
+from dfvfs.helpers import source_scanner
+from dfvfs.helpers import volume_scanner
+from dfvfs.lib import definitions as dfvfs_definitions
+from dfvfs.resolver import resolver
+from dfvfs.path import factory as path_spec_factory
+
+from scripts import helpers
+
+from tests import test_lib
+
+
+class HelpersTest(test_lib.BaseTestCase):
+  """Tests for the helper functions."""
+
+  def testGetPathSpecificationString(self):
+    """Tests the GetPathSpecificationString function."""
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/image.raw')
+
+    path_specification_string = helpers.GetPathSpecificationString(path_spec)
+    self.assertEqual(
+        path_specification_string, 'type: OS, location: /image.raw\n')
+
+  def testIterateFileEntries(self):
+    """Tests the IterateFileEntries function."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location=path)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_QCOW, parent=path_spec)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_TSK, location='/', parent=path_spec)
+
+    file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+    paths = [
+        '/'.join(path_segments) for _, path_segments in (
+            helpers.IterateFileEntries(file_entry))]
+
+    expected_paths = [
+        '',
+        '/lost+found',
+        '/a_directory',
+        '/a_directory/another_file',
+        '/a_directory/a_file',
+        '/passwords.txt',
+        '/$OrphanFiles']
+    self.assertEqual(paths, expected_paths)
+
+  def testIterateFileEntriesWithDeepTree(self):
+    """Tests the IterateFileEntries function with a deep directory tree."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = temp_directory
+      for _ in range(300):
+        path = os.path.join(path, 'd')
+        os.mkdir(path)
+
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_OS, location=temp_directory)
+      file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+      # The depth of the tree should not be limited by the recursion limit.
+      recursion_limit = sys.getrecursionlimit()
+      sys.setrecursionlimit(200)
+
+      try:
+        maximum_depth = 0
+        for _, path_segments in helpers.IterateFileEntries(file_entry):
+          maximum_depth = max(maximum_depth, len(path_segments))
+
+      finally:
+        sys.setrecursionlimit(recursion_limit)
+
+    self.assertEqual(maximum_depth, 301)
+
+  def testIterateFileEntriesWithFilter(self):
+    """Tests the IterateFileEntries function with a file entry filter."""
+    with test_lib.TempDirectory() as temp_directory:
+      for directory_name in ('a_directory', 'excluded'):
+        path = os.path.join(temp_directory, directory_name)
+        os.mkdir(path)
+        os.mkdir(os.path.join(path, 'sub_directory'))
+        with open(os.path.join(path, 'a_file.txt'), 'wb') as file_object:
+          file_object.write(b'data')
+
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_OS, location=temp_directory)
+      file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+      file_entry_filter = helpers.FileEntryFilter(
+          exclude_patterns=['/excluded'], include_patterns=['*.txt'])
+
+      profiler = helpers.StageProfiler()
+      paths = sorted([
+          '/'.join(path_segments[1:]) for _, path_segments in (
+              helpers.IterateFileEntries(
+                  file_entry, file_entry_filter=file_entry_filter,
+                  profiler=profiler))])
+
+      # The excluded directory is not enumerated, the other file entries are
+      # since the include pattern matches at any depth.
+      number_of_calls, _ = profiler.GetStage('enumerate')
+      self.assertEqual(number_of_calls, 8)
+
+      file_entry_filter = helpers.FileEntryFilter(
+          include_patterns=['/a_directory/a_file.txt'])
+
+      profiler = helpers.StageProfiler()
+      list(helpers.IterateFileEntries(
+          file_entry, file_entry_filter=file_entry_filter, profiler=profiler))
+
+      # Only the root and "/a_directory" are enumerated.
+      number_of_calls, _ = profiler.GetStage('enumerate')
+      self.assertEqual(number_of_calls, 6)
+
+    self.assertEqual(paths, ['a_directory/a_file.txt'])
+
+  def testIterateFileEntriesWithProfiler(self):
+    """Tests the IterateFileEntries function with a profiler."""
+    with test_lib.TempDirectory() as temp_directory:
+      os.mkdir(os.path.join(temp_directory, 'a_directory'))
+
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_OS, location=temp_directory)
+      file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+      profiler = helpers.StageProfiler()
+      file_entries = list(helpers.IterateFileEntries(
+          file_entry, profiler=profiler))
+
+    self.assertEqual(len(file_entries), 2)
+
+    # The sub file entries of both directories are enumerated, including
+    # the end of each enumeration.
+    number_of_calls, _ = profiler.GetStage('enumerate')
+    self.assertEqual(number_of_calls, 3)
+
+  def testReadHexDigests(self):
+    """Tests the ReadHexDigests function."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.txt')
+      with open(path, 'w', encoding='utf-8') as file_object:
+        file_object.write((
+            '# Comment 39cb097008d17660abd0539891a672af\n'
+            '"SHA-1","MD5","CRC32","FileName"\n'
+            '"0000000F8527DCCAB6642252BBCFA1B8072D33EE",'
+            '"68CE322D8A896B6E4E7E3F18339EC85C","E39149E3","Blended_Coolers"\n'
+            '39CB097008D17660ABD0539891A672AF\n'
+            '\n'))
+
+      digests = list(helpers.ReadHexDigests(path, 16))
+
+    self.assertEqual(digests, [
+        bytes.fromhex('68ce322d8a896b6e4e7e3f18339ec85c'),
+        bytes.fromhex('39cb097008d17660abd0539891a672af')])
+
+
+class DisplayPathBuilderTest(test_lib.BaseTestCase):
+  """Tests for the display path builder."""
+
+  _ESCAPE_CHARACTERS = str.maketrans({
+      value: '\\x{0:02x}'.format(value)
+      for value in list(range(0, 0x20)) + list(range(0x7f, 0xa0))})
+
+  def _GetExpectedDisplayPath(self, path_spec, path_segments, data_stream_name):
+    """Retrieves a path to display without caching.
+
+    Args:
+      path_spec (dfvfs.PathSpec): path specification of the file entry.
+      path_segments (list[str]): path segments of the full path of the file
+          entry.
+      data_stream_name (str): name of the data stream.
+
+    Returns:
+      str: path to display.
+    """
+    display_path = ''
+    if path_spec.HasParent() and path_spec.parent.type_indicator in (
+        dfvfs_definitions.PARTITION_TABLE_TYPE_INDICATORS):
+      display_path = path_spec.parent.location
+
+    display_path = ''.join([display_path, '/'.join([
+        segment.translate(self._ESCAPE_CHARACTERS)
+        for segment in path_segments])])
+
+    if data_stream_name:
+      display_path = ':'.join([
+          display_path, data_stream_name.translate(self._ESCAPE_CHARACTERS)])
+
+    return display_path or '/'
+
+  def testGetDisplayPath(self):
+    """Tests the GetDisplayPath function."""
+    os_path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/image.raw')
+    path_specs = [os_path_spec]
+    for location in ('/p1', '/p2'):
+      partition_path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_TSK_PARTITION, location=location,
+          parent=os_path_spec)
+      path_specs.append(path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_TSK, location='/',
+          parent=partition_path_spec))
+
+    test_cases = [
+        ([''], ''),
+        (['', 'a_directory'], ''),
+        (['', 'a_directory', 'a_file'], ''),
+        (['', 'a_directory', 'a_file'], 'stream\x01'),
+        (['', 'a_directory', 'sub\ndirectory'], ''),
+        (['', 'a_directory', 'sub\ndirectory', 'a_file\x7f'], ''),
+        (['', 'a_directory', 'another_file'], ''),
+        (['', 'another_directory', 'sub\ndirectory', 'a_file'], ''),
+        (['', 'passwords.txt'], ''),
+        ([], ''),
+        (['directory'], '')]
+
+    test_builder = helpers.DisplayPathBuilder()
+
+    for path_spec in path_specs + list(reversed(path_specs)):
+      for path_segments, data_stream_name in test_cases:
+        display_path = test_builder.GetDisplayPath(
+            path_spec, path_segments, data_stream_name=data_stream_name)
+        expected_display_path = self._GetExpectedDisplayPath(
+            path_spec, path_segments, data_stream_name)
+        self.assertEqual(display_path, expected_display_path)
+
+    display_path = test_builder.GetDisplayPath(
+        path_specs[1], ['', 'a_directory', 'a\x00file'])
+    self.assertEqual(display_path, '/p1/a_directory/a\\x00file')
+
+
+class FileEntryFilterTest(test_lib.BaseTestCase):
+  """Tests for the file entry filter."""
+
+  def _GetFileEntry(self, temp_directory, path_segments):
+    """Retrieves a file entry.
+
+    Args:
+      temp_directory (str): path of the temporary directory.
+      path_segments (list[str]): path segments relative to the temporary
+          directory.
+
+    Returns:
+      dfvfs.FileEntry: file entry.
+    """
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS,
+        location=os.path.join(temp_directory, *path_segments))
+    return resolver.Resolver.OpenFileEntry(path_spec)
+
+  def testInitialize(self):
+    """Tests the __init__ function."""
+    file_entry_filter = helpers.FileEntryFilter(
+        exclude_patterns=['*.tmp'], file_types=['file'])
+    self.assertIsNotNone(file_entry_filter)
+
+    with self.assertRaises(ValueError):
+      helpers.FileEntryFilter(file_types=['bogus'])
+
+    with self.assertRaises(ValueError):
+      helpers.FileEntryFilter(include_regexes=['['])
+
+  def testGetStateAndSubState(self):
+    """Tests the GetState and GetSubState functions."""
+    file_entry_filter = helpers.FileEntryFilter(
+        exclude_patterns=['/Windows/Temp'], exclude_regexes=[r'\.tmp$'],
+        include_patterns=['/Windows/**/*.dll'])
+
+    state = file_entry_filter.GetState([''])
+    self.assertIsNotNone(state)
+    self.assertTrue(file_entry_filter.CanContainMatches(state))
+
+    sub_state = file_entry_filter.GetSubState(state, ['', 'Users'])
+    self.assertIsNotNone(sub_state)
+    self.assertFalse(file_entry_filter.CanContainMatches(sub_state))
+
+    sub_state = file_entry_filter.GetSubState(state, ['', 'windows'])
+    self.assertIsNotNone(sub_state)
+    self.assertTrue(file_entry_filter.CanContainMatches(sub_state))
+
+    state = file_entry_filter.GetState(['', 'Windows', 'Temp'])
+    self.assertIsNone(state)
+
+    state = file_entry_filter.GetState(['', 'Windows', 'System32', 'a.tmp'])
+    self.assertIsNone(state)
+
+  def testMatches(self):
+    """Tests the Matches function."""
+    with test_lib.TempDirectory() as temp_directory:
+      os.mkdir(os.path.join(temp_directory, 'a_directory'))
+      with open(os.path.join(temp_directory, 'a_file.txt'), 'wb') as (
+          file_object):
+        file_object.write(b'data')
+
+      directory_entry = self._GetFileEntry(temp_directory, ['a_directory'])
+      file_entry = self._GetFileEntry(temp_directory, ['a_file.txt'])
+
+      file_entry_filter = helpers.FileEntryFilter(
+          include_patterns=['*.TXT'])
+
+      path_segments = ['', 'a_file.txt']
+      state = file_entry_filter.GetState(path_segments)
+      self.assertTrue(file_entry_filter.Matches(
+          state, path_segments, file_entry))
+
+      path_segments = ['', 'a_directory']
+      state = file_entry_filter.GetState(path_segments)
+      self.assertFalse(file_entry_filter.Matches(
+          state, path_segments, directory_entry))
+
+      file_entry_filter = helpers.FileEntryFilter(
+          include_regexes=['^/a_directory$'])
+
+      state = file_entry_filter.GetState(path_segments)
+      self.assertTrue(file_entry_filter.Matches(
+          state, path_segments, directory_entry))
+
+      file_entry_filter = helpers.FileEntryFilter(
+          file_types=['file'], minimum_size=2)
+
+      state = file_entry_filter.GetState(path_segments)
+      self.assertFalse(file_entry_filter.Matches(
+          state, path_segments, directory_entry))
+
+      path_segments = ['', 'a_file.txt']
+      state = file_entry_filter.GetState(path_segments)
+      self.assertTrue(file_entry_filter.Matches(
+          state, path_segments, file_entry))
+
+      file_entry_filter = helpers.FileEntryFilter(maximum_size=2)
+
+      state = file_entry_filter.GetState(path_segments)
+      self.assertFalse(file_entry_filter.Matches(
+          state, path_segments, file_entry))
+
+
+class KnownHashesIndexTest(test_lib.BaseTestCase):
+  """Tests for the known hashes index."""
+
+  def testBuildAndContains(self):
+    """Tests the Build and Contains functions."""
+    digests = [
+        hashlib.sha256(str(index).encode('ascii')).digest()
+        for index in range(100)]
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'known.idx')
+
+      # A small sort run size is used to test merging the sorted runs.
+      with mock.patch.object(
+          helpers.KnownHashesIndex, '_MAXIMUM_SORT_RUN_SIZE', 16):
+        number_of_digests = helpers.KnownHashesIndex.Build(
+            path, 'sha256', reversed(digests + digests[:10]))
+
+      self.assertEqual(number_of_digests, 100)
+
+      known_hashes_index = helpers.KnownHashesIndex(path)
+      known_hashes_index.Open()
+
+      try:
+        self.assertEqual(known_hashes_index.hash_name, 'sha256')
+        self.assertEqual(known_hashes_index.number_of_digests, 100)
+
+        for digest in digests:
+          self.assertTrue(known_hashes_index.Contains(digest))
+
+        for index in range(100, 200):
+          digest = hashlib.sha256(str(index).encode('ascii')).digest()
+          self.assertFalse(known_hashes_index.Contains(digest))
+
+        digest = hashlib.md5(b'0').digest()
+        self.assertFalse(known_hashes_index.Contains(digest))
+
+      finally:
+        known_hashes_index.Close()
+
+  def testBuildWithUnsupportedDigest(self):
+    """Tests the Build function with a digest of an unsupported size."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'known.idx')
+
+      with self.assertRaises(ValueError):
+        helpers.KnownHashesIndex.Build(path, 'sha256', [b'\x00' * 16])
+
+  def testOpenWithUnsupportedFile(self):
+    """Tests the Open function with an unsupported file."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'known.idx')
+      with open(path, 'wb') as file_object:
+        file_object.write(b'\x00' * 128)
+
+      known_hashes_index = helpers.KnownHashesIndex(path)
+
+      with self.assertRaises(IOError):
+        known_hashes_index.Open()
+
+
+class PathPatternTrieTest(test_lib.BaseTestCase):
+  """Tests for the path pattern trie."""
+
+  def testCanMatchSubPaths(self):
+    """Tests the CanMatchSubPaths function."""
+    trie = helpers.PathPatternTrie(['/a_directory/a_file', '/b_directory/**'])
+
+    state = trie.GetInitialState()
+    self.assertTrue(trie.CanMatchSubPaths(state))
+
+    state = trie.GetNextState(trie.GetInitialState(), 'a_directory')
+    self.assertTrue(trie.CanMatchSubPaths(state))
+
+    state = trie.GetNextState(state, 'a_file')
+    self.assertTrue(trie.IsMatch(state))
+    self.assertFalse(trie.CanMatchSubPaths(state))
+
+    state = trie.GetNextState(trie.GetInitialState(), 'c_directory')
+    self.assertFalse(trie.CanMatchSubPaths(state))
+
+    state = trie.GetNextState(trie.GetInitialState(), 'b_directory')
+    state = trie.GetNextState(state, 'c_directory')
+    self.assertTrue(trie.CanMatchSubPaths(state))
+
+  def testMatches(self):
+    """Tests the Matches function."""
+    trie = helpers.PathPatternTrie([
+        '/pagefile.sys', '*.dll', '/Users/*/NTUSER.DAT', '/a/**/z',
+        'b?d/[0-9]'])
+
+    self.assertTrue(trie.Matches(['pagefile.sys']))
+    self.assertTrue(trie.Matches(['PAGEFILE.SYS']))
+    self.assertFalse(trie.Matches(['Windows', 'pagefile.sys']))
+
+    self.assertTrue(trie.Matches(['kernel32.dll']))
+    self.assertTrue(trie.Matches(['Windows', 'System32', 'KERNEL32.DLL']))
+    self.assertFalse(trie.Matches(['kernel32.dll.bak']))
+
+    self.assertTrue(trie.Matches(['Users', 'user', 'ntuser.dat']))
+    self.assertFalse(trie.Matches(['Users', 'ntuser.dat']))
+    self.assertFalse(trie.Matches(['Users', 'user', 'sub', 'ntuser.dat']))
+
+    self.assertTrue(trie.Matches(['a', 'z']))
+    self.assertTrue(trie.Matches(['a', 'b', 'c', 'z']))
+    self.assertFalse(trie.Matches(['a', 'b', 'c']))
+
+    self.assertTrue(trie.Matches(['x', 'bad', '1']))
+    self.assertFalse(trie.Matches(['x', 'bad', 'a']))
+
+    self.assertFalse(trie.Matches([]))
+
+
+class PromptTrackingMediatorTest(test_lib.BaseTestCase):
+  """Tests for the prompt tracking mediator."""
+
+  def testGetPartitionIdentifiers(self):
+    """Tests the GetPartitionIdentifiers function."""
+    mediator = mock.MagicMock()
+    mediator.GetPartitionIdentifiers.return_value = ['p1']
+
+    prompt_tracking_mediator = helpers.PromptTrackingMediator(mediator)
+
+    prompt_tracking_mediator.PrintWarning('warning')
+    mediator.PrintWarning.assert_called_once_with('warning')
+    self.assertFalse(prompt_tracking_mediator.prompted)
+
+    volume_identifiers = prompt_tracking_mediator.GetPartitionIdentifiers(
+        None, ['p1', 'p2'])
+    self.assertEqual(volume_identifiers, ['p1'])
+    self.assertTrue(prompt_tracking_mediator.prompted)
+
+
+class ScanResultCacheTest(test_lib.BaseTestCase):
+  """Tests for the scan result cache."""
+
+  def testGetAndSetBasePathSpecs(self):
+    """Tests the GetBasePathSpecs and SetBasePathSpecs functions."""
+    test_file_path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(test_file_path)
+
+    with test_lib.TempDirectory() as temp_directory:
+      source_path = os.path.join(temp_directory, 'image.qcow2')
+      shutil.copyfile(test_file_path, source_path)
+
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_OS, location=source_path)
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_QCOW, parent=path_spec)
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_EXT, location='/',
+          parent=path_spec)
+
+      path = os.path.join(temp_directory, 'scan_cache.json')
+      scan_result_cache = helpers.ScanResultCache(path)
+      scan_result_cache.Open()
+
+      base_path_specs = scan_result_cache.GetBasePathSpecs(source_path)
+      self.assertIsNone(base_path_specs)
+
+      scan_result_cache.SetBasePathSpecs(source_path, [path_spec])
+      scan_result_cache.Close()
+
+      scan_result_cache = helpers.ScanResultCache(path)
+      scan_result_cache.Open()
+
+      base_path_specs = scan_result_cache.GetBasePathSpecs(source_path)
+      self.assertEqual(base_path_specs, [path_spec])
+
+      # The cached result depends on the volume scanner options.
+      options = volume_scanner.VolumeScannerOptions()
+      options.partitions = ['all']
+
+      base_path_specs = scan_result_cache.GetBasePathSpecs(
+          source_path, options=options)
+      self.assertIsNone(base_path_specs)
+
+      # The cached result is not used when the source changes.
+      with open(source_path, 'ab') as file_object:
+        file_object.write(b'\x00')
+
+      base_path_specs = scan_result_cache.GetBasePathSpecs(source_path)
+      self.assertIsNone(base_path_specs)
+
+      # The results of a directory are not cached.
+      scan_result_cache.SetBasePathSpecs(temp_directory, [path_spec])
+      base_path_specs = scan_result_cache.GetBasePathSpecs(temp_directory)
+      self.assertIsNone(base_path_specs)
+
+      scan_result_cache.Close()
+
+  def testGetAndSetScanContext(self):
+    """Tests the GetScanContext and SetScanContext functions."""
+    source_path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(source_path)
+
+    scan_context = source_scanner.SourceScannerContext()
+    scan_context.OpenSourcePath(source_path)
+
+    test_source_scanner = source_scanner.SourceScanner()
+    test_source_scanner.Scan(scan_context)
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'scan_cache.json')
+      scan_result_cache = helpers.ScanResultCache(path)
+      scan_result_cache.Open()
+
+      scan_result_cache.SetScanContext(source_path, scan_context)
+
+      cached_scan_context = scan_result_cache.GetScanContext(source_path)
+
+      scan_result_cache.RemoveSource(source_path)
+      self.assertIsNone(scan_result_cache.GetScanContext(source_path))
+
+      scan_result_cache.Close()
+
+    self.assertIsNotNone(cached_scan_context)
+    self.assertEqual(
+        cached_scan_context.source_type, scan_context.source_type)
+
+    scan_node = scan_context.GetRootScanNode()
+    cached_scan_node = cached_scan_context.GetRootScanNode()
+    while scan_node:
+      self.assertEqual(cached_scan_node.path_spec, scan_node.path_spec)
+      self.assertEqual(
+          len(cached_scan_node.sub_nodes), len(scan_node.sub_nodes))
+
+      scan_node = scan_node.sub_nodes[0] if scan_node.sub_nodes else None
+      if cached_scan_node.sub_nodes:
+        cached_scan_node = cached_scan_node.sub_nodes[0]
+
+  def testSetBasePathSpecsWithEncryptedVolume(self):
+    """Tests the SetBasePathSpecs function with an encrypted volume."""
+    source_path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(source_path)
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location=source_path)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_BDE, parent=path_spec)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_NTFS, location='\\',
+        parent=path_spec)
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'scan_cache.json')
+      scan_result_cache = helpers.ScanResultCache(path)
+      scan_result_cache.Open()
+
+      scan_result_cache.SetBasePathSpecs(source_path, [path_spec])
+      base_path_specs = scan_result_cache.GetBasePathSpecs(source_path)
+
+      scan_result_cache.Close()
+
+      self.assertFalse(os.path.exists(path))
+
+    self.assertIsNone(base_path_specs)
+
+
+class StageProfilerTest(test_lib.BaseTestCase):
+  """Tests for the stage profiler."""
+
+  def testFormatReport(self):
+    """Tests the FormatReport function."""
+    profiler = helpers.StageProfiler()
+
+    with profiler.Time('read'):
+      pass
+
+    profiler.IncrementCounter('bytes_read', 512)
+
+    report = profiler.FormatReport()
+    lines = report.split('\n')
+
+    self.assertEqual(
+        lines[0].split(), ['Stage', 'Calls', 'Time', '(s)', 'Time', '(%)'])
+    self.assertEqual(lines[1].split()[:2], ['read', '1'])
+    self.assertEqual(lines[2].split()[0], 'total')
+    self.assertEqual(lines[-1].split(), ['bytes_read', '512'])
+
+  def testIncrementCounter(self):
+    """Tests the IncrementCounter function."""
+    profiler = helpers.StageProfiler()
+    self.assertEqual(profiler.GetCounter('bytes_read'), 0)
+
+    profiler.IncrementCounter('bytes_read', 512)
+    profiler.IncrementCounter('bytes_read', 64)
+    self.assertEqual(profiler.GetCounter('bytes_read'), 576)
+
+  def testTime(self):
+    """Tests the Time function."""
+    profiler = helpers.StageProfiler()
+    self.assertEqual(profiler.GetStage('read'), (0, 0.0))
+
+    with profiler.Time('read'):
+      pass
+
+    with self.assertRaises(ValueError):
+      with profiler.Time('read'):
+        raise ValueError('test')
+
+    number_of_calls, stage_time = profiler.GetStage('read')
+    self.assertEqual(number_of_calls, 2)
+    self.assertGreaterEqual(stage_time, 0.0)
+
+
+if __name__ == '__main__':
+  unittest.main()
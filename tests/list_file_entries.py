@@ -3,6 +3,7 @@
 """Tests for the file entry lister script."""
 
 import io
+import json
 import os
 import sys
 import unittest
@@ -11,6 +12,7 @@ from dfvfs.lib import definitions as dfvfs_definitions
 from dfvfs.resolver import resolver
 from dfvfs.path import factory as path_spec_factory
 
+from scripts import helpers
 from scripts import list_file_entries
 
 from tests import test_lib
@@ -32,6 +34,14 @@ class TestOutputWriter(list_file_entries.OutputWriter):
     super(TestOutputWriter, self).__init__(encoding=encoding)
     self.paths = []
 
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+    return
+
   def Close(self):
     """Closes the output writer object."""
     return
@@ -40,11 +50,13 @@ class TestOutputWriter(list_file_entries.OutputWriter):
     """Opens the output writer object."""
     return
 
-  def WriteFileEntry(self, path):
+  def WriteFileEntry(self, path, path_spec=None, size=None):
     """Writes the file path.
 
     Args:
       path (str): path of the file.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the file.
     """
     self.paths.append(path)
 
@@ -69,16 +81,14 @@ class FileEntryListerTest(test_lib.BaseTestCase):
         dfvfs_definitions.TYPE_INDICATOR_TSK, location='/passwords.txt',
         parent=path_spec)
 
-    file_system = resolver.Resolver.OpenFileSystem(path_spec)
     file_entry = resolver.Resolver.OpenFileEntry(path_spec)
 
-    output_writer = TestOutputWriter()
-    test_lister._ListFileEntry(file_system, file_entry, [''], output_writer)
+    records = list(test_lister._ListFileEntry(file_entry, ['']))
 
-    self.assertEqual(len(output_writer.paths), 1)
+    self.assertEqual(len(records), 1)
 
-    expected_paths = ['/passwords.txt']
-    self.assertEqual(output_writer.paths, expected_paths)
+    self.assertEqual(records[0].path, '/passwords.txt')
+    self.assertEqual(records[0].size, 116)
 
   def testListFileEntries(self):
     """Tests the ListFileEntries function."""
@@ -106,6 +116,76 @@ class FileEntryListerTest(test_lib.BaseTestCase):
     self.assertEqual(len(output_writer.paths), len(expected_paths))
     self.assertEqual(output_writer.paths, expected_paths)
 
+  def testIterateFileEntries(self):
+    """Tests the IterateFileEntries function."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    test_lister = list_file_entries.FileEntryLister()
+
+    base_path_specs = test_lister.GetBasePathSpecs(path)
+    records = list(test_lister.IterateFileEntries(base_path_specs))
+
+    self.assertGreaterEqual(len(records), 6)
+
+    self.assertEqual(records[5].path, '/passwords.txt')
+    self.assertEqual(records[5].path_spec.location, '/passwords.txt')
+    self.assertEqual(records[5].size, 116)
+
+    # The records do not have a dictionary of attributes.
+    with self.assertRaises(AttributeError):
+      records[5].error = None
+
+  def testListFileEntriesWithFilter(self):
+    """Tests the ListFileEntries function with a file entry filter."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    file_entry_filter = helpers.FileEntryFilter(
+        exclude_patterns=['/lost+found'], file_types=['directory'])
+    test_lister = list_file_entries.FileEntryLister(
+        file_entry_filter=file_entry_filter)
+
+    base_path_specs = test_lister.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+    test_lister.ListFileEntries(base_path_specs, output_writer)
+
+    expected_paths = ['/', '/a_directory']
+
+    if dfvfs_definitions.PREFERRED_EXT_BACK_END == (
+        dfvfs_definitions.TYPE_INDICATOR_TSK):
+      expected_paths.append('/$OrphanFiles')
+
+    self.assertEqual(output_writer.paths, expected_paths)
+
+  def testListFileEntriesWithWorkers(self):
+    """Tests the ListFileEntries function with worker processes."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    test_lister = list_file_entries.FileEntryLister(number_of_workers=2)
+
+    # The base path specification is listed twice, to test that the output
+    # of the worker processes is merged in order.
+    base_path_specs = test_lister.GetBasePathSpecs(path) * 2
+    output_writer = TestOutputWriter()
+    test_lister.ListFileEntries(base_path_specs, output_writer)
+
+    expected_paths = [
+        '/',
+        '/lost+found',
+        '/a_directory',
+        '/a_directory/another_file',
+        '/a_directory/a_file',
+        '/passwords.txt']
+
+    if dfvfs_definitions.PREFERRED_EXT_BACK_END == (
+        dfvfs_definitions.TYPE_INDICATOR_TSK):
+      expected_paths.append('/$OrphanFiles')
+
+    self.assertEqual(len(output_writer.paths), len(expected_paths) * 2)
+    self.assertEqual(output_writer.paths, expected_paths * 2)
+
   def testGetBasePathSpecs(self):
     """Tests the GetBasePathSpecs function."""
     path = self._GetTestFilePath(['image.qcow2'])
@@ -128,12 +208,22 @@ class FileEntryListerTest(test_lib.BaseTestCase):
 class OutputWriterTest(test_lib.BaseTestCase):
   """Tests for the output writer."""
 
+  # pylint: disable=protected-access
+
   def testInitialize(self):
     """Tests the __init__ function."""
     output_writer = list_file_entries.OutputWriter()
     self.assertIsNotNone(output_writer)
 
-  # TODO: add tests for _EncodeString
+  def testEncodeString(self):
+    """Tests the _EncodeString function."""
+    output_writer = list_file_entries.OutputWriter(encoding='ascii')
+
+    encoded_string = output_writer._EncodeString('/password.txt')
+    self.assertEqual(encoded_string, b'/password.txt')
+
+    encoded_string = output_writer._EncodeString('/pass\u00e9word.txt')
+    self.assertEqual(encoded_string, b'/pass?word.txt')
 
 
 class FileOutputWriterTest(test_lib.BaseTestCase):
@@ -155,6 +245,132 @@ class FileOutputWriterTest(test_lib.BaseTestCase):
     expected_output = '/password.txt'.encode('utf-8')
     self.assertEqual(output.rstrip(), expected_output)
 
+  def testWriteFileEntryWithBatchSize(self):
+    """Tests the WriteFileEntry function with a batch size."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'paths.txt')
+      output_writer = list_file_entries.FileOutputWriter(path, batch_size=2)
+
+      output_writer.Open()
+      output_writer.WriteFileEntry('/a_file')
+      self.assertEqual(os.path.getsize(path), 0)
+
+      output_writer.WriteFileEntry('/another_file')
+      self.assertEqual(os.path.getsize(path), 22)
+
+      output_writer.WriteFileEntry('/password.txt')
+      self.assertEqual(os.path.getsize(path), 22)
+
+      output_writer.Close()
+
+      with io.open(path, mode='rb') as file_object:
+        output = file_object.read()
+
+    expected_output = b'/a_file\n/another_file\n/password.txt\n'
+    self.assertEqual(output, expected_output)
+
+
+class CSVOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the comma separated values (CSV) output writer."""
+
+  def testWriteFileEntry(self):
+    """Tests the WriteFileEntry function."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'paths.csv')
+      output_writer = list_file_entries.CSVOutputWriter(path)
+
+      output_writer.Open()
+      output_writer.WriteFileEntry('/pass,word.txt', size=116)
+      output_writer.Close()
+
+      with io.open(path, mode='rb') as file_object:
+        output = file_object.read()
+
+    expected_output = b'path,path_spec,size\n"/pass,word.txt",,116\n'
+    self.assertEqual(output, expected_output)
+
+
+class JSONLinesOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the JSON Lines output writer."""
+
+  def testWriteFileEntry(self):
+    """Tests the WriteFileEntry function."""
+    test_path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/passwords.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'paths.jsonl')
+      output_writer = list_file_entries.JSONLinesOutputWriter(path)
+
+      output_writer.Open()
+      output_writer.WriteFileEntry(
+          '/passwords.txt', path_spec=test_path_spec, size=116)
+      output_writer.Close()
+
+      with io.open(path, mode='rt', encoding='utf-8') as file_object:
+        lines = file_object.readlines()
+
+    self.assertEqual(len(lines), 1)
+
+    expected_json_dict = {
+        'path': '/passwords.txt',
+        'path_spec': 'type: OS, location: /passwords.txt\n',
+        'size': 116}
+    self.assertEqual(json.loads(lines[0]), expected_json_dict)
+
+
+@unittest.skipIf(list_file_entries.pyarrow is None, 'missing pyarrow')
+class ParquetOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the Apache Parquet output writer."""
+
+  def testWriteFileEntry(self):
+    """Tests the WriteFileEntry function."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'paths.parquet')
+      output_writer = list_file_entries.ParquetOutputWriter(path)
+
+      output_writer.Open()
+      output_writer.WriteFileEntry('/a_directory', size=1024)
+      output_writer.WriteFileEntry('/passwords.txt', size=116)
+      output_writer.Close()
+
+      table = list_file_entries.parquet.read_table(path)
+
+    self.assertEqual(table.column_names, ['path', 'path_spec', 'size'])
+    self.assertEqual(table.column('path').to_pylist(), [
+        '/a_directory', '/passwords.txt'])
+    self.assertEqual(table.column('size').to_pylist(), [1024, 116])
+
+
+class SpoolOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the spool output writer."""
+
+  def testWriteFileEntry(self):
+    """Tests the WriteFileEntry, WriteRecord and ReadRecords functions."""
+    test_path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/passwords.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'paths.spool')
+      output_writer = list_file_entries.SpoolOutputWriter(path, batch_size=2)
+
+      output_writer.Open()
+      output_writer.WriteFileEntry('/a_directory', size=1024)
+      output_writer.WriteRecord(list_file_entries.FileEntryRecord('/a_file'))
+      output_writer.WriteFileEntry(
+          '/passwords.txt', path_spec=test_path_spec, size=116)
+      output_writer.Close()
+
+      file_entries = [
+          (record.path, record.path_spec, record.size)
+          for record in output_writer.ReadRecords()]
+
+    expected_file_entries = [
+        ('/a_directory', None, 1024),
+        ('/a_file', None, None),
+        ('/passwords.txt', test_path_spec, 116)]
+    self.assertEqual(file_entries, expected_file_entries)
+
 
 class StdoutWriterTest(test_lib.BaseTestCase):
   """Tests for the stdout output writer."""
@@ -2,25 +2,68 @@
 # -*- coding: utf-8 -*-
 """Tests for the recursive hasher script."""
 
+import hashlib
 import io
+import json
 import os
 import sys
+import threading
 import unittest
 
+from unittest import mock
+
 from dfvfs.lib import definitions as dfvfs_definitions
+from dfvfs.lib import errors as dfvfs_errors
 from dfvfs.resolver import resolver
 from dfvfs.path import factory as path_spec_factory
 
+from scripts import helpers
 from scripts import recursive_hasher
 
 from tests import test_lib
 
 
+class ShortReadFileObject(io.BytesIO):
+  """File-like object that returns at most 5 bytes per read."""
+
+  # pylint: disable=invalid-name
+
+  _MAXIMUM_READ_SIZE = 5
+
+  def read(self, size=-1):
+    """Reads data.
+
+    Args:
+      size (Optional[int]): number of bytes to read, where -1 represents all
+          remaining data.
+
+    Returns:
+      bytes: data read.
+    """
+    if size < 0 or size > self._MAXIMUM_READ_SIZE:
+      size = self._MAXIMUM_READ_SIZE
+    return super(ShortReadFileObject, self).read(size)
+
+  def readinto(self, buffer):
+    """Reads data into a buffer.
+
+    Args:
+      buffer (bytearray|memoryview): buffer to read into.
+
+    Returns:
+      int: number of bytes read.
+    """
+    return super(ShortReadFileObject, self).readinto(
+        memoryview(buffer)[:self._MAXIMUM_READ_SIZE])
+
+
 class TestOutputWriter(recursive_hasher.OutputWriter):
   """Output writer for testing the recursive hasher script.
 
   Attributes:
-    hashes (list[tuple[str, str]]): paths and their corresponding hash value.
+    hashes (list[tuple[str, dict[str, str]]]): paths and their corresponding
+        hash values.
+    tags (list[str]): tags of the paths.
   """
 
   def __init__(self, encoding='utf-8'):
@@ -31,6 +74,15 @@ class TestOutputWriter(recursive_hasher.OutputWriter):
     """
     super(TestOutputWriter, self).__init__(encoding=encoding)
     self.hashes = []
+    self.tags = []
+
+  def _WriteRecords(self, records):
+    """Writes buffered records of output.
+
+    Args:
+      records (list[object]): buffered records of output.
+    """
+    return
 
   def Close(self):
     """Closes the output writer object."""
@@ -40,14 +92,22 @@ class TestOutputWriter(recursive_hasher.OutputWriter):
     """Opens the output writer object."""
     return
 
-  def WriteFileHash(self, path, hash_value):
-    """Writes the file path and hash.
+  def WriteFileHash(
+      self, path, hash_values, data_stream_name=None, path_spec=None,
+      size=None, tag=None):
+    """Writes the file path and hashes.
 
     Args:
       path (str): path of the file.
-      hash_value (str): message digest hash calculated over the file data.
+      hash_values (dict[str, str]): message digest hashes calculated over
+          the file data per hash name.
+      data_stream_name (Optional[str]): name of the data stream.
+      path_spec (Optional[dfvfs.PathSpec]): path specification of the file.
+      size (Optional[int]): size of the data stream.
+      tag (Optional[str]): tag of the data stream, such as "known_bad".
     """
-    self.hashes.append((path, hash_value))
+    self.hashes.append((path, hash_values))
+    self.tags.append(tag)
 
 
 class RecursiveHasherTest(test_lib.BaseTestCase):
@@ -72,11 +132,123 @@ class RecursiveHasherTest(test_lib.BaseTestCase):
 
     file_entry = resolver.Resolver.OpenFileEntry(path_spec)
 
-    expected_digest_hash = (
-        '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')
-
-    digest_hash = test_hasher._CalculateHashDataStream(file_entry, '')
-    self.assertEqual(digest_hash, expected_digest_hash)
+    expected_digest_hashes = {
+        'sha256': (
+            '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')}
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
+
+    test_hasher = recursive_hasher.RecursiveHasher(
+        hash_names=['md5', 'sha1', 'sha256'])
+
+    expected_digest_hashes = {
+        'md5': '39cb097008d17660abd0539891a672af',
+        'sha1': '677bc4ec72665fabac0bc91cd4e423a535a0cae4',
+        'sha256': (
+            '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')}
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
+
+    # Test with a read buffer size that causes the data to be hashed on
+    # a separate thread.
+    test_hasher = recursive_hasher.RecursiveHasher(
+        hash_names=['md5', 'sha1', 'sha256'], read_buffer_size=16)
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
+
+    # Test with a maximum read buffer memory that allows a single read buffer.
+    test_hasher = recursive_hasher.RecursiveHasher(
+        hash_names=['md5', 'sha1', 'sha256'], maximum_read_buffer_memory=16,
+        read_buffer_size=64)
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
+
+  def testCalculateHashDataStreamWithReadinto(self):
+    """Tests the _CalculateHashDataStream function with readinto."""
+    test_hasher = recursive_hasher.RecursiveHasher(read_buffer_size=16)
+
+    file_entry = mock.MagicMock()
+    file_entry.IsDevice.return_value = False
+    file_entry.IsPipe.return_value = False
+    file_entry.IsSocket.return_value = False
+    file_entry.GetFileObject.return_value = io.BytesIO(b'A' * 100)
+    file_entry.GetFileObject.return_value.get_size = lambda: 100
+
+    expected_digest_hashes = {
+        'sha256': (
+            'd82c6aa133a0fc25b087f46ad7ed2a3042772e612e015571e61753ff55ba6da8')}
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
+
+    # All the read buffers should have been freed.
+    self.assertEqual(test_hasher._read_buffer_pool._number_of_buffers_in_use, 0)
+
+  def testCalculateHashDataStreamWithHashThreadError(self):
+    """Tests the _CalculateHashDataStream function with a hash thread error."""
+    test_hasher = recursive_hasher.RecursiveHasher(read_buffer_size=16)
+
+    file_entry = mock.MagicMock()
+    file_entry.IsDevice.return_value = False
+    file_entry.IsPipe.return_value = False
+    file_entry.IsSocket.return_value = False
+    file_entry.GetFileObject.return_value = io.BytesIO(b'A' * 100)
+    file_entry.GetFileObject.return_value.get_size = lambda: 100
+
+    hash_context = mock.MagicMock()
+    hash_context.update.side_effect = RuntimeError('hash error')
+
+    # The data stream spans more read buffers than the pool contains, hence
+    # reading would block if the hash thread did not free the read buffers.
+    with mock.patch.object(
+        recursive_hasher.hashlib, 'new', return_value=hash_context):
+      with self.assertRaises(RuntimeError):
+        test_hasher._CalculateHashDataStream(file_entry, '')
+
+    # All the read buffers should have been freed.
+    self.assertEqual(test_hasher._read_buffer_pool._number_of_buffers_in_use, 0)
+
+  def testCalculateHashDataStreamWithSparseExtents(self):
+    """Tests the _CalculateHashDataStream function with sparse extents."""
+    test_hasher = recursive_hasher.RecursiveHasher(read_buffer_size=16)
+
+    # The sparse range contains non-zero data to detect that it is read.
+    data = b'A' * 32 + b'B' * 48 + b'C' * 20
+
+    file_entry = mock.MagicMock()
+    file_entry.IsDevice.return_value = False
+    file_entry.IsPipe.return_value = False
+    file_entry.IsSocket.return_value = False
+    file_entry.GetFileObject.return_value = io.BytesIO(data)
+    file_entry.GetFileObject.return_value.get_size = lambda: len(data)
+    file_entry.GetExtents.return_value = [
+        mock.MagicMock(extent_type='data', size=32),
+        mock.MagicMock(
+            extent_type=test_hasher._EXTENT_TYPE_SPARSE, size=48),
+        mock.MagicMock(extent_type='data', size=32)]
+
+    expected_digest_hashes = {
+        'sha256': hashlib.sha256(
+            b'A' * 32 + b'\x00' * 48 + b'C' * 20).hexdigest()}
+
+    digest_hashes, error = test_hasher._CalculateHashDataStream(
+        file_entry, '')
+    self.assertEqual(digest_hashes, expected_digest_hashes)
+    self.assertIsNone(error)
 
   def testCalculateHashesFileEntry(self):
     """Tests the _CalculateHashesFileEntry function."""
@@ -93,19 +265,17 @@ class RecursiveHasherTest(test_lib.BaseTestCase):
         dfvfs_definitions.TYPE_INDICATOR_TSK, location='/passwords.txt',
         parent=path_spec)
 
-    file_system = resolver.Resolver.OpenFileSystem(path_spec)
     file_entry = resolver.Resolver.OpenFileEntry(path_spec)
 
-    output_writer = TestOutputWriter()
-    test_hasher._CalculateHashesFileEntry(
-        file_system, file_entry, [''], output_writer)
+    records = list(test_hasher._CalculateHashesFileEntry(file_entry, ['']))
 
-    self.assertEqual(len(output_writer.hashes), 1)
+    self.assertEqual(len(records), 1)
 
-    expected_hashes = [
-        ('/passwords.txt',
-         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')]
-    self.assertEqual(output_writer.hashes, expected_hashes)
+    self.assertEqual(records[0].path, '/passwords.txt')
+    self.assertEqual(records[0].hash_values, {'sha256': (
+        '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})
+    self.assertIsNone(records[0].error)
+    self.assertEqual(records[0].size, 116)
 
   def testGetDisplayPath(self):
     """Tests the _GetDisplayPath function."""
@@ -140,14 +310,728 @@ class RecursiveHasherTest(test_lib.BaseTestCase):
     self.assertEqual(len(output_writer.hashes), 3)
 
     expected_hashes = [
-        ('/a_directory/another_file',
-         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16'),
-        ('/a_directory/a_file',
-         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d'),
-        ('/passwords.txt',
-         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')]
+        ('/a_directory/another_file', {'sha256': (
+         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')}),
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+    self.assertEqual(output_writer.hashes, expected_hashes)
+
+  def testIterateHashes(self):
+    """Tests the IterateHashes function."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    records = list(test_hasher.IterateHashes(base_path_specs))
+
+    self.assertEqual(len(records), 3)
+
+    record = records[2]
+    self.assertEqual(record.data_stream_name, '')
+    self.assertIsNone(record.error)
+    self.assertEqual(record.hash_values, {'sha256': (
+        '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})
+    self.assertEqual(record.path, '/passwords.txt')
+    self.assertEqual(record.path_spec.location, '/passwords.txt')
+    self.assertEqual(record.size, 116)
+    self.assertIsNone(record.tag)
+
+    with mock.patch.object(
+        test_hasher, '_CalculateHashDataStream',
+        return_value=(None, 'Unable to read data stream')):
+      records = list(test_hasher.IterateHashes(base_path_specs))
+
+    self.assertEqual(len(records), 3)
+
+    record = records[2]
+    self.assertEqual(record.error, 'Unable to read data stream')
+    self.assertIsNone(record.hash_values)
+
+  def testCalculateHashesWithExtentOrder(self):
+    """Tests the CalculateHashes function with extent order."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    expected_hashes = [
+        ('/a_directory/another_file', {'sha256': (
+         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')}),
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+
+    # The data streams should be hashed in ascending order of the offsets,
+    # where the data streams without an offset are hashed last.
+    extent_offsets = {
+        '/a_directory/another_file': 2048,
+        '/a_directory/a_file': 1024}
+
+    test_hasher = recursive_hasher.RecursiveHasher(extent_order=True)
+
+    hashed_locations = []
+    calculate_hash_data_stream = test_hasher._CalculateHashDataStream
+
+    def _CalculateHashDataStream(file_entry, data_stream_name):
+      hashed_locations.append(file_entry.path_spec.location)
+      return calculate_hash_data_stream(file_entry, data_stream_name)
+
+    def _GetFirstExtentOffset(file_entry, data_stream_name):
+      # pylint: disable=unused-argument
+      return extent_offsets.get(file_entry.path_spec.location, None)
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+
+    with mock.patch.object(
+        test_hasher, '_CalculateHashDataStream',
+        side_effect=_CalculateHashDataStream):
+      with mock.patch.object(
+          test_hasher, '_GetFirstExtentOffset',
+          side_effect=_GetFirstExtentOffset):
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(hashed_locations, [
+        '/a_directory/a_file', '/a_directory/another_file', '/passwords.txt'])
+    self.assertEqual(output_writer.hashes, expected_hashes)
+
+    test_hasher = recursive_hasher.RecursiveHasher(
+        extent_order=True, number_of_workers=2)
+
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(output_writer.hashes, expected_hashes)
+
+  def testCalculateHashesWithProfiler(self):
+    """Tests the CalculateHashes function with a profiler."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    profiler = helpers.StageProfiler()
+    test_hasher = recursive_hasher.RecursiveHasher(profiler=profiler)
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 3)
+
+    number_of_calls, _ = profiler.GetStage('volume_scan')
+    self.assertEqual(number_of_calls, 1)
+
+    number_of_calls, _ = profiler.GetStage('open')
+    self.assertEqual(number_of_calls, 3)
+
+    number_of_calls, _ = profiler.GetStage('output')
+    self.assertEqual(number_of_calls, 3)
+
+    self.assertEqual(profiler.GetCounter('data_streams'), 3)
+    self.assertEqual(profiler.GetCounter('bytes_read'), 191)
+
+  def testCalculateHashesWithWorkers(self):
+    """Tests the CalculateHashes function with worker processes."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    test_hasher = recursive_hasher.RecursiveHasher(number_of_workers=2)
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 3)
+
+    expected_hashes = [
+        ('/a_directory/another_file', {'sha256': (
+         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')}),
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+    self.assertEqual(output_writer.hashes, expected_hashes)
+
+  def _CreateHardLinks(self, temp_directory):
+    """Creates a directory with a file that has hard links.
+
+    Args:
+      temp_directory (str): path of the temporary directory.
+
+    Returns:
+      str: path of the directory.
+    """
+    path = os.path.join(temp_directory, 'hard_links')
+    os.mkdir(path)
+
+    with open(os.path.join(path, 'a_file'), 'wb') as file_object:
+      file_object.write(b'A' * 4096)
+
+    os.link(os.path.join(path, 'a_file'), os.path.join(path, 'b_link'))
+    os.link(os.path.join(path, 'a_file'), os.path.join(path, 'c_link'))
+
+    return path
+
+  def testCalculateHashesWithHardLinks(self):
+    """Tests the CalculateHashes function with hard links."""
+    if not hasattr(os, 'link'):
+      raise unittest.SkipTest('missing hard link support')
+
+    expected_hash_value = hashlib.sha256(b'A' * 4096).hexdigest()
+
+    for number_of_workers in (1, 2):
+      with test_lib.TempDirectory() as temp_directory:
+        path = self._CreateHardLinks(temp_directory)
+
+        profiler = helpers.StageProfiler()
+        test_hasher = recursive_hasher.RecursiveHasher(
+            number_of_workers=number_of_workers, profiler=profiler)
+
+        base_path_specs = test_hasher.GetBasePathSpecs(path)
+        output_writer = TestOutputWriter()
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+      paths = [os.path.basename(path) for path, _ in output_writer.hashes]
+      self.assertEqual(sorted(paths), ['a_file', 'b_link', 'c_link'])
+
+      for _, hash_values in output_writer.hashes:
+        self.assertEqual(hash_values, {'sha256': expected_hash_value})
+
+      self.assertEqual(profiler.GetCounter('bytes_read'), 4096)
+      self.assertEqual(profiler.GetCounter('hard_links'), 2)
+
+  def testCalculateHashesWithHardLinksInExtentOrder(self):
+    """Tests the CalculateHashes function with hard links in extent order."""
+    if not hasattr(os, 'link'):
+      raise unittest.SkipTest('missing hard link support')
+
+    expected_hash_value = hashlib.sha256(b'A' * 4096).hexdigest()
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = self._CreateHardLinks(temp_directory)
+
+      profiler = helpers.StageProfiler()
+      test_hasher = recursive_hasher.RecursiveHasher(
+          extent_order=True, profiler=profiler)
+
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+      output_writer = TestOutputWriter()
+      test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 3)
+
+    for _, hash_values in output_writer.hashes:
+      self.assertEqual(hash_values, {'sha256': expected_hash_value})
+
+    self.assertEqual(profiler.GetCounter('bytes_read'), 4096)
+    self.assertEqual(profiler.GetCounter('hard_links'), 2)
+
+  def testCalculateHashesFileEntryInExtentOrderWithBackEndError(self):
+    """Tests the _CalculateHashesFileEntryInExtentOrder function with errors."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'a_file')
+      with open(path, 'wb') as file_object:
+        file_object.write(b'A' * 4096)
+
+      test_hasher = recursive_hasher.RecursiveHasher(extent_order=True)
+
+      path_spec = path_spec_factory.Factory.NewPathSpec(
+          dfvfs_definitions.TYPE_INDICATOR_OS, location=temp_directory)
+      file_entry = recursive_hasher.resolver.Resolver.OpenFileEntry(path_spec)
+
+      with mock.patch.object(
+          recursive_hasher.resolver.Resolver, 'OpenFileEntry',
+          side_effect=dfvfs_errors.BackEndError('error')):
+        records = list(test_hasher._CalculateHashesFileEntryInExtentOrder(
+            None, file_entry, ['']))
+
+    self.assertEqual(len(records), 1)
+    self.assertIsNone(records[0].hash_values)
+    self.assertEqual(records[0].error, 'Unable to open file entry')
+
+  def testCalculateHashesWithoutHardLinkCache(self):
+    """Tests the CalculateHashes function without a hard link cache."""
+    if not hasattr(os, 'link'):
+      raise unittest.SkipTest('missing hard link support')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = self._CreateHardLinks(temp_directory)
+
+      profiler = helpers.StageProfiler()
+      test_hasher = recursive_hasher.RecursiveHasher(
+          hard_link_cache_size=0, profiler=profiler)
+
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+      output_writer = TestOutputWriter()
+      test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 3)
+    self.assertEqual(profiler.GetCounter('bytes_read'), 3 * 4096)
+    self.assertEqual(profiler.GetCounter('hard_links'), 0)
+
+  def testCalculateHashesWithKnownHashes(self):
+    """Tests the CalculateHashes function with known hashes."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    with test_lib.TempDirectory() as temp_directory:
+      known_bad_path = os.path.join(temp_directory, 'known_bad.idx')
+      helpers.KnownHashesIndex.Build(known_bad_path, 'sha256', [bytes.fromhex(
+          '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')])
+
+      known_good_path = os.path.join(temp_directory, 'known_good.idx')
+      helpers.KnownHashesIndex.Build(known_good_path, 'sha256', [bytes.fromhex(
+          'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')])
+
+      known_bad_index = helpers.KnownHashesIndex(known_bad_path)
+      known_bad_index.Open()
+
+      known_good_index = helpers.KnownHashesIndex(known_good_path)
+      known_good_index.Open()
+
+      try:
+        profiler = helpers.StageProfiler()
+        test_hasher = recursive_hasher.RecursiveHasher(
+            known_hashes=[
+                (known_bad_index, 'known_bad', False),
+                (known_good_index, 'known_good', True)],
+            profiler=profiler)
+
+        base_path_specs = test_hasher.GetBasePathSpecs(path)
+        output_writer = TestOutputWriter()
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+      finally:
+        known_bad_index.Close()
+        known_good_index.Close()
+
+    expected_hashes = [
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+    self.assertEqual(output_writer.hashes, expected_hashes)
+    self.assertEqual(output_writer.tags, [None, 'known_bad'])
+
+    self.assertEqual(profiler.GetCounter('known_bad'), 1)
+    self.assertEqual(profiler.GetCounter('known_good'), 1)
+
+  def testCalculateHashesWithVolumeWorkers(self):
+    """Tests the CalculateHashes function with volume worker processes."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    profiler = helpers.StageProfiler()
+    test_hasher = recursive_hasher.RecursiveHasher(
+        number_of_volume_workers=2, profiler=profiler)
+
+    # The base path specification is processed twice, to test that the output
+    # of the worker processes is merged in order.
+    base_path_specs = test_hasher.GetBasePathSpecs(path) * 2
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 6)
+
+    expected_hashes = [
+        ('/a_directory/another_file', {'sha256': (
+         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')}),
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+    self.assertEqual(output_writer.hashes, expected_hashes * 2)
+
+    self.assertEqual(profiler.GetCounter('data_streams'), 6)
+
+    # Options that the volume workers do not support are rejected.
+    with self.assertRaises(ValueError):
+      recursive_hasher.RecursiveHasher(
+          duplicates_only=True, number_of_volume_workers=2)
+
+    with self.assertRaises(ValueError):
+      recursive_hasher.RecursiveHasher(
+          hash_cache=recursive_hasher.HashCache(''),
+          number_of_volume_workers=2)
+
+    with self.assertRaises(ValueError):
+      recursive_hasher.RecursiveHasher(
+          number_of_volume_workers=2, number_of_workers=2)
+
+  def testCalculateHashesWithVolumeWorkersAndKnownHashes(self):
+    """Tests the CalculateHashes function with known hashes and workers."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    with test_lib.TempDirectory() as temp_directory:
+      known_good_path = os.path.join(temp_directory, 'known_good.idx')
+      helpers.KnownHashesIndex.Build(known_good_path, 'sha256', [bytes.fromhex(
+          'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')])
+
+      known_good_index = helpers.KnownHashesIndex(known_good_path)
+      known_good_index.Open()
+
+      try:
+        test_hasher = recursive_hasher.RecursiveHasher(
+            known_hashes=[(known_good_index, 'known_good', True)],
+            number_of_volume_workers=2)
+
+        base_path_specs = test_hasher.GetBasePathSpecs(path) * 2
+        output_writer = TestOutputWriter()
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+      finally:
+        known_good_index.Close()
+
+    paths = [path for path, _ in output_writer.hashes]
+    self.assertEqual(paths, ['/a_directory/a_file', '/passwords.txt'] * 2)
+
+  def testCalculateHashesWithFileEntryFilter(self):
+    """Tests the CalculateHashes function with a file entry filter."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    file_entry_filter = helpers.FileEntryFilter(
+        exclude_patterns=['/a_directory/another_file'],
+        include_patterns=['/a_directory/*'])
+    test_hasher = recursive_hasher.RecursiveHasher(
+        file_entry_filter=file_entry_filter)
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    expected_hashes = [
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')})]
     self.assertEqual(output_writer.hashes, expected_hashes)
 
+  def testCalculateHashesWithSkipHashingPatterns(self):
+    """Tests the CalculateHashes function with skip hashing patterns."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    test_hasher = recursive_hasher.RecursiveHasher(
+        skip_hashing_patterns=['/PASSWORDS.*'])
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    output_writer = TestOutputWriter()
+    test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    self.assertEqual(len(output_writer.hashes), 3)
+    self.assertEqual(
+        output_writer.hashes[2], ('/passwords.txt', {'sha256': 'N/A'}))
+
+  def testCalculateHashesWithDuplicatesOnly(self):
+    """Tests the CalculateHashes function with duplicates only."""
+    test_hasher = recursive_hasher.RecursiveHasher(duplicates_only=True)
+
+    test_files = [
+        ('empty1', b''),
+        ('empty2', b''),
+        ('middle1', b'0123456789abcdef'),
+        ('middle2', b'01234567X9abcdef'),
+        ('same1', b'0123456789abcdef'),
+        ('same2', b'0123'),
+        ('same3', b'0123'),
+        ('unique', b'012')]
+
+    with test_lib.TempDirectory() as temp_directory:
+      for filename, data in test_files:
+        with open(os.path.join(temp_directory, filename), 'wb') as file_object:
+          file_object.write(data)
+
+      base_path_specs = test_hasher.GetBasePathSpecs(temp_directory)
+      output_writer = TestOutputWriter()
+
+      with mock.patch.object(
+          recursive_hasher.RecursiveHasher, '_PARTIAL_HASH_BLOCK_SIZE', 4):
+        with mock.patch.object(
+            test_hasher, '_CalculateHashDataStream',
+            wraps=test_hasher._CalculateHashDataStream) as mock_calculate:
+          test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+          # middle1, middle2 and same1 share a partial hash and same2 and
+          # same3 are too small to calculate a partial hash.
+          self.assertEqual(mock_calculate.call_count, 5)
+
+    hashes = sorted(
+        (os.path.basename(path), hash_values['sha256'])
+        for path, hash_values in output_writer.hashes)
+
+    expected_hashes = [
+        ('middle1', (
+         '9f9f5111f7b27a781f1f1ddde5ebc2dd2b796bfc7365c9c28b548e564176929f')),
+        ('same1', (
+         '9f9f5111f7b27a781f1f1ddde5ebc2dd2b796bfc7365c9c28b548e564176929f')),
+        ('same2', (
+         '1be2e452b46d7a0d9656bbb1f768e8248eba1b75baed65f5d99eafa948899a6a')),
+        ('same3', (
+         '1be2e452b46d7a0d9656bbb1f768e8248eba1b75baed65f5d99eafa948899a6a'))]
+    self.assertEqual(hashes, expected_hashes)
+
+  def testCalculateHashesWithDuplicatesOnlyAndMissingFileEntry(self):
+    """Tests the CalculateHashes function with a file entry that is missing."""
+    test_hasher = recursive_hasher.RecursiveHasher(duplicates_only=True)
+
+    with test_lib.TempDirectory() as temp_directory:
+      for filename in ('same1', 'same2', 'same3'):
+        with open(os.path.join(temp_directory, filename), 'wb') as file_object:
+          file_object.write(b'0123')
+
+      base_path_specs = test_hasher.GetBasePathSpecs(temp_directory)
+      output_writer = TestOutputWriter()
+
+      open_file_entry = test_hasher._OpenFileEntry
+
+      def _OpenFileEntry(path_spec):
+        """Opens a file entry, where same1 cannot be opened."""
+        if path_spec.location.endswith('same1'):
+          return None
+        return open_file_entry(path_spec)
+
+      with mock.patch.object(
+          test_hasher, '_OpenFileEntry', side_effect=_OpenFileEntry):
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+
+    paths = sorted(
+        os.path.basename(path) for path, _ in output_writer.hashes)
+    self.assertEqual(paths, ['same2', 'same3'])
+
+  def testIterateHashesWithCheckpointJournal(self):
+    """Tests the IterateHashes function with a checkpoint journal."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    with test_lib.TempDirectory() as temp_directory:
+      journal_path = os.path.join(temp_directory, 'checkpoint.jsonl')
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(journal_path)
+      checkpoint_journal.Open()
+
+      test_hasher = recursive_hasher.RecursiveHasher(
+          checkpoint_journal=checkpoint_journal)
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+
+      # Simulate a run that is interrupted before the output of the yielded
+      # record was written.
+      records = test_hasher.IterateHashes(base_path_specs)
+      next(records)
+      records.close()
+
+      self.assertEqual(checkpoint_journal.number_of_entries, 0)
+      checkpoint_journal.Close()
+
+  def testCalculateHashesWithCheckpointJournal(self):
+    """Tests the CalculateHashes function with a checkpoint journal."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    with test_lib.TempDirectory() as temp_directory:
+      journal_path = os.path.join(temp_directory, 'checkpoint.jsonl')
+
+      test_hasher = recursive_hasher.RecursiveHasher()
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+
+      file_entry = resolver.Resolver.OpenFileEntry(base_path_specs[0])
+      file_entry = file_entry.GetSubFileEntryByName('passwords.txt')
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(journal_path)
+      checkpoint_journal.Open()
+      checkpoint_journal.WriteEntry(
+          file_entry.path_spec, '', {'sha256': 'N/A'})
+      checkpoint_journal.Flush()
+      checkpoint_journal.Close()
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(journal_path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 1)
+
+      test_hasher = recursive_hasher.RecursiveHasher(
+          checkpoint_journal=checkpoint_journal)
+
+      output_writer = TestOutputWriter()
+      test_hasher.CalculateHashes(base_path_specs, output_writer)
+      checkpoint_journal.Close()
+
+      expected_hashes = [
+          ('/a_directory/another_file', {'sha256': (
+              'c7fbc0e821c0871805a99584c6a38453'
+              '3909f68a6bbe9a2a687d28d9f3b10c16')}),
+          ('/a_directory/a_file', {'sha256': (
+              '4a49638d0e1055fd9e4c17fef7fdf4d6'
+              'ccf892b6d9c2f64164203c4bfb0ec92d')})]
+      self.assertEqual(output_writer.hashes, expected_hashes)
+
+      # A restarted run should skip all the data streams.
+      checkpoint_journal = recursive_hasher.CheckpointJournal(journal_path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 3)
+
+      test_hasher = recursive_hasher.RecursiveHasher(
+          checkpoint_journal=checkpoint_journal)
+
+      output_writer = TestOutputWriter()
+      test_hasher.CalculateHashes(base_path_specs, output_writer)
+      checkpoint_journal.Close()
+
+      self.assertEqual(output_writer.hashes, [])
+
+  def testCalculateHashesWithHashCache(self):
+    """Tests the CalculateHashes function with a hash cache."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    expected_hashes = [
+        ('/a_directory/another_file', {'sha256': (
+         'c7fbc0e821c0871805a99584c6a384533909f68a6bbe9a2a687d28d9f3b10c16')}),
+        ('/a_directory/a_file', {'sha256': (
+         '4a49638d0e1055fd9e4c17fef7fdf4d6ccf892b6d9c2f64164203c4bfb0ec92d')}),
+        ('/passwords.txt', {'sha256': (
+         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')})]
+
+    with test_lib.TempDirectory() as temp_directory:
+      cache_path = os.path.join(temp_directory, 'hashes.db')
+
+      hash_cache = recursive_hasher.HashCache(cache_path)
+      hash_cache.Open()
+
+      test_hasher = recursive_hasher.RecursiveHasher(hash_cache=hash_cache)
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+
+      output_writer = TestOutputWriter()
+      test_hasher.CalculateHashes(base_path_specs, output_writer)
+      hash_cache.Close()
+
+      self.assertEqual(output_writer.hashes, expected_hashes)
+
+      # A repeated run should not read any data.
+      hash_cache = recursive_hasher.HashCache(cache_path)
+      hash_cache.Open()
+
+      test_hasher = recursive_hasher.RecursiveHasher(hash_cache=hash_cache)
+
+      output_writer = TestOutputWriter()
+      with mock.patch.object(
+          test_hasher, '_CalculateHashDataStream') as mock_calculate:
+        test_hasher.CalculateHashes(base_path_specs, output_writer)
+        mock_calculate.assert_not_called()
+
+      hash_cache.Close()
+
+      self.assertEqual(output_writer.hashes, expected_hashes)
+
+  def testGetAllocatedSize(self):
+    """Tests the GetAllocatedSize function."""
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    base_path_specs = test_hasher.GetBasePathSpecs(path)
+    allocated_size = test_hasher.GetAllocatedSize(base_path_specs)
+    self.assertIsNone(allocated_size)
+
+    if hasattr(os, 'statvfs'):
+      path = self._GetTestFilePath([])
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+      allocated_size = test_hasher.GetAllocatedSize(base_path_specs)
+      self.assertGreater(allocated_size, 0)
+
+  def testGetFirstExtentOffset(self):
+    """Tests the _GetFirstExtentOffset function."""
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    file_entry = mock.MagicMock(spec=['GetFileObject'])
+    extent_offset = test_hasher._GetFirstExtentOffset(file_entry, '')
+    self.assertIsNone(extent_offset)
+
+    file_entry = mock.MagicMock()
+    file_entry.GetExtents.return_value = [
+        mock.MagicMock(
+            extent_type=test_hasher._EXTENT_TYPE_SPARSE, offset=0, size=256),
+        mock.MagicMock(extent_type='data', offset=8192, size=256)]
+
+    extent_offset = test_hasher._GetFirstExtentOffset(file_entry, '')
+    self.assertEqual(extent_offset, 8192)
+
+  def testGetQueuedResultRecord(self):
+    """Tests the _GetQueuedResultRecord function."""
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/a_file')
+    link_key = (1, 2, '')
+    test_hasher._hard_link_cache.SetHashValues(link_key, {'sha256': 'hash'})
+
+    queued_result = (
+        '/a_file', path_spec, '', 116, None, None, None, link_key, None)
+    record = test_hasher._GetQueuedResultRecord(queued_result)
+    self.assertEqual(record.hash_values, {'sha256': 'hash'})
+    self.assertIsNone(record.error)
+
+    # Test with a link that was evicted from the hard link cache and of
+    # which the file entry cannot be opened.
+    queued_result = (
+        '/a_file', path_spec, '', 116, None, None, None, (1, 3, ''), None)
+
+    with mock.patch.object(
+        recursive_hasher.resolver.Resolver, 'OpenFileEntry',
+        side_effect=dfvfs_errors.BackEndError('error')):
+      record = test_hasher._GetQueuedResultRecord(queued_result)
+
+    self.assertIsNone(record.hash_values)
+    self.assertEqual(record.error, 'Unable to open file entry')
+
+  def testGetSparseRanges(self):
+    """Tests the _GetSparseRanges function."""
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    file_entry = mock.MagicMock(spec=['GetFileObject'])
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1024)
+    self.assertEqual(sparse_ranges, [])
+
+    sparse_extent_type = test_hasher._EXTENT_TYPE_SPARSE
+
+    file_entry = mock.MagicMock()
+    file_entry.GetExtents.return_value = [
+        mock.MagicMock(extent_type=sparse_extent_type, size=256),
+        mock.MagicMock(extent_type='data', size=256),
+        mock.MagicMock(extent_type=sparse_extent_type, size=256),
+        mock.MagicMock(extent_type=sparse_extent_type, size=512)]
+
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1000)
+    self.assertEqual(sparse_ranges, [(0, 256), (512, 488)])
+
+    # Test with extents that do not cover the data stream.
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 2000)
+    self.assertEqual(sparse_ranges, [])
+
+    # Test with extents that extend beyond the data stream before the last.
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 700)
+    self.assertEqual(sparse_ranges, [])
+
+    # Test with data that is stored compressed.
+    file_entry.type_indicator = dfvfs_definitions.TYPE_INDICATOR_NTFS
+    file_entry._fsntfs_file_entry.file_attribute_flags = 0x00000820
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1000)
+    self.assertEqual(sparse_ranges, [])
+
+    file_entry.type_indicator = dfvfs_definitions.TYPE_INDICATOR_TSK
+    file_entry._tsk_file.info.meta.flags = 0x0015
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1000)
+    self.assertEqual(sparse_ranges, [])
+
+    file_entry._tsk_file.info.meta.flags = 0x0005
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1000)
+    self.assertEqual(sparse_ranges, [(0, 256), (512, 488)])
+
+    file_entry.GetExtents.side_effect = NotImplementedError
+    sparse_ranges = test_hasher._GetSparseRanges(file_entry, '', 1000)
+    self.assertEqual(sparse_ranges, [])
+
   def testGetBasePathSpecs(self):
     """Tests the GetBasePathSpecs function."""
     path = self._GetTestFilePath(['image.qcow2'])
@@ -166,16 +1050,458 @@ class RecursiveHasherTest(test_lib.BaseTestCase):
     base_path_specs = test_hasher.GetBasePathSpecs(path)
     self.assertEqual(base_path_specs, [expected_path_spec])
 
+  def testGetBasePathSpecsWithScanResultCache(self):
+    """Tests the GetBasePathSpecs function with a scan result cache."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location=path)
+
+    def _GetBasePathSpecs(volume_scanner_object, source_path, options=None):
+      """Determines the base path specifications after prompting the user."""
+      # pylint: disable=protected-access,unused-argument
+      volume_scanner_object._mediator.GetPartitionIdentifiers(
+          None, ['p1', 'p2'])
+      return [path_spec]
+
+    with test_lib.TempDirectory() as temp_directory:
+      scan_result_cache = helpers.ScanResultCache(
+          os.path.join(temp_directory, 'scan_cache.json'))
+      scan_result_cache.Open()
+
+      mediator = mock.MagicMock()
+      test_hasher = recursive_hasher.RecursiveHasher(
+          mediator=mediator, scan_result_cache=scan_result_cache)
+
+      with mock.patch.object(
+          recursive_hasher.volume_scanner.VolumeScanner, 'GetBasePathSpecs',
+          _GetBasePathSpecs):
+        base_path_specs = test_hasher.GetBasePathSpecs(path)
+
+      self.assertEqual(base_path_specs, [path_spec])
+      self.assertEqual(mediator.GetPartitionIdentifiers.call_count, 1)
+      self.assertIs(test_hasher._mediator, mediator)
+
+      # The partitions were selected at a prompt, hence the base path
+      # specifications are not cached.
+      self.assertIsNone(scan_result_cache.GetBasePathSpecs(path))
+
+      base_path_specs = test_hasher.GetBasePathSpecs(path)
+      self.assertIsNotNone(scan_result_cache.GetBasePathSpecs(path))
+
+      scan_result_cache.Close()
+
+  def testGetWorkerMaximumReadBufferMemory(self):
+    """Tests the _GetWorkerMaximumReadBufferMemory function."""
+    test_hasher = recursive_hasher.RecursiveHasher()
+
+    maximum_read_buffer_memory = (
+        test_hasher._GetWorkerMaximumReadBufferMemory(8))
+    self.assertIsNone(maximum_read_buffer_memory)
+
+    test_hasher = recursive_hasher.RecursiveHasher(
+        maximum_read_buffer_memory=16 * 1024 * 1024)
+
+    maximum_read_buffer_memory = (
+        test_hasher._GetWorkerMaximumReadBufferMemory(8))
+    self.assertEqual(maximum_read_buffer_memory, 2 * 1024 * 1024)
+
+    # The read buffers of the worker processes fit the maximum read buffer
+    # memory, since the read buffer size of a worker process is reduced.
+    worker_hasher = recursive_hasher.RecursiveHasher(
+        maximum_read_buffer_memory=maximum_read_buffer_memory,
+        read_buffer_size=test_hasher._read_buffer_pool.buffer_size)
+
+    read_buffer_pool = worker_hasher._read_buffer_pool
+    self.assertLessEqual(
+        8 * read_buffer_pool.buffer_size *
+        read_buffer_pool.maximum_number_of_buffers, 16 * 1024 * 1024)
+
+  def testReadData(self):
+    """Tests the _ReadData function."""
+    test_hasher = recursive_hasher.RecursiveHasher(read_buffer_size=16)
+
+    # Test with a file object that supports readinto.
+    file_object = ShortReadFileObject(b'A' * 20)
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(bytes(data), b'A' * 16)
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(bytes(data), b'A' * 4)
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(bytes(data), b'')
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    # Test with a file object that does not support readinto.
+    file_object = mock.Mock(spec=['read'])
+    file_object.read.side_effect = ShortReadFileObject(b'A' * 20).read
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(data, b'A' * 16)
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(data, b'A' * 4)
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    read_buffer, data = test_hasher._ReadData(file_object)
+    self.assertEqual(data, b'')
+    test_hasher._read_buffer_pool.Free(read_buffer)
+
+    self.assertEqual(test_hasher._read_buffer_pool._number_of_buffers_in_use, 0)
+
+
+class CheckpointJournalTest(test_lib.BaseTestCase):
+  """Tests for the checkpoint journal."""
+
+  def testWriteEntry(self):
+    """Tests the WriteEntry and HasEntry functions."""
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/password.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'checkpoint.jsonl')
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      self.assertFalse(checkpoint_journal.HasEntry(path_spec, ''))
+
+      checkpoint_journal.WriteEntry(path_spec, '', {
+          'md5': '39cb097008d17660abd0539891a672af'})
+      self.assertTrue(checkpoint_journal.HasEntry(path_spec, ''))
+      self.assertFalse(checkpoint_journal.HasEntry(path_spec, 'stream'))
+      checkpoint_journal.Flush()
+      checkpoint_journal.Close()
+
+      # Simulate a journal of a run that was killed while writing an entry.
+      with io.open(path, mode='a', encoding='utf-8') as file_object:
+        file_object.write('{"data_stream": "", "hash')
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 1)
+      self.assertTrue(checkpoint_journal.HasEntry(path_spec, ''))
+
+      checkpoint_journal.WriteEntry(path_spec, 'stream', None)
+      checkpoint_journal.Flush()
+      checkpoint_journal.Close()
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 2)
+      self.assertTrue(checkpoint_journal.HasEntry(path_spec, 'stream'))
+
+      # Entries that have not been flushed are discarded on close.
+      checkpoint_journal.WriteEntry(path_spec, 'other', None)
+      checkpoint_journal.Close()
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 2)
+      self.assertFalse(checkpoint_journal.HasEntry(path_spec, 'other'))
+      checkpoint_journal.Close()
+
+  def testFlush(self):
+    """Tests the Flush function."""
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/password.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'checkpoint.jsonl')
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      checkpoint_journal.WriteEntry(path_spec, '', None)
+
+      # Entries are not written before the journal is flushed.
+      self.assertEqual(os.path.getsize(path), 0)
+
+      checkpoint_journal.Flush(output_offset=116)
+      self.assertFalse(checkpoint_journal.IsFlushRequired())
+      self.assertEqual(checkpoint_journal.output_offset, 116)
+
+      # Simulate a run that was killed before the entry was flushed.
+      checkpoint_journal.WriteEntry(path_spec, 'stream', None)
+      checkpoint_journal._file_object.close()  # pylint: disable=protected-access
+
+      checkpoint_journal = recursive_hasher.CheckpointJournal(path)
+      checkpoint_journal.Open()
+      self.assertEqual(checkpoint_journal.number_of_entries, 1)
+      self.assertEqual(checkpoint_journal.output_offset, 116)
+      self.assertTrue(checkpoint_journal.HasEntry(path_spec, ''))
+      self.assertFalse(checkpoint_journal.HasEntry(path_spec, 'stream'))
+      checkpoint_journal.Close()
+
+
+class HardLinkCacheTest(test_lib.BaseTestCase):
+  """Tests for the hard link cache."""
+
+  def testGetCacheKey(self):
+    """Tests the GetCacheKey function."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location=path)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_QCOW, parent=path_spec)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_TSK, location='/passwords.txt',
+        parent=path_spec)
+
+    file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+    hard_link_cache = recursive_hasher.HardLinkCache()
+
+    # The file entry has a single link.
+    cache_key = hard_link_cache.GetCacheKey(file_entry, '')
+    self.assertIsNone(cache_key)
+
+  def testGetHashValues(self):
+    """Tests the GetHashValues and SetHashValues functions."""
+    hard_link_cache = recursive_hasher.HardLinkCache(
+        maximum_number_of_entries=2)
+
+    hard_link_cache.SetHashValues(('fs', 1, ''), {'md5': '1'})
+    hard_link_cache.SetHashValues(('fs', 2, ''), {'md5': '2'})
+
+    hash_values = hard_link_cache.GetHashValues(('fs', 1, ''))
+    self.assertEqual(hash_values, {'md5': '1'})
+
+    # The least recently used entry is evicted.
+    hard_link_cache.SetHashValues(('fs', 3, ''), {'md5': '3'})
+
+    hash_values = hard_link_cache.GetHashValues(('fs', 2, ''))
+    self.assertIsNone(hash_values)
+
+    hash_values = hard_link_cache.GetHashValues(('fs', 1, ''))
+    self.assertEqual(hash_values, {'md5': '1'})
+
+
+class HashCacheTest(test_lib.BaseTestCase):
+  """Tests for the hash cache."""
+
+  def testGetCacheKey(self):
+    """Tests the GetCacheKey function."""
+    path = self._GetTestFilePath(['image.qcow2'])
+    self._SkipIfPathNotExists(path)
+
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location=path)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_QCOW, parent=path_spec)
+    path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_TSK, location='/passwords.txt',
+        parent=path_spec)
+
+    file_entry = resolver.Resolver.OpenFileEntry(path_spec)
+
+    hash_cache = recursive_hasher.HashCache('')
+    cache_key = hash_cache.GetCacheKey(file_entry, '')
+
+    self.assertIsNotNone(cache_key)
+    self.assertEqual(cache_key[1:5], ('/passwords.txt', '', '15', 116))
+
+    # The key of an alternate data stream contains the size of that data
+    # stream instead of the size of the default data stream.
+    file_object = mock.Mock()
+    file_object.get_size.return_value = 42
+
+    with mock.patch.object(
+        file_entry, 'GetFileObject', return_value=file_object):
+      cache_key = hash_cache.GetCacheKey(file_entry, 'stream')
+
+    self.assertIsNotNone(cache_key)
+    self.assertEqual(cache_key[1:5], ('/passwords.txt', 'stream', '15', 42))
+
+  def testGetHashValues(self):
+    """Tests the GetHashValues and SetHashValues functions."""
+    cache_key = (
+        'type: OS, location: /image.raw\n', '/password.txt', '', '15', 116,
+        '2021-01-01 00:00:00', '2021-01-01 00:00:00')
+    hash_values = {
+        'md5': '39cb097008d17660abd0539891a672af',
+        'sha256': (
+            '02a2a6af2f1ecf4720d7d49d640f0d0a'
+            '269a7ec733e41973bdd34f09dad0e252')}
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.db')
+
+      hash_cache = recursive_hasher.HashCache(path)
+      hash_cache.Open()
+
+      self.assertIsNone(hash_cache.GetHashValues(cache_key, ['sha256']))
+
+      hash_cache.SetHashValues(cache_key, hash_values)
+      hash_cache.Close()
+
+      hash_cache = recursive_hasher.HashCache(path)
+      hash_cache.Open()
+
+      cached_hash_values = hash_cache.GetHashValues(cache_key, ['sha256'])
+      self.assertEqual(cached_hash_values, {'sha256': hash_values['sha256']})
+
+      # Test with a digest hash that is not cached.
+      cached_hash_values = hash_cache.GetHashValues(
+          cache_key, ['sha1', 'sha256'])
+      self.assertIsNone(cached_hash_values)
+
+      # Test with a changed modification time.
+      changed_cache_key = cache_key[:5] + (
+          '2021-01-02 00:00:00', cache_key[6])
+      cached_hash_values = hash_cache.GetHashValues(
+          changed_cache_key, ['sha256'])
+      self.assertIsNone(cached_hash_values)
+
+      # Test that digest hashes of other hash names are retained.
+      hash_cache.SetHashValues(cache_key, {'sha1': 'hash'})
+
+      cached_hash_values = hash_cache.GetHashValues(
+          cache_key, ['md5', 'sha1', 'sha256'])
+      self.assertEqual(cached_hash_values, dict(hash_values, sha1='hash'))
+
+      # Test that digest hashes of changed metadata are replaced.
+      hash_cache.SetHashValues(changed_cache_key, {'sha1': 'hash'})
+
+      cached_hash_values = hash_cache.GetHashValues(
+          changed_cache_key, ['sha256'])
+      self.assertIsNone(cached_hash_values)
+
+      hash_cache.Close()
+
+
+class SparseFileObjectTest(test_lib.BaseTestCase):
+  """Tests for the sparse file-like object."""
+
+  def testRead(self):
+    """Tests the read function."""
+    data = b'A' * 8 + b'B' * 8 + b'C' * 8
+    file_object = io.BytesIO(data)
+    file_object.get_size = lambda: len(data)
+
+    sparse_file_object = recursive_hasher.SparseFileObject(
+        file_object, [(8, 8)], bytes(4))
+
+    self.assertEqual(sparse_file_object.get_size(), 24)
+
+    read_data = []
+    data = sparse_file_object.read(16)
+    while data:
+      read_data.append(bytes(data))
+      data = sparse_file_object.read(16)
+
+    self.assertEqual(read_data, [
+        b'A' * 8, b'\x00' * 4, b'\x00' * 4, b'C' * 8])
+    self.assertEqual(sparse_file_object.number_of_sparse_bytes, 8)
+
+
+class ReadBufferPoolTest(test_lib.BaseTestCase):
+  """Tests for the read buffer pool."""
+
+  def testAllocateAndFree(self):
+    """Tests the Allocate and Free functions."""
+    read_buffer_pool = recursive_hasher.ReadBufferPool(16, 2)
+
+    read_buffer = read_buffer_pool.Allocate()
+    self.assertEqual(len(read_buffer), 16)
+
+    read_buffer_pool.Free(read_buffer)
+
+    reused_read_buffer = read_buffer_pool.Allocate()
+    self.assertIs(reused_read_buffer, read_buffer)
+
+    reserved_read_buffer = read_buffer_pool.Allocate(reuse=False)
+    self.assertIsNone(reserved_read_buffer)
+
+    # The pool is exhausted, hence the next allocation blocks until a read
+    # buffer is freed by another thread.
+    timer = threading.Timer(0.05, read_buffer_pool.Free, args=(None, ))
+    timer.start()
+
+    read_buffer = read_buffer_pool.Allocate()
+    timer.join()
+
+    self.assertEqual(len(read_buffer), 16)
+
+
+class ProgressReporterTest(test_lib.BaseTestCase):
+  """Tests for the progress reporter."""
+
+  # pylint: disable=protected-access
+
+  def testStartAndStop(self):
+    """Tests the Start and Stop functions."""
+    profiler = helpers.StageProfiler()
+    profiler.IncrementCounter('file_entries', 3)
+
+    output = io.StringIO()
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'status.json')
+      progress_reporter = recursive_hasher.ProgressReporter(
+          profiler, output=output, status_file=path, total_size=2048)
+
+      progress_reporter.Start()
+      profiler.IncrementCounter('bytes_read', 1024)
+      progress_reporter.Stop()
+
+      with open(path, 'r', encoding='utf-8') as file_object:
+        status_values = json.load(file_object)
+
+    self.assertEqual(status_values['bytes_read'], 1024)
+    self.assertEqual(status_values['file_entries'], 3)
+    self.assertIsNone(status_values['remaining_time'])
+    self.assertEqual(status_values['status'], 'completed')
+    self.assertEqual(status_values['total_size'], 2048)
+
+    self.assertTrue(output.getvalue().startswith(
+        'completed: 3 file entries, 0.0 MiB hashed, '))
+
+  def testGetStatus(self):
+    """Tests the _GetStatus function."""
+    profiler = helpers.StageProfiler()
+
+    progress_reporter = recursive_hasher.ProgressReporter(
+        profiler, total_size=4096)
+    progress_reporter._last_report_time = 0.0
+    progress_reporter._start_time = 0.0
+
+    profiler.IncrementCounter('bytes_read', 1024)
+
+    status_values = progress_reporter._GetStatus('running')
+    self.assertEqual(status_values['bytes_read'], 1024)
+    self.assertGreater(status_values['bytes_per_second'], 0.0)
+    self.assertGreater(status_values['remaining_time'], 0.0)
+
+    status_values = progress_reporter._GetStatus('running')
+    self.assertEqual(status_values['bytes_per_second'], 0.0)
+
 
 class OutputWriterTest(test_lib.BaseTestCase):
   """Tests for the output writer."""
 
+  # pylint: disable=protected-access
+
   def testInitialize(self):
     """Tests the __init__ function."""
     output_writer = recursive_hasher.OutputWriter()
     self.assertIsNotNone(output_writer)
 
-  # TODO: add tests for _EncodeString
+  def testEncodeString(self):
+    """Tests the _EncodeString function."""
+    output_writer = recursive_hasher.OutputWriter(encoding='ascii')
+
+    encoded_string = output_writer._EncodeString('/password.txt')
+    self.assertEqual(encoded_string, b'/password.txt')
+
+    encoded_string = output_writer._EncodeString('/pass\u00e9word.txt')
+    self.assertEqual(encoded_string, b'/pass?word.txt')
 
 
 class FileOutputWriterTest(test_lib.BaseTestCase):
@@ -187,20 +1513,210 @@ class FileOutputWriterTest(test_lib.BaseTestCase):
       path = os.path.join(temp_directory, 'hashes.txt')
       output_writer = recursive_hasher.FileOutputWriter(path)
 
+      hash_values = {
+          'md5': '39cb097008d17660abd0539891a672af',
+          'sha256': (
+              '02a2a6af2f1ecf4720d7d49d640f0d0a'
+              '269a7ec733e41973bdd34f09dad0e252')}
+
       output_writer.Open()
-      output_writer.WriteFileHash(
-          '/password.txt',
-          '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')
+      output_writer.WriteFileHash('/password.txt', hash_values)
       output_writer.Close()
 
       with io.open(path, mode='rb') as file_object:
         output = file_object.read()
 
     expected_output = (
+        '39cb097008d17660abd0539891a672af\t'
         '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252'
         '\t/password.txt').encode('utf-8')
     self.assertEqual(output.rstrip(), expected_output)
 
+  def testWriteFileHashWithBatchSize(self):
+    """Tests the WriteFileHash function with a batch size."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.txt')
+      output_writer = recursive_hasher.FileOutputWriter(path, batch_size=2)
+
+      output_writer.Open()
+      output_writer.WriteFileHash('/a_file', {'md5': 'N/A'})
+      output_writer.Flush()
+      self.assertEqual(os.path.getsize(path), 12)
+
+      output_writer.WriteFileHash('/another_file', {'md5': 'N/A'})
+      self.assertEqual(os.path.getsize(path), 12)
+
+      output_writer.WriteFileHash('/password.txt', {'md5': 'N/A'})
+      self.assertEqual(os.path.getsize(path), 48)
+
+      output_writer.Close()
+
+      with io.open(path, mode='rb') as file_object:
+        output = file_object.read()
+
+    expected_output = (
+        b'N/A\t/a_file\nN/A\t/another_file\nN/A\t/password.txt\n')
+    self.assertEqual(output, expected_output)
+
+
+class CSVOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the comma separated values (CSV) output writer."""
+
+  def testWriteFileHash(self):
+    """Tests the WriteFileHash function."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.csv')
+      output_writer = recursive_hasher.CSVOutputWriter(path, ['md5', 'sha1'])
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/pass,word.txt', {'md5': '39cb097008d17660abd0539891a672af',
+                             'sha1': 'N/A'},
+          data_stream_name='', size=116)
+      output_writer.Close()
+
+      output_writer = recursive_hasher.CSVOutputWriter(
+          path, ['md5', 'sha1'], append=True)
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/a_file', {'md5': 'N/A', 'sha1': 'N/A'}, data_stream_name='')
+      output_writer.Close()
+
+      with io.open(path, mode='rb') as file_object:
+        output = file_object.read()
+
+    expected_output = (
+        b'path,data_stream,path_spec,size,md5,sha1\n'
+        b'"/pass,word.txt",,,116,39cb097008d17660abd0539891a672af,N/A\n'
+        b'/a_file,,,,N/A,N/A\n')
+    self.assertEqual(output, expected_output)
+
+
+  def testWriteFileHashWithTag(self):
+    """Tests the WriteFileHash function with a tag column."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.csv')
+      output_writer = recursive_hasher.CSVOutputWriter(
+          path, ['md5'], include_tag=True)
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/a_file', {'md5': 'N/A'}, data_stream_name='')
+      output_writer.WriteFileHash(
+          '/passwords.txt', {'md5': '39cb097008d17660abd0539891a672af'},
+          data_stream_name='', size=116, tag='known_bad')
+      output_writer.Close()
+
+      with io.open(path, mode='rb') as file_object:
+        output = file_object.read()
+
+    expected_output = (
+        b'path,data_stream,path_spec,size,md5,tag\n'
+        b'/a_file,,,,N/A,\n'
+        b'/passwords.txt,,,116,39cb097008d17660abd0539891a672af,known_bad\n')
+    self.assertEqual(output, expected_output)
+
+
+class JSONLinesOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the JSON Lines output writer."""
+
+  def testWriteFileHash(self):
+    """Tests the WriteFileHash function."""
+    test_path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/passwords.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.jsonl')
+      output_writer = recursive_hasher.JSONLinesOutputWriter(path)
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/passwords.txt', {'md5': '39cb097008d17660abd0539891a672af'},
+          data_stream_name='', path_spec=test_path_spec, size=116)
+      output_writer.Close()
+
+      with io.open(path, mode='rt', encoding='utf-8') as file_object:
+        lines = file_object.readlines()
+
+    self.assertEqual(len(lines), 1)
+
+    expected_json_dict = {
+        'data_stream': '',
+        'md5': '39cb097008d17660abd0539891a672af',
+        'path': '/passwords.txt',
+        'path_spec': 'type: OS, location: /passwords.txt\n',
+        'size': 116}
+    self.assertEqual(json.loads(lines[0]), expected_json_dict)
+
+
+@unittest.skipIf(recursive_hasher.pyarrow is None, 'missing pyarrow')
+class ParquetOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the Apache Parquet output writer."""
+
+  def testWriteFileHash(self):
+    """Tests the WriteFileHash function."""
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.parquet')
+      output_writer = recursive_hasher.ParquetOutputWriter(
+          path, ['md5'], batch_size=2)
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/a_file', {'md5': 'N/A'}, data_stream_name='', size=0)
+      output_writer.WriteFileHash(
+          '/another_file', {'md5': 'N/A'}, data_stream_name='', size=1)
+      output_writer.WriteFileHash(
+          '/passwords.txt', {'md5': '39cb097008d17660abd0539891a672af'},
+          data_stream_name='', size=116)
+      output_writer.Close()
+
+      parquet_file = recursive_hasher.parquet.ParquetFile(path)
+      number_of_row_groups = parquet_file.metadata.num_row_groups
+      table = parquet_file.read()
+
+    self.assertEqual(number_of_row_groups, 2)
+    self.assertEqual(table.column_names, [
+        'path', 'data_stream', 'path_spec', 'size', 'md5'])
+    self.assertEqual(table.column('path').to_pylist(), [
+        '/a_file', '/another_file', '/passwords.txt'])
+    self.assertEqual(table.column('size').to_pylist(), [0, 1, 116])
+
+
+class SpoolOutputWriterTest(test_lib.BaseTestCase):
+  """Tests for the spool output writer."""
+
+  def testWriteFileHash(self):
+    """Tests the WriteFileHash, WriteRecord and ReadRecords functions."""
+    test_path_spec = path_spec_factory.Factory.NewPathSpec(
+        dfvfs_definitions.TYPE_INDICATOR_OS, location='/passwords.txt')
+
+    with test_lib.TempDirectory() as temp_directory:
+      path = os.path.join(temp_directory, 'hashes.spool')
+      output_writer = recursive_hasher.SpoolOutputWriter(path, batch_size=2)
+
+      output_writer.Open()
+      output_writer.WriteFileHash(
+          '/a_file', {'md5': 'N/A'}, data_stream_name='', size=0)
+      output_writer.WriteRecord(recursive_hasher.FileHashRecord(
+          '/another_file', None, error='Unable to open data stream', size=1))
+      output_writer.WriteFileHash(
+          '/passwords.txt', {'md5': '39cb097008d17660abd0539891a672af'},
+          data_stream_name='', path_spec=test_path_spec, size=116)
+      output_writer.Close()
+
+      file_hashes = [
+          (record.path, record.hash_values, record.data_stream_name,
+           record.error, record.path_spec, record.size)
+          for record in output_writer.ReadRecords()]
+
+    expected_file_hashes = [
+        ('/a_file', {'md5': 'N/A'}, '', None, None, 0),
+        ('/another_file', None, '', 'Unable to open data stream', None, 1),
+        ('/passwords.txt', {'md5': '39cb097008d17660abd0539891a672af'}, '',
+         None, test_path_spec, 116)]
+    self.assertEqual(file_hashes, expected_file_hashes)
+
 
 class StdoutWriterTest(test_lib.BaseTestCase):
   """Tests for the stdout output writer."""
@@ -210,6 +1726,11 @@ class StdoutWriterTest(test_lib.BaseTestCase):
     with test_lib.TempDirectory() as temp_directory:
       original_stdout = sys.stdout
 
+      hash_values = {
+          'sha256': (
+              '02a2a6af2f1ecf4720d7d49d640f0d0a'
+              '269a7ec733e41973bdd34f09dad0e252')}
+
       path = os.path.join(temp_directory, 'hashes.txt')
 
       with io.open(path, mode='wt', encoding='utf-8') as file_object:
@@ -218,9 +1739,7 @@ class StdoutWriterTest(test_lib.BaseTestCase):
         output_writer = recursive_hasher.StdoutWriter()
 
         output_writer.Open()
-        output_writer.WriteFileHash(
-            '/password.txt',
-            '02a2a6af2f1ecf4720d7d49d640f0d0a269a7ec733e41973bdd34f09dad0e252')
+        output_writer.WriteFileHash('/password.txt', hash_values)
         output_writer.Close()
 
       sys.stdout = original_stdout